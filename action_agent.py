@@ -1,6 +1,14 @@
+import time
 from openai import OpenAI
+from image_payload import image_parts
+from llm_resilience import get_resilient_caller
+from response_cache import file_digest, get_response_cache, make_key
 
-client = OpenAI()
+# Retries are done by the resilient caller, which knows the deadline
+client = OpenAI(max_retries=0)
+
+MODEL = "gpt-4o-mini"
+MAX_COMPLETION_TOKENS = 100
 
 prompt_template = """
 You are a helpful assistant that summarizes notes from a screenshot.
@@ -15,19 +23,75 @@ system_prompt = """
     So, please refactor and summarize the note and the Screenshot content for better clarity when searching for it later.
 """
 
-def summarize_notes(notes, image_url):
-    response = client.chat.completions.create(
-        model="gpt-4o-mini",
-        messages=[
-            {"role": "system", "content": system_prompt},
-            {"role": "user", "content": prompt_template.format(notes=notes)},
-            {
-                "type": "image_url",
-                "image_url": {
-                    "url": image_url,
-                },
-            },
-        ],
-        max_completion_tokens=100
+def _stream_completion(messages, timeout, on_text):
+    """Stream a completion, calling on_text with the text so far after each chunk"""
+    end = time.monotonic() + timeout
+    stream = client.chat.completions.create(
+        model=MODEL,
+        messages=messages,
+        max_completion_tokens=MAX_COMPLETION_TOKENS,
+        timeout=timeout,
+        stream=True,
     )
-    return response.choices[0].message.content
+    parts = []
+    with stream:
+        for chunk in stream:
+            if time.monotonic() > end:
+                # Abandoned by the caller; a retry is streaming instead
+                raise TimeoutError("summary stream passed its deadline")
+            delta = chunk.choices[0].delta.content if chunk.choices else None
+            if delta:
+                parts.append(delta)
+                on_text("".join(parts))
+    return "".join(parts)
+
+
+def summarize_notes(notes, image_url, cache=None, on_text=None):
+    """Summary of a note and its screenshot; repeated requests are served from the response cache.
+
+    With on_text, the summary is streamed: on_text is called from this thread
+    with the text generated so far as tokens arrive. A retry starts over, so
+    the text passed can also get shorter.
+    """
+    cache = cache or get_response_cache()
+    payload = {
+        "system": system_prompt,
+        "prompt": prompt_template.format(notes=notes),
+        "max_completion_tokens": MAX_COMPLETION_TOKENS,
+    }
+    key = make_key(MODEL, payload, scope=file_digest(image_url) or image_url)
+    cached = cache.get(key)
+    if cached is not None:
+        if on_text:
+            on_text(cached)
+        return cached
+
+    messages = [
+        {"role": "system", "content": system_prompt},
+        {
+            "role": "user",
+            "content": [
+                {"type": "text", "text": prompt_template.format(notes=notes)},
+                *image_parts(image_url),
+            ],
+        },
+    ]
+
+    def request(timeout):
+        return client.chat.completions.create(
+            model=MODEL,
+            messages=messages,
+            max_completion_tokens=MAX_COMPLETION_TOKENS,
+            timeout=timeout,
+        ).choices[0].message.content
+
+    if on_text:
+        summary = get_resilient_caller().call(
+            lambda timeout: _stream_completion(messages, timeout, on_text),
+            task="summarize_notes", key=MODEL, hedge=False,
+        )
+    else:
+        summary = get_resilient_caller().call(request, task="summarize_notes", key=MODEL)
+    if summary:
+        cache.put(key, MODEL, summary)
+    return summary
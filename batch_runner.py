@@ -0,0 +1,166 @@
+"""
+Run PostScreenshotCrew over the screenshot backlog.
+
+    python batch_runner.py [--search TEXT] [--limit N] [--in-flight 4] [--rpm 30] [--retry-failed]
+
+Screenshots with a note are taken from the catalog (newest first, or matching
+a search). Those already recorded as done in the progress file, or whose note
+already has results in the result store, are skipped, so an interrupted batch
+resumes where it stopped. The rest run concurrently, at most --in-flight at a
+time, and every crew's LLM requests together are kept to --rpm per minute
+(retries and hedged requests included; answers from the response cache are
+free).
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import time
+from datetime import datetime
+
+# Disable only CrewAI telemetry
+os.environ["CREWAI_TELEMETRY"] = "false"
+
+from catalog import Catalog
+from crews.runner import get_classifier, get_speculative, is_processed, run_post_screenshot
+from llm_resilience import get_resilient_caller
+from response_cache import get_response_cache
+from tools.cached_search_tool import get_search_cache
+
+SAVE_DIR = "screenshots_notes"
+PROGRESS_PATH = os.path.join(SAVE_DIR, ".batch_progress.jsonl")
+
+
+def load_progress(path):
+    """Latest recorded status per screenshot ID"""
+    progress = {}
+    if not os.path.exists(path):
+        return progress
+    with open(path, "r") as f:
+        for line in f:
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                # A line cut short by an interrupted run
+                continue
+            progress[entry["id"]] = entry
+    return progress
+
+
+def select_screenshots(catalog, search=None, limit=None):
+    """Catalog rows with a note to process, newest first or best search match first"""
+    if search:
+        rows = [catalog.get(record.path) for record in catalog.search(search, limit=limit or 500)]
+    else:
+        rows = catalog.list(limit=limit or -1)
+    return [row for row in rows if row and row["path"] and (row["note"] or "").strip()]
+
+
+def make_inputs(row):
+    return {
+        "screenshot_url": row["path"],
+        "note": row["note"],
+        "notes": row["note"],
+        "current_time": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+    }
+
+
+class BatchRunner:
+    """
+        Processes screenshots through the crew with asyncio.
+
+        A semaphore caps the crews in flight; each kickoff runs in a worker
+        thread. The LLM request rate is limited by the shared ResilientCaller,
+        not here. Every finished item is appended to the progress file straight
+        away, so progress survives interruption.
+    """
+
+    def __init__(self, run=run_post_screenshot, in_flight=4, progress_path=PROGRESS_PATH, catalog=None):
+        self.run = run
+        self.catalog = catalog
+        self.in_flight = in_flight
+        self.progress_path = progress_path
+        self.latencies = []
+        self.counts = {"done": 0, "failed": 0}
+
+    def _record(self, entry):
+        with open(self.progress_path, "a") as f:
+            f.write(json.dumps(entry) + "\n")
+
+    async def _process(self, row, semaphore):
+        async with semaphore:
+            started = time.perf_counter()
+            entry = {"id": row["id"], "path": row["path"]}
+            try:
+                result = await asyncio.to_thread(self.run, make_inputs(row), catalog=self.catalog)
+                entry.update(status="done", output=str(result))
+                self.counts["done"] += 1
+            except Exception as e:
+                print(f"Error processing {row['path']}: {e}")
+                entry.update(status="failed", error=str(e))
+                self.counts["failed"] += 1
+            entry["seconds"] = round(time.perf_counter() - started, 3)
+            entry["finished_at"] = time.time()
+            self.latencies.append(entry["seconds"])
+            self._record(entry)
+            print(f"[{sum(self.counts.values())}] {entry['status']}: {row['path']} ({entry['seconds']:.1f}s)")
+
+    async def run_all(self, rows):
+        semaphore = asyncio.Semaphore(self.in_flight)
+        await asyncio.gather(*(self._process(row, semaphore) for row in rows))
+
+    def report(self, elapsed, skipped):
+        processed = sum(self.counts.values())
+        report = dict(self.counts, skipped=skipped, elapsed_s=round(elapsed, 1))
+        report["per_minute"] = round(processed / elapsed * 60, 2) if elapsed else 0.0
+        if self.latencies:
+            ordered = sorted(self.latencies)
+            report["mean_s"] = round(statistics.mean(ordered), 2)
+            report["p95_s"] = round(ordered[int(0.95 * (len(ordered) - 1))], 2)
+        return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--search", help="only screenshots whose note or summary match this text")
+    parser.add_argument("--limit", type=int, help="process at most this many screenshots")
+    parser.add_argument("--in-flight", type=int, default=4, help="crews running at once")
+    parser.add_argument("--rpm", type=float, default=30,
+                        help="LLM requests per minute across all crews (0 for no limit)")
+    parser.add_argument("--retry-failed", action="store_true", help="also rerun screenshots that failed before")
+    parser.add_argument("--progress", default=PROGRESS_PATH, help="progress file to resume from")
+    args = parser.parse_args()
+
+    catalog = Catalog(os.path.join(SAVE_DIR, "catalog.db"))
+    catalog.reconcile(SAVE_DIR)
+    rows = select_screenshots(catalog, args.search, args.limit)
+
+    progress = load_progress(args.progress)
+    finished = ("done", "failed") if not args.retry_failed else ("done",)
+    pending = [
+        row for row in rows
+        if progress.get(row["id"], {}).get("status") not in finished and not is_processed(make_inputs(row))
+    ]
+    skipped = len(rows) - len(pending)
+    print(f"{len(pending)} screenshots to process, {skipped} already processed")
+
+    get_resilient_caller().limit_rate(args.rpm, burst=args.in_flight)
+    runner = BatchRunner(in_flight=args.in_flight, progress_path=args.progress, catalog=catalog)
+    started = time.perf_counter()
+    try:
+        asyncio.run(runner.run_all(pending))
+    except KeyboardInterrupt:
+        print("Interrupted, run again to resume")
+    report = runner.report(time.perf_counter() - started, skipped)
+    print(json.dumps(report, indent=2))
+    print(f"Classifier: {get_classifier().stats()}")
+    print(f"Response cache: {get_response_cache().stats()}")
+    print(f"Search cache: {get_search_cache().stats()}")
+    print(f"LLM calls: {get_resilient_caller().stats()}")
+    if get_speculative():
+        print(f"Speculation: {get_speculative().stats()}")
+
+
+if __name__ == "__main__":
+    main()
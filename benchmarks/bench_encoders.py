@@ -0,0 +1,93 @@
+"""
+Encode time and output size per encoder over a corpus of screenshots.
+
+    python benchmarks/bench_encoders.py [corpus_dir] [--encoders png:1,png:6,webp:80] [--repeat 3] [--json]
+
+Images are downscaled the same way captures are before encoding, so the
+numbers match what the capture pipeline would store.
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from PIL import Image  # noqa: E402
+
+from encoders import IMAGE_EXTENSIONS, get_encoder, is_photographic  # noqa: E402
+
+DEFAULT_ENCODERS = "png:1,png:6,png:9,webp-lossless,webp:80,jpeg:85"
+MAX_SIZE = 1500
+
+
+def load_corpus(corpus_dir):
+    images = []
+    for name in sorted(os.listdir(corpus_dir)):
+        if not name.lower().endswith(IMAGE_EXTENSIONS):
+            continue
+        with Image.open(os.path.join(corpus_dir, name)) as img:
+            img = img.convert('RGB')
+        if max(img.size) > MAX_SIZE:
+            ratio = MAX_SIZE / max(img.size)
+            img = img.resize(tuple(int(dim * ratio) for dim in img.size), Image.Resampling.LANCZOS)
+        images.append((name, img))
+    return images
+
+
+def bench_encoder(encoder, images, repeat):
+    times = []
+    total_bytes = 0
+    raw_bytes = 0
+    for _, img in images:
+        best = None
+        for _ in range(repeat):
+            started = time.perf_counter()
+            data = encoder.encode(img)
+            elapsed = time.perf_counter() - started
+            best = elapsed if best is None else min(best, elapsed)
+        times.append(best)
+        total_bytes += len(data)
+        raw_bytes += img.size[0] * img.size[1] * 3
+    return {
+        "encoder": encoder.spec,
+        "images": len(images),
+        "mean_ms": statistics.mean(times) * 1000,
+        "median_ms": statistics.median(times) * 1000,
+        "total_ms": sum(times) * 1000,
+        "total_bytes": total_bytes,
+        "mean_bytes": total_bytes // len(images),
+        "ratio": total_bytes / raw_bytes,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("corpus", nargs="?", default="screenshots_notes")
+    parser.add_argument("--encoders", default=DEFAULT_ENCODERS)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--json", action="store_true", help="print machine-readable results")
+    args = parser.parse_args()
+
+    images = load_corpus(args.corpus)
+    if not images:
+        parser.error(f"No images found in {args.corpus}")
+
+    photos = sum(1 for _, img in images if is_photographic(img))
+    results = [bench_encoder(get_encoder(spec), images, args.repeat) for spec in args.encoders.split(",")]
+
+    if args.json:
+        print(json.dumps({"corpus": args.corpus, "photographic": photos, "results": results}, indent=2))
+        return
+
+    print(f"{len(images)} images from {args.corpus} ({photos} photographic)")
+    print(f"{'encoder':<16}{'mean ms':>10}{'median ms':>11}{'mean KB':>10}{'ratio':>8}")
+    for r in results:
+        print(f"{r['encoder']:<16}{r['mean_ms']:>10.1f}{r['median_ms']:>11.1f}{r['mean_bytes'] / 1024:>10.1f}{r['ratio']:>8.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,448 @@
+"""
+Capture and viewer hot paths over a synthetic screenshot library, headless.
+
+    python benchmarks/bench_library.py [--count 2000] [--resolution 1920x1080] [--note-words 5:200]
+                                       [--samples 30] [--workdir DIR] [--output FILE]
+                                       [--budget STAGE=MS] [--json]
+
+Generates a library with benchmarks/synthetic_library.py in a temporary
+working directory, then times, in milliseconds per operation:
+
+    first_open      indexing the whole library into an empty catalog
+    cold_open       a new viewer: open the catalog, render the first rows and
+                    show the first preview
+    reconcile       the catalog check the viewer runs after opening
+    select_cold     selecting an item whose thumbnail has never been made
+    select_thumb    selecting it again with only the on-disk thumbnail cached
+    select_memory   selecting it again with its preview in memory
+    scroll          arrowing down the list, one key repeat at a time
+    search          running a search and rendering its first rows
+    save_note       appending to a note
+    delete_refresh  deleting the selected screenshot and refreshing the list
+    capture_encode  encode_image on an in-memory capture
+    optimize_image  re-encoding a saved capture
+
+The viewer is driven through its own methods with the Tk widgets replaced by
+plain objects, so no display is needed. Results include the configuration,
+Python version and git commit; --output writes them as JSON for regression
+tracking. The command exits with status 1 when the median of any stage
+exceeds its budget.
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from list_model import ListWindow  # noqa: E402
+from synthetic_library import (  # noqa: E402
+    SEARCH_QUERIES, generate_library, make_note, parse_range, parse_resolution, render_screenshot,
+)
+
+# Median milliseconds allowed per stage
+BUDGETS_MS = {
+    "first_open": 60000,
+    "cold_open": 500,
+    "reconcile": 1000,
+    "select_cold": 250,
+    "select_thumb": 50,
+    "select_memory": 5,
+    "scroll": 100,
+    "search": 100,
+    "save_note": 20,
+    "delete_refresh": 100,
+    "capture_encode": 1500,
+    "optimize_image": 2000,
+}
+
+# Seconds to wait for a preview before giving up on it
+PREVIEW_TIMEOUT = 10.0
+
+
+def percentile(ordered, p):
+    if not ordered:
+        return None
+    return ordered[min(len(ordered) - 1, int(p / 100 * len(ordered)))]
+
+
+def summarize(samples):
+    ordered = sorted(seconds * 1000 for seconds in samples)
+    if not ordered:
+        return {"n": 0}
+    return {
+        "n": len(ordered),
+        "median_ms": round(statistics.median(ordered), 3),
+        "p95_ms": round(percentile(ordered, 95), 3),
+        "max_ms": round(ordered[-1], 3),
+        "mean_ms": round(statistics.mean(ordered), 3),
+    }
+
+
+def git_commit():
+    try:
+        result = subprocess.run(["git", "rev-parse", "HEAD"], cwd=ROOT, capture_output=True, text=True, check=True)
+        return result.stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def spread(count, samples, gap):
+    """Up to `samples` indices across [0, count), at least `gap` apart"""
+    samples = max(1, min(samples, count // gap))
+    step = max(gap, (count - 1) // samples)
+    return list(range(step // 2, count, step))[:samples]
+
+
+class SearchVar:
+    """Stands in for the search box's StringVar"""
+
+    def __init__(self):
+        self.value = ""
+
+    def get(self):
+        return self.value
+
+    def set(self, value):
+        self.value = value
+
+
+class HeadlessRoot:
+    """Runs after() callbacks straight away, on the thread that scheduled them"""
+
+    def after(self, ms, callback, *args):
+        callback(*args)
+
+    def after_cancel(self, job):
+        pass
+
+
+class HeadlessList(ListWindow):
+    """VirtualListbox without Tk: the same ListWindow logic, rendering rows to strings"""
+
+    def __init__(self, on_select, format_row, rows=20):
+        super().__init__(rows, on_select, format_row)
+        self.rendered = []
+
+    def render(self):
+        self.rendered = self.visible_rows()
+
+
+def make_viewer_class():
+    # Imported once the working directory holds the synthetic library
+    import screenshot_notes_viewer as viewer_module
+    from catalog import Catalog
+    from prefetch import Prefetcher
+    from results_store import get_result_store
+    from thumbnail_cache import ThumbnailCache
+
+    class HeadlessViewer(viewer_module.ScreenshotNotesViewer):
+        """The viewer's catalog, list and preview paths without any Tk widgets"""
+
+        def __init__(self):
+            self.root = HeadlessRoot()
+            save_dir = viewer_module.SAVE_DIR
+            self.catalog = Catalog(os.path.join(save_dir, "catalog.db"))
+            self.thumbnails = ThumbnailCache(os.path.join(save_dir, ".thumbnails"))
+            self.previews = Prefetcher(self.root, self.load_preview, max_mb=viewer_module.PREVIEW_CACHE_MB)
+            self.results = get_result_store()
+            self.selected_path = None
+            self.search_var = SearchVar()
+            self._search_job = None
+            self.screenshots_list = HeadlessList(self.on_item_select, self.format_row)
+            self.shown = {}
+            self.loading = 0
+            self._cond = threading.Condition()
+            self.load_screenshots_notes()
+
+        def load_preview(self, file_path):
+            with self._cond:
+                self.loading += 1
+            try:
+                return super().load_preview(file_path)
+            finally:
+                with self._cond:
+                    self.loading -= 1
+                    self._cond.notify_all()
+
+        def show_preview(self, file_path, preview):
+            if file_path != self.selected_path:
+                return
+            with self._cond:
+                self.shown[file_path] = time.perf_counter()
+                self._cond.notify_all()
+
+        def clear_preview(self):
+            self.selected_path = None
+
+        def wait_shown(self, path, timeout=PREVIEW_TIMEOUT):
+            """perf_counter() time the preview for path was shown, or None"""
+            with self._cond:
+                self._cond.wait_for(lambda: path in self.shown, timeout)
+                return self.shown.get(path)
+
+        def wait_idle(self, timeout=PREVIEW_TIMEOUT):
+            """Wait for queued prefetches to finish, so they don't overlap the next measurement"""
+            end = time.monotonic() + timeout
+            while time.monotonic() < end:
+                with self._cond:
+                    if not self.loading and self.previews._queue.empty():
+                        return
+                    self._cond.wait(0.005)
+
+        def select_and_wait(self, index):
+            """Seconds from selecting an index to its preview being shown"""
+            path = self.model[index].path
+            self.shown.pop(path, None)
+            started = time.perf_counter()
+            self.screenshots_list.select(index)
+            shown = self.wait_shown(path)
+            if shown is None:
+                raise TimeoutError(f"no preview for {path} after {PREVIEW_TIMEOUT}s")
+            return shown - started
+
+    return HeadlessViewer
+
+
+def bench_open(viewer_class, repeat):
+    """Seconds for a new viewer to show the first rows and the first preview"""
+    times = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        viewer = viewer_class()
+        if len(viewer.model):
+            path = viewer.model[0].path
+            if viewer.wait_shown(path) is None:
+                raise TimeoutError(f"no preview for {path} after {PREVIEW_TIMEOUT}s")
+        times.append(time.perf_counter() - started)
+        viewer.wait_idle()
+        viewer.catalog.close()
+    return times
+
+
+def bench_select(viewer, indices):
+    cold, thumb, memory = [], [], []
+    for index in indices:
+        cold.append(viewer.select_and_wait(index))
+        viewer.wait_idle()
+    viewer.previews.clear()
+    for index in indices:
+        thumb.append(viewer.select_and_wait(index))
+        viewer.wait_idle()
+    for index in indices:
+        memory.append(viewer.select_and_wait(index))
+    return cold, thumb, memory
+
+
+def bench_scroll(viewer, start, steps, key_repeat):
+    """Latency of each preview shown while arrowing down; previews skipped over are counted"""
+    viewer.previews.clear()
+    viewer.wait_idle()
+    selected = []
+    for index in range(start, min(start + steps, len(viewer.model))):
+        path = viewer.model[index].path
+        viewer.shown.pop(path, None)
+        selected.append((path, time.perf_counter()))
+        viewer.screenshots_list.select(index)
+        time.sleep(key_repeat)
+    viewer.wait_shown(selected[-1][0])
+    viewer.wait_idle()
+    times = [viewer.shown[path] - started for path, started in selected if path in viewer.shown]
+    return times, len(selected) - len(times)
+
+
+def bench_search(viewer, queries, repeat):
+    times = []
+    hits = {}
+    for query in queries:
+        viewer.search_var.set(query)
+        for _ in range(repeat):
+            started = time.perf_counter()
+            viewer.apply_search()
+            times.append(time.perf_counter() - started)
+            viewer.wait_idle()
+        hits[query] = len(viewer.model)
+    viewer.search_var.set("")
+    viewer.apply_search()
+    viewer.wait_idle()
+    return times, hits
+
+
+def bench_save_note(save_note, viewer, indices, rng_note):
+    times = []
+    for index in indices:
+        path = viewer.model[index].path
+        started = time.perf_counter()
+        save_note(path, rng_note())
+        times.append(time.perf_counter() - started)
+    return times
+
+
+def bench_delete(viewer, indices):
+    times = []
+    # Highest first, so earlier deletions don't shift the remaining indices
+    for index in sorted(indices, reverse=True):
+        viewer.select_and_wait(index)
+        viewer.wait_idle()
+        started = time.perf_counter()
+        viewer.remove_screenshot(viewer.screenshots_list.selected_item())
+        times.append(time.perf_counter() - started)
+        viewer.wait_idle()
+    return times
+
+
+def bench_encode(capture, images, save_dir):
+    encode_times, optimize_times = [], []
+    for i, img in enumerate(images):
+        started = time.perf_counter()
+        capture.encode_image(img)
+        encode_times.append(time.perf_counter() - started)
+
+        # A lossless capture as an older version of the app would have saved it
+        path = os.path.join(save_dir, f"screenshot_bench_{i:04d}.png")
+        img.save(path, compress_level=1)
+        started = time.perf_counter()
+        capture.optimize_image(path)
+        optimize_times.append(time.perf_counter() - started)
+    return encode_times, optimize_times
+
+
+def parse_budgets(overrides):
+    budgets = dict(BUDGETS_MS)
+    for override in overrides or []:
+        stage, _, value = override.partition("=")
+        if stage not in budgets:
+            raise SystemExit(f"Unknown stage {stage!r}, expected one of {', '.join(budgets)}")
+        budgets[stage] = float(value)
+    return budgets
+
+
+def run(args):
+    save_dir = "screenshots_notes"
+    started = time.perf_counter()
+    generate_library(save_dir, args.count, args.resolution, args.note_words, args.note_ratio,
+                     args.results_ratio, args.photo_ratio, args.unique, args.seed)
+    generate_seconds = time.perf_counter() - started
+
+    from catalog import Catalog
+    started = time.perf_counter()
+    catalog = Catalog(os.path.join(save_dir, "catalog.db"))
+    catalog.reconcile(save_dir)
+    catalog.close()
+    samples = {"first_open": [time.perf_counter() - started]}
+
+    viewer_class = make_viewer_class()
+    samples["cold_open"] = bench_open(viewer_class, args.open_repeat)
+    viewer = viewer_class()
+    viewer.wait_idle()
+    reconcile = []
+    for _ in range(args.open_repeat):
+        started = time.perf_counter()
+        viewer.catalog.reconcile(save_dir)
+        reconcile.append(time.perf_counter() - started)
+    samples["reconcile"] = reconcile
+
+    # Far enough apart that prefetching one selection never warms another
+    from screenshot_notes_viewer import PREFETCH_RADIUS
+    indices = spread(len(viewer.model), args.samples, 2 * PREFETCH_RADIUS + 2)
+    samples["select_cold"], samples["select_thumb"], samples["select_memory"] = bench_select(viewer, indices)
+    samples["scroll"], skipped = bench_scroll(viewer, indices[0], args.scroll_steps, args.key_repeat_ms / 1000)
+    samples["search"], hits = bench_search(viewer, SEARCH_QUERIES, args.search_repeat)
+
+    # Capture functions write into the library, so they come after the read-only stages
+    import screenshot_notes as capture
+    rng = random.Random(args.seed)
+    samples["save_note"] = bench_save_note(capture.save_note, viewer, indices,
+                                           lambda: make_note(rng, rng.randint(*args.note_words)))
+    samples["delete_refresh"] = bench_delete(viewer, indices)
+    images = [render_screenshot(rng, args.resolution, f"capture {i}") for i in range(args.encode_samples)]
+    samples["capture_encode"], samples["optimize_image"] = bench_encode(capture, images, save_dir)
+
+    return {
+        "library": {"screenshots": args.count, "generate_s": round(generate_seconds, 2),
+                    "bytes": sum(entry.stat().st_size for entry in os.scandir(save_dir) if entry.is_file())},
+        "stages": {stage: summarize(times) for stage, times in samples.items()},
+        "scroll_previews_skipped": skipped,
+        "search_hits": hits,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--count", type=int, default=2000, help="screenshots in the library")
+    parser.add_argument("--resolution", type=parse_resolution, default=(1920, 1080), metavar="WxH")
+    parser.add_argument("--note-words", type=parse_range, default=(5, 200), metavar="MIN:MAX")
+    parser.add_argument("--note-ratio", type=float, default=0.9, help="fraction of screenshots with a note")
+    parser.add_argument("--results-ratio", type=float, default=0.3, help="fraction of notes with crew results")
+    parser.add_argument("--photo-ratio", type=float, default=0.1, help="fraction of photo-like images")
+    parser.add_argument("--unique", type=int, default=50, help="distinct images to render")
+    parser.add_argument("--samples", type=int, default=30, help="selections, notes and deletions to time")
+    parser.add_argument("--open-repeat", type=int, default=5, help="viewer opens to time")
+    parser.add_argument("--scroll-steps", type=int, default=40)
+    parser.add_argument("--key-repeat-ms", type=float, default=33, help="delay between arrow key presses")
+    parser.add_argument("--search-repeat", type=int, default=5, help="runs per search query")
+    parser.add_argument("--encode-samples", type=int, default=5, help="captures to encode")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workdir", help="directory for the library and caches (default: a temp dir, removed after)")
+    parser.add_argument("--output", help="also write the results as JSON to this file")
+    parser.add_argument("--budget", action="append", metavar="STAGE=MS", help="override a stage budget")
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    args = parser.parse_args()
+    budgets = parse_budgets(args.budget)
+    if args.output:
+        args.output = os.path.abspath(args.output)
+
+    workdir = args.workdir or tempfile.mkdtemp(prefix="library-bench-")
+    os.makedirs(workdir, exist_ok=True)
+    cwd = os.getcwd()
+    os.chdir(workdir)
+    try:
+        report = run(args)
+    finally:
+        os.chdir(cwd)
+        if not args.workdir:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    for stage, result in report["stages"].items():
+        result["budget_ms"] = budgets[stage]
+    over = [stage for stage, result in report["stages"].items()
+            if result["n"] and result["median_ms"] > result["budget_ms"]]
+    report.update({
+        "over_budget": over,
+        "config": {key: value for key, value in vars(args).items() if key not in ("json", "output", "budget")},
+        "environment": {"python": platform.python_version(), "platform": platform.platform(),
+                        "commit": git_commit(), "time": time.strftime("%Y-%m-%dT%H:%M:%S%z")},
+    })
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        library = report["library"]
+        print(f"{library['screenshots']} screenshots, {library['bytes'] / 1e6:.0f} MB, "
+              f"generated in {library['generate_s']}s\n")
+        print(f"{'stage':<16}{'n':>5}{'median ms':>12}{'p95 ms':>10}{'max ms':>10}{'budget':>10}")
+        for stage, result in report["stages"].items():
+            flag = "  OVER" if stage in over else ""
+            print(f"{stage:<16}{result['n']:>5}{result['median_ms']:>12.2f}{result['p95_ms']:>10.2f}"
+                  f"{result['max_ms']:>10.2f}{result['budget_ms']:>10.0f}{flag}")
+        print(f"\nScroll previews skipped: {report['scroll_previews_skipped']}")
+        print(f"Search hits: {report['search_hits']}")
+    if over:
+        print(f"\nOver budget: {', '.join(over)}", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
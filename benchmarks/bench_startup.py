@@ -0,0 +1,139 @@
+"""
+Crew startup cost: import time and time to build crews, in fresh interpreters.
+
+    python benchmarks/bench_startup.py [--repeat 3] [--top 15] [--budget import=5000] [--json]
+
+Each repeat runs a new Python process that imports crews.crew and builds a
+routed (summarize-only) crew and a sequential classification crew, timing
+every stage. A separate `-X importtime` run gives the slowest imports. The
+command exits with status 1 when the median of any stage exceeds its budget,
+so it can guard against startup regressions.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Median milliseconds allowed per stage
+BUDGETS_MS = {
+    "import": 5000,
+    "instance": 100,
+    "routed_crew": 1000,
+    "classification_crew": 1000,
+}
+
+STAGES_SCRIPT = """
+import json, time
+started = time.perf_counter()
+timings = {}
+def mark(stage):
+    global started
+    now = time.perf_counter()
+    timings[stage] = (now - started) * 1000
+    started = now
+from crews.crew import ClassificationRouter, PostScreenshotCrew
+mark("import")
+crew_instance = PostScreenshotCrew()
+mark("instance")
+crew_instance.routed_crew("summarize")
+mark("routed_crew")
+crew_instance.classification_crew(ClassificationRouter(), "sequential")
+mark("classification_crew")
+print("STARTUP " + json.dumps(timings))
+"""
+
+
+def child_env():
+    env = dict(os.environ)
+    env.setdefault("OPENAI_API_KEY", "benchmark")
+    env["CREWAI_TELEMETRY"] = "false"
+    env["PYTHONWARNINGS"] = "ignore"
+    return env
+
+
+def time_stages():
+    result = subprocess.run(
+        [sys.executable, "-c", STAGES_SCRIPT], cwd=ROOT, env=child_env(),
+        capture_output=True, text=True, check=True,
+    )
+    for line in result.stdout.splitlines():
+        if line.startswith("STARTUP "):
+            return json.loads(line[len("STARTUP "):])
+    raise RuntimeError(f"No timings in output:\n{result.stdout}\n{result.stderr}")
+
+
+def import_breakdown(module="crews.crew", top=15):
+    """Slowest imports by cumulative time, from python -X importtime"""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"], cwd=ROOT, env=child_env(),
+        capture_output=True, text=True, check=True,
+    )
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        fields = line[len("import time:"):].split("|")
+        try:
+            self_us, cumulative_us = int(fields[0]), int(fields[1])
+        except ValueError:
+            # Header line
+            continue
+        name = fields[2].strip()
+        rows.append({"module": name, "self_ms": self_us / 1000, "cumulative_ms": cumulative_us / 1000})
+    # Only top-level imports, so nested modules are not counted twice
+    top_level = [row for row in rows if "." not in row["module"] or row["module"] == module]
+    return sorted(top_level, key=lambda row: row["cumulative_ms"], reverse=True)[:top]
+
+
+def parse_budgets(overrides):
+    budgets = dict(BUDGETS_MS)
+    for override in overrides or []:
+        stage, _, value = override.partition("=")
+        if stage not in budgets:
+            raise SystemExit(f"Unknown stage {stage!r}, expected one of {', '.join(budgets)}")
+        budgets[stage] = float(value)
+    return budgets
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--top", type=int, default=15, help="slowest imports to list")
+    parser.add_argument("--budget", action="append", metavar="STAGE=MS", help="override a stage budget")
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    args = parser.parse_args()
+    budgets = parse_budgets(args.budget)
+
+    runs = [time_stages() for _ in range(args.repeat)]
+    stages = {
+        stage: {
+            "median_ms": statistics.median(run[stage] for run in runs),
+            "max_ms": max(run[stage] for run in runs),
+            "budget_ms": budgets[stage],
+        }
+        for stage in BUDGETS_MS
+    }
+    over = [stage for stage, result in stages.items() if result["median_ms"] > result["budget_ms"]]
+    imports = import_breakdown(top=args.top)
+
+    if args.json:
+        print(json.dumps({"stages": stages, "imports": imports, "over_budget": over}, indent=2))
+    else:
+        print(f"{'stage':<20}{'median ms':>12}{'max ms':>10}{'budget':>10}")
+        for stage, result in stages.items():
+            flag = "  OVER" if stage in over else ""
+            print(f"{stage:<20}{result['median_ms']:>12.1f}{result['max_ms']:>10.1f}{result['budget_ms']:>10.0f}{flag}")
+        print(f"\nSlowest imports (cumulative):")
+        for row in imports:
+            print(f"  {row['cumulative_ms']:>9.1f} ms  {row['module']}")
+    if over:
+        print(f"\nOver budget: {', '.join(over)}", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
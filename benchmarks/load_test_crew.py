@@ -0,0 +1,184 @@
+"""
+Load test for PostScreenshotCrew against the local fake LLM and search server.
+
+    python benchmarks/load_test_crew.py [--runs 40] [--concurrency 8] [--latency 0.2] [--tail-rate 0.05]
+                                        [--tail-latency 3] [--error-rate 0] [--search-latency 0.3]
+                                        [--replay CASSETTE] [--mode combined] [--json]
+
+Generates --runs synthetic screenshots with notes (a mix of summaries,
+research questions, reminders and ambiguous notes), starts
+devtools/fake_llm_server.py in-process and pushes every pair through
+run_post_screenshot with --concurrency crews at a time, all inside a
+temporary working directory so no caches or results are shared with the
+real library. With --replay the server answers from a recorded cassette
+(see the fake server's --record). Reports throughput, run latency, latency
+per agent, and LLM and search calls per run.
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from devtools.fake_llm_server import FakeLLM, serve  # noqa: E402
+
+NOTES = [
+    "Summarize this article about remote work trends",
+    "Meeting notes from the design review, key points to remember",
+    "Look up what this error message means and how to fix it",
+    "Research the company in this screenshot and who founded it",
+    "Remind me to pay this invoice tomorrow at 9am",
+    "Set a reminder to call the dentist on Friday",
+    "Nice wallpaper",
+    "hmm, interesting",
+]
+
+
+def percentile(ordered, p):
+    if not ordered:
+        return None
+    return ordered[min(len(ordered) - 1, int(p / 100 * len(ordered)))]
+
+
+def make_library(directory, runs, seed=0):
+    """Synthetic screenshot and note pairs, as crew inputs"""
+    from PIL import Image, ImageDraw
+    rng = random.Random(seed)
+    os.makedirs(directory, exist_ok=True)
+    pairs = []
+    for i in range(runs):
+        note = rng.choice(NOTES)
+        img = Image.new("RGB", (1280, 800), tuple(rng.randrange(40, 220) for _ in range(3)))
+        draw = ImageDraw.Draw(img)
+        for line in range(20):
+            draw.text((40, 40 + line * 36), f"Synthetic screenshot {i} line {line}: {note}", fill=(0, 0, 0))
+        path = os.path.join(directory, f"screenshot_load_{i:04d}.png")
+        img.save(path)
+        pairs.append({
+            "screenshot_url": path,
+            "note": note,
+            "notes": note,
+            "current_time": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        })
+    return pairs
+
+
+def configure_environment(base_url, mode):
+    """Point every client at the fake server; must run before the crew modules are used"""
+    os.environ.update({
+        "CREWAI_TELEMETRY": "false",
+        "OTEL_SDK_DISABLED": "true",
+        "OPENAI_API_KEY": "load-test",
+        "OPENAI_BASE_URL": f"{base_url}/v1",
+        "OPENAI_API_BASE": f"{base_url}/v1",
+        "SERPER_API_KEY": "load-test",
+        "SERPER_BASE_URL": base_url,
+        "SCREENSHOT_SEARCH_BACKEND": "serper",
+        "SCREENSHOT_REMINDER_BACKEND": "log",
+        "SCREENSHOT_CLASSIFICATION": mode,
+    })
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=40)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--latency", type=float, default=0.2, help="fake LLM seconds per request")
+    parser.add_argument("--tail-rate", type=float, default=0.0, help="fraction of slow LLM requests")
+    parser.add_argument("--tail-latency", type=float, default=3.0, help="seconds for a slow LLM request")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of LLM requests that fail")
+    parser.add_argument("--search-latency", type=float, default=0.3, help="fake search seconds per request")
+    parser.add_argument("--replay", metavar="CASSETTE", help="answer from recorded responses")
+    parser.add_argument("--mode", choices=("combined", "sequential"), default="combined", help="classification mode")
+    parser.add_argument("--workdir", help="directory for the synthetic library and caches (default: a temp dir)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--verbose", action="store_true", help="show crew output")
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    args = parser.parse_args()
+
+    if args.replay:
+        args.replay = os.path.abspath(args.replay)
+    os.chdir(args.workdir or tempfile.mkdtemp(prefix="crew-load-"))
+    fake = FakeLLM(args.latency, args.tail_rate, args.tail_latency, args.error_rate, seed=args.seed,
+                   search_latency=args.search_latency, mode="replay" if args.replay else "fake",
+                   cassette=args.replay)
+    server = serve(fake, port=0)
+    configure_environment(f"http://127.0.0.1:{server.server_port}", args.mode)
+    pairs = make_library("screenshots_notes", args.runs, args.seed)
+
+    # Imported once the environment points at the fake server
+    from crews.runner import get_classifier, run_post_screenshot
+    from llm_resilience import get_resilient_caller
+    from reminder_scheduler import get_reminder_scheduler
+    from tools.cached_search_tool import get_search_cache
+
+    def run_one(inputs):
+        started = time.perf_counter()
+        try:
+            run_post_screenshot(inputs)
+            error = None
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+        return time.perf_counter() - started, error
+
+    output = contextlib.nullcontext() if args.verbose else contextlib.redirect_stdout(io.StringIO())
+    started = time.perf_counter()
+    with output, ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        results = list(pool.map(run_one, pairs))
+    elapsed = time.perf_counter() - started
+
+    latencies = sorted(seconds for seconds, error in results if error is None)
+    errors = [error for _, error in results if error is not None]
+    server_stats = fake.stats()
+    report = {
+        "runs": args.runs,
+        "concurrency": args.concurrency,
+        "ok": len(latencies),
+        "failed": len(errors),
+        "elapsed_s": round(elapsed, 2),
+        "runs_per_minute": round(args.runs / elapsed * 60, 1),
+        "run_latency_s": {
+            "p50": round(percentile(latencies, 50), 3) if latencies else None,
+            "p95": round(percentile(latencies, 95), 3) if latencies else None,
+            "p99": round(percentile(latencies, 99), 3) if latencies else None,
+        },
+        "llm_calls_per_run": round(server_stats["requests"] / args.runs, 2),
+        "searches_per_run": round(server_stats["searches"] / args.runs, 2),
+        "calls_by_agent": server_stats["by_role"],
+        "latency_by_agent": get_resilient_caller().stats()["latency"],
+        "server": {k: v for k, v in server_stats.items() if k != "by_role"},
+        "classifier": get_classifier().stats(),
+        "search_cache": get_search_cache().stats(),
+        "reminders": get_reminder_scheduler().stats(),
+        "errors": sorted(set(errors))[:10],
+    }
+    server.shutdown()
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+    print(f"{report['ok']}/{args.runs} runs ok in {report['elapsed_s']}s "
+          f"({report['runs_per_minute']} runs/min at concurrency {args.concurrency})")
+    print(f"Run latency: {report['run_latency_s']}")
+    print(f"LLM calls per run: {report['llm_calls_per_run']}, searches per run: {report['searches_per_run']}")
+    print("Latency by agent:")
+    for agent, summary in sorted(report["latency_by_agent"].items()):
+        print(f"  {agent:<28}{summary}")
+    print(f"Classifier: {report['classifier']}")
+    print(f"Search cache: {report['search_cache']}")
+    print(f"Reminders: {report['reminders']}")
+    for error in report["errors"]:
+        print(f"Error: {error}")
+
+
+if __name__ == "__main__":
+    main()
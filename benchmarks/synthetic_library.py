@@ -0,0 +1,152 @@
+"""
+Generate a synthetic screenshot library for benchmarks.
+
+    python benchmarks/synthetic_library.py DIR [--count 1000] [--resolution 1920x1080] [--note-words 5:200]
+                                           [--note-ratio 0.9] [--results-ratio 0.3] [--photo-ratio 0.1]
+                                           [--unique 50] [--seed 0]
+
+Writes --count screenshots named like real captures
+(screenshot_YYYY-mm-dd_HH-MM-SS, one minute apart going back from now),
+encoded with the current encoder policy, plus a note for --note-ratio of them
+and crew results for --results-ratio of them. Notes are drawn from a fixed
+vocabulary so searches have predictable hits. Rendering and encoding large
+images dominates generation time, so only --unique distinct images are
+rendered and their encoded bytes are reused across the library.
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import datetime
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from PIL import Image, ImageDraw  # noqa: E402
+
+from encoders import get_encoder_policy  # noqa: E402
+from results_store import ResultStore  # noqa: E402
+
+# Words notes are made of; the first ones are the most frequent
+VOCABULARY = (
+    "meeting invoice design review error deploy budget recipe flight hotel "
+    "article research reminder dentist quarterly roadmap release bug crash "
+    "login password receipt contract chart metrics dashboard customer "
+    "feedback interview candidate schedule travel conference slides "
+    "keynote paper citation dataset model training latency outage incident "
+    "postmortem ticket sprint backlog estimate invoice payment refund "
+    "shipping order tracking warranty manual tutorial shortcut terminal "
+    "python sqlite thumbnail cache screenshot note summary question answer "
+    "wallpaper color palette font layout mockup prototype wireframe sketch "
+    "lecture homework exam lab notebook formula proof theorem diagram map "
+    "route weather forecast game score ranking podcast episode playlist "
+    "album concert ticket museum exhibit garden plant seed harvest"
+).split()
+
+# Zipf-like: early vocabulary words show up far more often than late ones
+WORD_WEIGHTS = [1 / (rank + 1) for rank in range(len(VOCABULARY))]
+
+SEARCH_QUERIES = ("meeting", "invoice payment", "dashb", "harvest", "design review deploy", "zyzzyva")
+
+
+def parse_resolution(value):
+    width, _, height = value.lower().partition("x")
+    return int(width), int(height)
+
+
+def parse_range(value):
+    """'N' or 'MIN:MAX'"""
+    low, _, high = value.partition(":")
+    return int(low), int(high or low)
+
+
+def make_note(rng, words):
+    text = rng.choices(VOCABULARY, weights=WORD_WEIGHTS, k=words)
+    lines = [" ".join(text[i:i + 12]) for i in range(0, len(text), 12)]
+    return "\n".join(lines).capitalize()
+
+
+def render_screenshot(rng, size, label, photographic=False):
+    """A desktop-like image: windows of text over a flat or noisy background"""
+    width, height = size
+    if photographic:
+        img = Image.effect_noise(size, rng.uniform(20, 80)).convert("RGB")
+        tint = Image.new("RGB", size, tuple(rng.randrange(256) for _ in range(3)))
+        img = Image.blend(img, tint, 0.5)
+    else:
+        img = Image.new("RGB", size, tuple(rng.randrange(180, 256) for _ in range(3)))
+    draw = ImageDraw.Draw(img)
+    for window in range(rng.randint(1, 4)):
+        left = rng.randrange(0, max(1, width // 2))
+        top = rng.randrange(0, max(1, height // 2))
+        right = min(width - 1, left + rng.randrange(width // 4, width // 2 + 1))
+        bottom = min(height - 1, top + rng.randrange(height // 4, height // 2 + 1))
+        draw.rectangle((left, top, right, bottom), fill=(250, 250, 250), outline=(90, 90, 90))
+        draw.rectangle((left, top, right, top + 22), fill=tuple(rng.randrange(60, 200) for _ in range(3)))
+        for line, y in enumerate(range(top + 32, bottom - 14, 18)):
+            words = " ".join(rng.choices(VOCABULARY, k=rng.randint(3, 14)))
+            draw.text((left + 10, y), f"{label}.{window}.{line} {words}", fill=(20, 20, 20))
+    return img
+
+
+def render_pool(rng, unique, resolution, photo_ratio):
+    """Encoded (extension, bytes) for `unique` distinct images"""
+    policy = get_encoder_policy()
+    pool = []
+    for i in range(unique):
+        img = render_screenshot(rng, resolution, f"image {i}", photographic=rng.random() < photo_ratio)
+        encoder = policy.choose(img)
+        pool.append((encoder.extension, encoder.encode(img)))
+    return pool
+
+
+def generate_library(save_dir, count, resolution=(1920, 1080), note_words=(5, 200), note_ratio=0.9,
+                     results_ratio=0.3, photo_ratio=0.1, unique=50, seed=0, newest=None):
+    """Write a synthetic library into save_dir and return its image paths, newest first"""
+    rng = random.Random(seed)
+    os.makedirs(save_dir, exist_ok=True)
+    results = ResultStore(os.path.join(save_dir, ".results"))
+    pool = render_pool(rng, max(1, min(unique, count)), resolution, photo_ratio)
+    newest = int(newest if newest is not None else time.time())
+    paths = []
+    for i in range(count):
+        captured_at = newest - i * 60
+        timestamp = datetime.fromtimestamp(captured_at).strftime("%Y-%m-%d_%H-%M-%S")
+        base_path = os.path.join(save_dir, f"screenshot_{timestamp}")
+        extension, data = pool[i % len(pool)]
+        image_path = base_path + extension
+        with open(image_path, "wb") as f:
+            f.write(data)
+        os.utime(image_path, (captured_at, captured_at))
+        if rng.random() < note_ratio:
+            note = make_note(rng, rng.randint(*note_words))
+            with open(base_path + ".txt", "w") as f:
+                f.write(note)
+            if rng.random() < results_ratio:
+                results.update(image_path, note=note, summary=make_note(rng, rng.randint(20, 60)))
+        paths.append(image_path)
+    return paths
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("directory")
+    parser.add_argument("--count", type=int, default=1000)
+    parser.add_argument("--resolution", type=parse_resolution, default=(1920, 1080), metavar="WxH")
+    parser.add_argument("--note-words", type=parse_range, default=(5, 200), metavar="MIN:MAX")
+    parser.add_argument("--note-ratio", type=float, default=0.9, help="fraction of screenshots with a note")
+    parser.add_argument("--results-ratio", type=float, default=0.3, help="fraction of notes with crew results")
+    parser.add_argument("--photo-ratio", type=float, default=0.1, help="fraction of photo-like images")
+    parser.add_argument("--unique", type=int, default=50, help="distinct images to render")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    paths = generate_library(args.directory, args.count, args.resolution, args.note_words, args.note_ratio,
+                             args.results_ratio, args.photo_ratio, args.unique, args.seed)
+    print(f"Wrote {len(paths)} screenshots to {args.directory} in {time.perf_counter() - started:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+from PIL import Image
+
+
+class CaptureBackend:
+    """Grabs the screen and returns the pixels as an in-memory RGB image"""
+
+    name = "base"
+
+    @classmethod
+    def is_available(cls):
+        return False
+
+    def grab(self):
+        raise NotImplementedError
+
+
+class ScreencaptureBackend(CaptureBackend):
+    """macOS `screencapture`. The OS tool can only write files, so the grab goes
+    through an uncompressed TIFF in a temp dir that is decoded once and removed."""
+
+    name = "screencapture"
+
+    @classmethod
+    def is_available(cls):
+        return sys.platform == "darwin"
+
+    def grab(self):
+        fd, tmp_path = tempfile.mkstemp(suffix=".tiff")
+        os.close(fd)
+        try:
+            subprocess.run(['screencapture', '-x', '-t', 'tiff', tmp_path], check=True, timeout=5)
+            with Image.open(tmp_path) as img:
+                img.load()
+                return img.convert('RGB') if img.mode != 'RGB' else img.copy()
+        finally:
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+
+
+class MssBackend(CaptureBackend):
+    """X11 (and Windows/macOS) capture straight from the frame buffer using `mss`"""
+
+    name = "mss"
+
+    def __init__(self):
+        # mss handles are not safe to share between threads
+        self._local = threading.local()
+
+    @classmethod
+    def is_available(cls):
+        try:
+            import mss  # noqa: F401
+        except ImportError:
+            return False
+        return True
+
+    def grab(self):
+        import mss
+        sct = getattr(self._local, "sct", None)
+        if sct is None:
+            sct = self._local.sct = mss.mss()
+        # monitors[0] is the union of all screens, [1] the primary one
+        shot = sct.grab(sct.monitors[1])
+        return Image.frombytes("RGB", shot.size, shot.bgra, "raw", "BGRX")
+
+
+class ImageGrabBackend(CaptureBackend):
+    """Pillow's ImageGrab, used on X11 when `mss` is not installed"""
+
+    name = "imagegrab"
+
+    @classmethod
+    def is_available(cls):
+        if sys.platform.startswith("linux") and not os.environ.get("DISPLAY"):
+            return False
+        try:
+            from PIL import ImageGrab  # noqa: F401
+        except ImportError:
+            return False
+        return True
+
+    def grab(self):
+        from PIL import ImageGrab
+        img = ImageGrab.grab()
+        return img.convert('RGB') if img.mode != 'RGB' else img
+
+
+BACKENDS = {
+    backend.name: backend
+    for backend in (ScreencaptureBackend, MssBackend, ImageGrabBackend)
+}
+
+
+def get_capture_backend(name=None):
+    """Return the named backend, or the first available one for this platform.
+
+    The name can also be set with the SCREENSHOT_BACKEND environment variable.
+    """
+    name = name or os.environ.get("SCREENSHOT_BACKEND")
+    if name:
+        if name not in BACKENDS:
+            raise ValueError(f"Unknown capture backend: {name}")
+        return BACKENDS[name]()
+    for backend in BACKENDS.values():
+        if backend.is_available():
+            return backend()
+    raise RuntimeError("No screen capture backend available on this platform")
@@ -0,0 +1,165 @@
+import itertools
+import queue
+from collections import deque
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# Stages every capture goes through, in order. "dialog" is not a worker stage,
+# it is the hotkey-to-dialog latency recorded from the Tk thread.
+STAGES = ("capture", "encode", "persist", "dialog")
+
+
+class CaptureJob:
+    """A single hotkey press travelling through the capture pipeline"""
+
+    def __init__(self, job_id):
+        self.id = job_id
+        self.submitted_at = time.perf_counter()
+        self.path = None
+        self.saved_path = None
+        self.data = None
+        self.error = None
+        self.duplicate = False
+        self.timings = {}
+        self.persisted = threading.Event()
+
+    def record(self, stage, started):
+        """Record how long a stage took, given its perf_counter() start"""
+        self.timings[stage] = time.perf_counter() - started
+
+    def mark(self, stage):
+        """Record the time elapsed since the hotkey was pressed"""
+        self.timings[stage] = time.perf_counter() - self.submitted_at
+
+    def format_timings(self):
+        parts = [f"{stage}={self.timings[stage] * 1000:.0f}ms" for stage in STAGES if stage in self.timings]
+        return " ".join(parts)
+
+
+class CapturePipeline:
+    """
+        Runs captures as a staged pipeline: capture -> encode -> persist.
+
+        Captures are serialized on a single thread (pulled from a bounded queue, so
+        back-to-back hotkey presses wait their turn instead of blocking each other),
+        while encoding and persisting run on a small worker pool. `on_captured` is
+        called as soon as the raw capture exists, so the note dialog can open while
+        encoding is still in progress. A capture that returns no data is a duplicate
+        of the screenshot at the returned path and skips encode and persist.
+    """
+
+    def __init__(self, capture, encode, persist, on_captured=None, on_done=None, workers=2, max_pending=4):
+        self._capture = capture
+        self._encode = encode
+        self._persist = persist
+        self._on_captured = on_captured
+        self._on_done = on_done
+        self._ids = itertools.count(1)
+        self._jobs = queue.Queue(maxsize=max_pending)
+        # Bounds the number of captures waiting on the encoders; when they fall
+        # behind, the capture thread stalls and new hotkey presses are rejected.
+        self._encode_slots = threading.BoundedSemaphore(max_pending)
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="capture-encode")
+        self._stats_lock = threading.Lock()
+        self._stats = {stage: deque(maxlen=1000) for stage in STAGES}
+        self._capture_thread = threading.Thread(target=self._capture_loop, name="capture", daemon=True)
+        self._capture_thread.start()
+
+    def submit(self):
+        """Queue a capture and return its job, or None if the queue is full"""
+        job = CaptureJob(next(self._ids))
+        try:
+            self._jobs.put_nowait(job)
+        except queue.Full:
+            print("Capture queue is full, ignoring hotkey press")
+            return None
+        return job
+
+    def _capture_loop(self):
+        while True:
+            job = self._jobs.get()
+            if job is None:
+                break
+            started = time.perf_counter()
+            try:
+                job.path, job.data = self._capture()
+            except Exception as e:
+                job.error = e
+            job.record("capture", started)
+
+            if job.error is not None:
+                self._finish(job)
+                continue
+
+            # A capture without data duplicates the screenshot already at job.path
+            job.duplicate = job.data is None
+            if self._on_captured:
+                try:
+                    self._on_captured(job)
+                except Exception as e:
+                    print(f"Error handling captured screenshot: {str(e)}")
+
+            if job.duplicate:
+                job.saved_path = job.path
+                self._finish(job)
+                continue
+
+            self._encode_slots.acquire()
+            self._pool.submit(self._encode_and_persist, job)
+
+    def _encode_and_persist(self, job):
+        try:
+            started = time.perf_counter()
+            job.data = self._encode(job.data)
+            job.record("encode", started)
+
+            started = time.perf_counter()
+            job.saved_path = self._persist(job.path, job.data)
+            job.record("persist", started)
+        except Exception as e:
+            job.error = e
+        finally:
+            self._encode_slots.release()
+            self._finish(job)
+
+    def _finish(self, job):
+        job.data = None  # Release the pixel buffer as soon as it is on disk
+        job.persisted.set()
+        self.record_timings(job, ("capture", "encode", "persist"))
+        if self._on_done:
+            try:
+                self._on_done(job)
+            except Exception as e:
+                print(f"Error finishing capture: {str(e)}")
+
+    def record_timings(self, job, stages):
+        """Fold some of a job's stage timings into the running statistics"""
+        with self._stats_lock:
+            for stage in stages:
+                if stage not in job.timings:
+                    continue
+                self._stats[stage].append(job.timings[stage])
+
+    def stats(self):
+        """Per-stage latency summary in milliseconds"""
+        with self._stats_lock:
+            summary = {}
+            for stage, samples in self._stats.items():
+                if not samples:
+                    continue
+                ordered = sorted(samples)
+                summary[stage] = {
+                    "count": len(ordered),
+                    "mean_ms": sum(ordered) / len(ordered) * 1000,
+                    "p95_ms": ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))] * 1000,
+                    "max_ms": ordered[-1] * 1000,
+                }
+            return summary
+
+    def shutdown(self, wait=True):
+        """Stop accepting captures and wait for in-flight ones to be persisted"""
+        self._jobs.put(None)
+        if wait:
+            self._capture_thread.join()
+        self._pool.shutdown(wait=wait)
@@ -0,0 +1,321 @@
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+from datetime import datetime
+from PIL import Image
+
+from dedupe import to_signed, to_unsigned
+from encoders import IMAGE_EXTENSIONS
+from list_model import Record
+
+# doc_id aliases the rowid, so the search index's row references survive VACUUM
+SCREENSHOTS_TABLE = """
+CREATE TABLE IF NOT EXISTS screenshots (
+    doc_id INTEGER PRIMARY KEY,
+    id TEXT NOT NULL UNIQUE,
+    path TEXT,
+    captured_at REAL,
+    width INTEGER,
+    height INTEGER,
+    bytes INTEGER,
+    mtime REAL,
+    content_hash TEXT,
+    note TEXT,
+    summary TEXT,
+    phash INTEGER
+);
+"""
+COLUMNS = ("id", "path", "captured_at", "width", "height", "bytes", "mtime", "content_hash", "note", "summary",
+           "phash")
+
+SCHEMA = SCREENSHOTS_TABLE + """
+DROP INDEX IF EXISTS screenshots_captured_at;
+-- Covers the list pages, so deep OFFSETs only walk the index
+CREATE INDEX IF NOT EXISTS screenshots_page ON screenshots (captured_at DESC, id DESC, path);
+"""
+
+# Full-text index over notes and generated summaries, kept in sync by triggers
+SEARCH_SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS notes_fts USING fts5(
+    note, summary, content='screenshots', content_rowid='doc_id', prefix='2 3'
+);
+CREATE TRIGGER IF NOT EXISTS screenshots_fts_insert AFTER INSERT ON screenshots BEGIN
+    INSERT INTO notes_fts (rowid, note, summary) VALUES (new.doc_id, new.note, new.summary);
+END;
+CREATE TRIGGER IF NOT EXISTS screenshots_fts_delete AFTER DELETE ON screenshots BEGIN
+    INSERT INTO notes_fts (notes_fts, rowid, note, summary) VALUES ('delete', old.doc_id, old.note, old.summary);
+END;
+CREATE TRIGGER IF NOT EXISTS screenshots_fts_update AFTER UPDATE OF note, summary ON screenshots BEGIN
+    INSERT INTO notes_fts (notes_fts, rowid, note, summary) VALUES ('delete', old.doc_id, old.note, old.summary);
+    INSERT INTO notes_fts (rowid, note, summary) VALUES (new.doc_id, new.note, new.summary);
+END;
+"""
+
+# Capture names, newest format first; older libraries only have whole seconds
+CAPTURE_NAME_FORMATS = ("screenshot_%Y-%m-%d_%H-%M-%S-%f", "screenshot_%Y-%m-%d_%H-%M-%S")
+
+
+def fts_query(text):
+    """Turn free text into an FTS5 query where every word is a prefix match"""
+    terms = re.findall(r"\w+", text.lower())
+    return " ".join(f'"{term}"*' for term in terms)
+
+
+def screenshot_id(path):
+    """Catalog key for a screenshot: its file name without directory or extension"""
+    return os.path.splitext(os.path.basename(path))[0]
+
+
+def content_hash(data):
+    return hashlib.sha256(data).hexdigest()
+
+
+def parse_capture_time(path):
+    """Capture time from a screenshot_YYYY-mm-dd_HH-MM-SS[-ffffff] name, else the file's ctime"""
+    for name_format in CAPTURE_NAME_FORMATS:
+        try:
+            return datetime.strptime(screenshot_id(path), name_format).timestamp()
+        except ValueError:
+            pass
+    return os.path.getctime(path)
+
+
+class Catalog:
+    """
+        SQLite index of the screenshots in the save directory.
+
+        Rows are keyed by screenshot ID so a note can be recorded before the image
+        has been persisted (the capture pipeline encodes while the dialog is open).
+        Rows without a path yet are not listed.
+    """
+
+    def __init__(self, db_path):
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False, isolation_level=None)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+        self._migrate()
+
+    def _migrate(self):
+        columns = {row["name"] for row in self._conn.execute("PRAGMA table_info(screenshots)")}
+        if "summary" not in columns:
+            self._conn.execute("ALTER TABLE screenshots ADD COLUMN summary TEXT")
+        if "phash" not in columns:
+            self._conn.execute("ALTER TABLE screenshots ADD COLUMN phash INTEGER")
+        if "doc_id" not in columns:
+            self._add_doc_id()
+        has_fts = self._conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE name = 'notes_fts'"
+        ).fetchone()
+        self._conn.executescript(SEARCH_SCHEMA)
+        if not has_fts:
+            # Index notes recorded before search existed
+            self._conn.execute("INSERT INTO notes_fts (notes_fts) VALUES ('rebuild')")
+
+    def _add_doc_id(self):
+        """Copy a catalog keyed only by the implicit rowid into the current table, dropping its search index"""
+        columns = ", ".join(COLUMNS)
+        self._conn.executescript(f"""
+            BEGIN;
+            DROP TRIGGER IF EXISTS screenshots_fts_insert;
+            DROP TRIGGER IF EXISTS screenshots_fts_delete;
+            DROP TRIGGER IF EXISTS screenshots_fts_update;
+            DROP TABLE IF EXISTS notes_fts;
+            DROP INDEX IF EXISTS screenshots_page;
+            ALTER TABLE screenshots RENAME TO screenshots_old;
+            {SCREENSHOTS_TABLE}
+            INSERT INTO screenshots ({columns}) SELECT {columns} FROM screenshots_old ORDER BY rowid;
+            DROP TABLE screenshots_old;
+            COMMIT;
+        """)
+        self._conn.executescript(SCHEMA)
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def record(self, path, width, height, data=None, captured_at=None, note=None, phash=None):
+        """Add or update a screenshot, keeping any note already recorded for it.
+
+        phash is the unsigned 64-bit perceptual hash used for duplicate detection.
+        """
+        st = os.stat(path)
+        digest = content_hash(data) if data is not None else None
+        phash = to_signed(phash) if phash is not None else None
+        with self._lock:
+            self._conn.execute(
+                """
+                INSERT INTO screenshots (id, path, captured_at, width, height, bytes, mtime, content_hash, note, phash)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT(id) DO UPDATE SET
+                    path = excluded.path,
+                    captured_at = excluded.captured_at,
+                    width = excluded.width,
+                    height = excluded.height,
+                    bytes = excluded.bytes,
+                    mtime = excluded.mtime,
+                    content_hash = COALESCE(excluded.content_hash, screenshots.content_hash),
+                    note = COALESCE(excluded.note, screenshots.note),
+                    phash = COALESCE(excluded.phash, screenshots.phash)
+                """,
+                (screenshot_id(path), path, captured_at or parse_capture_time(path), width, height,
+                 st.st_size, st.st_mtime, digest, note, phash),
+            )
+
+    def set_note(self, path, note):
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO screenshots (id, note) VALUES (?, ?) "
+                "ON CONFLICT(id) DO UPDATE SET note = excluded.note",
+                (screenshot_id(path), note),
+            )
+
+    def set_summary(self, path, summary):
+        """Record a generated summary so it is searchable alongside the note"""
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO screenshots (id, summary) VALUES (?, ?) "
+                "ON CONFLICT(id) DO UPDATE SET summary = excluded.summary",
+                (screenshot_id(path), summary),
+            )
+
+    def remove(self, path):
+        with self._lock:
+            self._conn.execute("DELETE FROM screenshots WHERE id = ?", (screenshot_id(path),))
+
+    def get(self, path):
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM screenshots WHERE id = ?", (screenshot_id(path),)).fetchone()
+        return dict(row) if row else None
+
+    def count(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM screenshots WHERE path IS NOT NULL").fetchone()[0]
+
+    def list(self, limit=-1, offset=0):
+        """Screenshots newest first"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT * FROM screenshots WHERE path IS NOT NULL "
+                "ORDER BY captured_at DESC, id DESC LIMIT ? OFFSET ?",
+                (limit, offset),
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+    def recent_hashes(self, limit):
+        """(path, unsigned perceptual hash) for the most recent hashed screenshots"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT path, phash FROM screenshots WHERE path IS NOT NULL AND phash IS NOT NULL "
+                "ORDER BY captured_at DESC LIMIT ?",
+                (limit,),
+            ).fetchall()
+        return [(row["path"], to_unsigned(row["phash"])) for row in rows]
+
+    def position(self, record):
+        """Index of a Record in the newest-first listing, or None if it is gone"""
+        with self._lock:
+            exists = self._conn.execute(
+                "SELECT 1 FROM screenshots WHERE id = ? AND path IS NOT NULL", (record.id,)
+            ).fetchone()
+            if not exists:
+                return None
+            return self._conn.execute(
+                "SELECT COUNT(*) FROM screenshots WHERE path IS NOT NULL "
+                "AND (captured_at > ? OR (captured_at = ? AND id > ?))",
+                (record.captured_at, record.captured_at, record.id),
+            ).fetchone()[0]
+
+    def page(self, offset, limit):
+        """A page of compact Records, newest first"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT id, path, captured_at FROM screenshots WHERE path IS NOT NULL "
+                "ORDER BY captured_at DESC, id DESC LIMIT ? OFFSET ?",
+                (limit, offset),
+            ).fetchall()
+        return [Record(*row) for row in rows]
+
+    def search(self, text, limit=500):
+        """Records whose note or summary match every word of text (as prefixes), best first"""
+        query = fts_query(text)
+        if not query:
+            return []
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT s.id, s.path, s.captured_at FROM notes_fts "
+                "JOIN screenshots s ON s.doc_id = notes_fts.rowid "
+                "WHERE notes_fts MATCH ? AND s.path IS NOT NULL "
+                "ORDER BY bm25(notes_fts, 1.0, 0.5) LIMIT ?",
+                (query, limit),
+            ).fetchall()
+        return [Record(*row) for row in rows]
+
+    def reconcile(self, save_dir):
+        """Bring the catalog in line with files added or removed out of band.
+
+        Returns (added_or_changed, removed) lists of paths.
+        """
+        on_disk = {}
+        for entry in os.scandir(save_dir):
+            if entry.is_file() and entry.name.lower().endswith(IMAGE_EXTENSIONS):
+                try:
+                    st = entry.stat()
+                except OSError:
+                    continue
+                on_disk[os.path.join(save_dir, entry.name)] = st
+
+        with self._lock:
+            known = {
+                row["path"]: (row["mtime"], row["bytes"])
+                for row in self._conn.execute("SELECT path, mtime, bytes FROM screenshots WHERE path IS NOT NULL")
+            }
+
+        removed = [path for path in known if path not in on_disk]
+        changed = [
+            path for path, st in on_disk.items()
+            if known.get(path) != (st.st_mtime, st.st_size)
+        ]
+
+        for path in removed:
+            self.remove(path)
+        for path in changed:
+            try:
+                self.index_file(path)
+            except Exception as e:
+                print(f"Error indexing {path}: {e}")
+        return changed, removed
+
+    def update_file(self, path):
+        """Re-index one image if it changed since it was recorded; returns True if it did"""
+        try:
+            st = os.stat(path)
+        except OSError:
+            return False
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT mtime, bytes FROM screenshots WHERE id = ? AND path = ?", (screenshot_id(path), path)
+            ).fetchone()
+        if row is not None and (row["mtime"], row["bytes"]) == (st.st_mtime, st.st_size):
+            return False
+        self.index_file(path)
+        return True
+
+    def index_file(self, path):
+        """Record an image found on disk, with its note file if there is one"""
+        with open(path, "rb") as f:
+            data = f.read()
+        # Image.open only parses the header, so this does not decode pixels
+        with Image.open(path) as img:
+            width, height = img.size
+        note_path = os.path.splitext(path)[0] + ".txt"
+        note = None
+        if os.path.exists(note_path):
+            with open(note_path, "r") as f:
+                note = f.read()
+        self.record(path, width, height, data=data, note=note)
@@ -0,0 +1,174 @@
+"""
+Long-lived worker that runs PostScreenshotCrew on screenshots as notes are saved.
+
+    python crew_worker.py [--once]
+
+The capture tool enqueues a job in screenshots_notes/.jobs after each note is
+saved. This process imports crewai, loads the prompts and builds the crew's
+agents and tools once, then waits for jobs, so each screenshot only pays for
+its LLM calls. --once drains the queue and exits.
+"""
+import argparse
+import os
+import threading
+from datetime import datetime
+
+# Disable only CrewAI telemetry
+os.environ["CREWAI_TELEMETRY"] = "false"
+
+from catalog import Catalog
+from crews.cached_llm import CachedLLM
+from crews.crew import PostScreenshotCrew
+from crews.runner import get_classifier, get_speculative, is_processed, run_post_screenshot
+from fs_watcher import DirectoryWatcher
+from job_queue import PENDING, POST_SCREENSHOT, JobQueue
+from reminder_scheduler import get_reminder_scheduler
+from llm_resilience import get_resilient_caller
+from response_cache import get_response_cache
+from tools.cached_search_tool import get_search_cache
+
+SAVE_DIR = "screenshots_notes"
+JOBS_DIR = os.path.join(SAVE_DIR, ".jobs")
+PID_PATH = os.path.join(JOBS_DIR, "worker.pid")
+
+# A note can be saved before its image is persisted; wait for it this many times
+MAX_ATTEMPTS = 5
+RETRY_DELAY = 2.0
+IDLE_TIMEOUT = 30.0
+
+
+def acquire_pid_file(path):
+    """Claim the queue for this process; False if another live worker holds it"""
+    try:
+        with open(path, "r") as f:
+            pid = int(f.read().strip())
+        os.kill(pid, 0)
+        return pid == os.getpid()
+    except PermissionError:
+        # Alive, but owned by another user
+        return False
+    except (OSError, ValueError):
+        # No pid file, a garbled one, or the process is gone (ProcessLookupError)
+        pass
+    with open(path, "w") as f:
+        f.write(str(os.getpid()))
+    return True
+
+
+class CrewWorker:
+    """
+        Runs queued post-screenshot jobs through a warm PostScreenshotCrew.
+
+        The crew instance (and so its memoized agents and tools) is built once
+        and reused for every job; only the response cache scope changes per
+        screenshot. A directory watcher on the pending queue wakes the worker as
+        soon as a job arrives.
+    """
+
+    def __init__(self, queue, catalog):
+        self.queue = queue
+        self.catalog = catalog
+        self.crew_instance = PostScreenshotCrew(llm=CachedLLM())
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self.watcher = DirectoryWatcher(
+            os.path.join(queue.jobs_dir, PENDING),
+            lambda events: self._wake.set(),
+            extensions=(".json",),
+            debounce=0.05,
+            on_overflow=self._wake.set,
+        )
+
+    def resolve_image(self, screenshot):
+        """Final image path for a screenshot, or None while it is still being persisted"""
+        row = self.catalog.get(screenshot)
+        if row and row["path"] and os.path.exists(row["path"]):
+            return row["path"]
+        return None
+
+    def handle(self, job):
+        if job["kind"] != POST_SCREENSHOT:
+            self.queue.fail(job, f"unknown job kind {job['kind']}")
+            return
+        payload = job["payload"]
+        image_path = self.resolve_image(payload["screenshot"])
+        if image_path is None:
+            if job["attempts"] >= MAX_ATTEMPTS:
+                self.queue.fail(job, f"image for {payload['screenshot']} was never saved")
+            else:
+                self.queue.retry(job, RETRY_DELAY * job["attempts"])
+            return
+        inputs = {
+            "screenshot_url": image_path,
+            "note": payload["note"],
+            "notes": payload["note"],
+            "current_time": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        }
+        if is_processed(inputs):
+            self.queue.complete(job, "already processed")
+            return
+        print(f"Processing {image_path}")
+        try:
+            output = run_post_screenshot(inputs, crew_instance=self.crew_instance, catalog=self.catalog)
+        except Exception as e:
+            print(f"Error processing {image_path}: {e}")
+            self.queue.fail(job, e)
+            return
+        self.queue.complete(job, str(output))
+
+    def run(self, once=False):
+        recovered = self.queue.recover()
+        if recovered:
+            print(f"Requeued {recovered} interrupted jobs")
+        if not once:
+            self.watcher.start()
+        try:
+            while not self._stop.is_set():
+                job = self.queue.claim()
+                if job is not None:
+                    self.handle(job)
+                    continue
+                due = self.queue.next_due()
+                if once and due is None:
+                    break
+                self._wake.clear()
+                self._wake.wait(IDLE_TIMEOUT if due is None else min(due, IDLE_TIMEOUT))
+        finally:
+            self.watcher.stop()
+
+    def stop(self):
+        self._stop.set()
+        self._wake.set()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--once", action="store_true", help="process the queued jobs and exit")
+    args = parser.parse_args()
+
+    queue = JobQueue(JOBS_DIR)
+    if not acquire_pid_file(PID_PATH):
+        print("Another crew worker is already running")
+        return
+    worker = CrewWorker(queue, Catalog(os.path.join(SAVE_DIR, "catalog.db")))
+    # Delivers reminders that came due while no worker was running
+    get_reminder_scheduler()
+    print(f"Crew worker ready, {queue.counts()[PENDING]} jobs pending")
+    try:
+        worker.run(once=args.once)
+    except KeyboardInterrupt:
+        print("\nStopping crew worker")
+    finally:
+        os.remove(PID_PATH)
+    print(f"Jobs: {queue.counts()}")
+    print(f"Classifier: {get_classifier().stats()}")
+    print(f"Response cache: {get_response_cache().stats()}")
+    print(f"Search cache: {get_search_cache().stats()}")
+    print(f"LLM calls: {get_resilient_caller().stats()}")
+    print(f"Reminders: {get_reminder_scheduler().stats()}")
+    if get_speculative():
+        print(f"Speculation: {get_speculative().stats()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+import os
+import re
+import threading
+
+from crewai import LLM
+
+from image_payload import expand_image_paths
+from llm_resilience import get_resilient_caller
+from response_cache import get_response_cache, make_key
+
+DEFAULT_MODEL = "gpt-4o-mini"
+
+
+def default_model():
+    """The model crewai would pick for an agent without an llm"""
+    return os.environ.get("OPENAI_MODEL_NAME") or os.environ.get("MODEL") or DEFAULT_MODEL
+
+
+def task_label(messages):
+    """Role of the agent making a call, from crewai's "You are <role>." system prompt"""
+    for message in messages:
+        if message.get("role") == "system" and isinstance(message.get("content"), str):
+            match = re.match(r"\s*You are ([^.\n]+)", message["content"])
+            if match:
+                return match.group(1).strip()
+    return "crew"
+
+
+class CachedLLM(LLM):
+    """
+        crewai LLM whose completions go through a ResponseCache.
+
+        `scope` is folded into every key; the runner sets it to the screenshot's
+        content hash and the prompt config version, so a cached answer is only
+        reused for the same image, note and prompts. Calls that execute
+        functions directly are not cached, as replaying them would skip their
+        side effects.
+
+        Requests go through the shared ResilientCaller (deadline, retries,
+        optional hedging, circuit breaker per model), with latencies recorded
+        per agent role. Function-executing calls are not retried or hedged.
+        Each attempt is sent with the time the caller has left as its request
+        timeout; attempts run on their own worker threads, so the override is
+        kept per thread.
+
+        Prompts only carry the screenshot's file path; image parts that point
+        at a local file (from crewai's add image tool) are replaced by compact,
+        downscaled data URLs just before the request is sent.
+    """
+
+    def __init__(self, model=None, cache=None, scope=None, caller=None, **kwargs):
+        base_url = kwargs.pop("base_url", None) or os.environ.get("OPENAI_API_BASE") or os.environ.get("OPENAI_BASE_URL")
+        self._attempt = threading.local()
+        self.caller = caller or get_resilient_caller()
+        # Default per request; _send narrows it to what is left of the caller's deadline
+        kwargs.setdefault("timeout", self.caller.deadline)
+        super().__init__(model=model or default_model(), base_url=base_url, **kwargs)
+        self.cache = cache or get_response_cache()
+        self.scope = scope
+
+    @property
+    def timeout(self):
+        """Timeout crewai passes to litellm: the attempt's own while one is being sent on this thread"""
+        return getattr(self._attempt, "timeout", None) or self._timeout
+
+    @timeout.setter
+    def timeout(self, value):
+        self._timeout = value
+
+    def _send_attempt(self, timeout, messages, tools, callbacks, available_functions):
+        self._attempt.timeout = timeout
+        try:
+            return super().call(messages, tools, callbacks, available_functions)
+        finally:
+            self._attempt.timeout = None
+
+    def _send(self, messages, tools, callbacks, available_functions):
+        messages = expand_image_paths(messages)
+        return self.caller.call(
+            lambda timeout: self._send_attempt(timeout, messages, tools, callbacks, available_functions),
+            task=task_label(messages),
+            key=self.model,
+            idempotent=not available_functions,
+        )
+
+    def call(self, messages, tools=None, callbacks=None, available_functions=None):
+        if isinstance(messages, str):
+            messages = [{"role": "user", "content": messages}]
+        if available_functions:
+            return self._send(messages, tools, callbacks, available_functions)
+        payload = {
+            "messages": messages,
+            "tools": tools,
+            "temperature": self.temperature,
+            "stop": self.stop,
+            "max_tokens": self.max_tokens or self.max_completion_tokens,
+            "response_format": self.response_format,
+        }
+        key = make_key(self.model, payload, self.scope)
+        cached = self.cache.get(key)
+        if cached is not None:
+            return cached
+        response = self._send(messages, tools, callbacks, available_functions)
+        if response:
+            self.cache.put(key, self.model, response)
+        return response
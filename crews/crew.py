@@ -1,20 +1,57 @@
 from crewai import Agent, Crew, Process, Task
-from crewai.project import CrewBase, agent, crew, task
-from crewai_tools import SerperDevTool
-from tools.reminder_tool import ReminderTool
-from crewai.tasks.conditional_task import ConditionalTask
+from crewai.project import CrewBase
 from crewai.tasks.task_output import TaskOutput
 from datetime import datetime
-from dotenv import load_dotenv
+from functools import lru_cache, wraps
 import yaml
 import os
-from pydantic import BaseModel
-from typing import Literal
+import json
+from pydantic import BaseModel, ValidationError
+from typing import Literal, Optional
 
-load_dotenv()
-web_search_tool = SerperDevTool()
-# Initialize with empty values - will be updated during task execution
-reminder_tool = ReminderTool()
+# .env is loaded by crewai.project on import. Tools are built on first use:
+# importing crewai_tools alone takes seconds.
+
+@lru_cache(maxsize=None)
+def get_web_search_tool():
+    from tools.cached_search_tool import CachedSearchTool
+    return CachedSearchTool()
+
+@lru_cache(maxsize=None)
+def get_reminder_tool():
+    from tools.reminder_tool import ReminderTool
+    return ReminderTool()
+
+def memoize_per_crew(func):
+    """Build a crew component once per crew instance, and free it with the crew.
+
+    crewai's own decorators memoize in a module-level dict keyed by the
+    instance, which keeps every crew ever created alive in a long-lived worker.
+    """
+    @wraps(func)
+    def wrapper(self):
+        built = self.__dict__.setdefault('_built', {})
+        if func.__name__ not in built:
+            built[func.__name__] = func(self)
+        return built[func.__name__]
+    return wrapper
+
+def agent(func):
+    """Marks a method as a crew agent (like crewai.project.agent)"""
+    func.is_agent = True
+    return memoize_per_crew(func)
+
+def task(func):
+    """Marks a method as a crew task (like crewai.project.task)"""
+    func.is_task = True
+
+    @wraps(func)
+    def named(self):
+        result = func(self)
+        if not result.name:
+            result.name = func.__name__
+        return result
+    return memoize_per_crew(named)
 
 # Define Pydantic models for task outputs
 class TaskClassificationOutput(BaseModel):
@@ -32,98 +69,81 @@ class ActionClassificationOutput(BaseModel):
     action: Literal['research', 'reminder', 'other']
     screenshot: str
 
-# Define condition functions
-def is_summary(output) -> bool:
-    # Handle different types of output
-    try:
-        if hasattr(output, 'json'):
-            if isinstance(output.json, dict):
-                return output.json.get('task_type') == 'Summarize notes'
-            elif isinstance(output.json, str):
-                import json
-                data = json.loads(output.json)
-                return data.get('task_type') == 'Summarize notes'
-        elif hasattr(output, 'pydantic') and output.pydantic:
-            return output.pydantic.task_type == 'Summarize notes'
-        elif isinstance(output, dict):
-            return output.get('task_type') == 'Summarize notes'
-        elif isinstance(output, str):
-            # Try to parse as JSON
-            import json
-            data = json.loads(output)
-            return data.get('task_type') == 'Summarize notes'
-    except Exception as e:
-        print(f"Error in is_summary: {e}")
-    return False
+class CombinedClassificationOutput(BaseModel):
+    task_type: Literal['Summarize notes', 'Actions']
+    action: Literal['research', 'reminder', 'other', 'none']
+    notes: str
+    screenshot: str
 
-def is_action(output) -> bool:
-    # Handle different types of output
-    try:
-        if hasattr(output, 'json'):
-            if isinstance(output.json, dict):
-                return output.json.get('task_type') == 'Actions'
-            elif isinstance(output.json, str):
-                import json
-                data = json.loads(output.json)
-                return data.get('task_type') == 'Actions'
-        elif hasattr(output, 'pydantic') and output.pydantic:
-            return output.pydantic.task_type == 'Actions'
-        elif isinstance(output, dict):
-            return output.get('task_type') == 'Actions'
-        elif isinstance(output, str):
-            # Try to parse as JSON
-            import json
-            data = json.loads(output)
-            return data.get('task_type') == 'Actions'
-    except Exception as e:
-        print(f"Error in is_action: {e}")
-    return False
+    @property
+    def route(self) -> Optional[str]:
+        """Downstream task to run: 'summarize', 'research', 'reminder' or None"""
+        if self.task_type == 'Summarize notes':
+            return 'summarize'
+        if self.action in ('research', 'reminder'):
+            return self.action
+        return None
 
-def is_research(output) -> bool:
-    # Handle different types of output
+def classification_data(output) -> Optional[dict]:
+    """Fields of a classification task output, whatever form it came in"""
     try:
-        if hasattr(output, 'json'):
-            if isinstance(output.json, dict):
-                return output.json.get('action') == 'research'
-            elif isinstance(output.json, str):
-                import json
-                data = json.loads(output.json)
-                return data.get('action') == 'research'
-        elif hasattr(output, 'pydantic') and output.pydantic:
-            return getattr(output.pydantic, 'action', '') == 'research'
-        elif isinstance(output, dict):
-            return output.get('action') == 'research'
-        elif isinstance(output, str):
-            # Try to parse as JSON
-            import json
-            data = json.loads(output)
-            return data.get('action') == 'research'
-    except Exception as e:
-        print(f"Error in is_research: {e}")
-    return False
+        if isinstance(output, (TaskClassificationOutput, ActionClassificationOutput, CombinedClassificationOutput)):
+            return output.model_dump()
+        if getattr(output, 'pydantic', None) is not None:
+            return output.pydantic.model_dump()
+        if getattr(output, 'json_dict', None):
+            return output.json_dict
+        if isinstance(output, dict):
+            return output
+        return json.loads(getattr(output, 'raw', output))
+    except (ValueError, TypeError) as e:
+        print(f"Error parsing classification: {e}")
+        return None
 
-def is_reminder(output) -> bool:
-    # Handle different types of output
+def parse_classification(output) -> Optional[CombinedClassificationOutput]:
+    """Validate a combined classification task output once, whatever form it came in"""
+    if isinstance(output, CombinedClassificationOutput):
+        return output
+    data = classification_data(output)
+    if data is None:
+        return None
     try:
-        if hasattr(output, 'json'):
-            if isinstance(output.json, dict):
-                return output.json.get('action') == 'reminder'
-            elif isinstance(output.json, str):
-                import json
-                data = json.loads(output.json)
-                return data.get('action') == 'reminder'
-        elif hasattr(output, 'pydantic') and output.pydantic:
-            return getattr(output.pydantic, 'action', '') == 'reminder'
-        elif isinstance(output, dict):
-            return output.get('action') == 'reminder'
-        elif isinstance(output, str):
-            # Try to parse as JSON
-            import json
-            data = json.loads(output)
-            return data.get('action') == 'reminder'
-    except Exception as e:
-        print(f"Error in is_reminder: {e}")
-    return False
+        return CombinedClassificationOutput.model_validate(data)
+    except ValidationError as e:
+        print(f"Error parsing classification: {e}")
+        return None
+
+class ClassificationRouter:
+    """
+        Records the route chosen by a classification crew.
+
+        The classification task's callback parses its output once and stores the
+        route, which picks the routed crew to run next. In sequential mode the
+        task classifier's answer is kept until the action classifier's arrives,
+        and the two are merged into one combined classification. (Chaining
+        several ConditionalTasks in one crew fails in crewai 0.100: it looks up
+        the previous output by task index in a list holding only the last output.)
+    """
+
+    def __init__(self):
+        self.classification = None
+        self.route = None
+        self._task_type = None
+
+    def on_classified(self, output):
+        self.classification = parse_classification(output)
+        self.route = self.classification.route if self.classification else None
+        print(f"Classified as {self.route or 'no action'}")
+
+    def on_task_classified(self, output):
+        self._task_type = classification_data(output) or {}
+
+    def on_action_classified(self, output):
+        data = dict(self._task_type or {})
+        action = (classification_data(output) or {}).get('action')
+        # The action classifier always answers; it only counts for notes that ask for an action
+        data['action'] = action if data.get('task_type') == 'Actions' and action else 'none'
+        self.on_classified(data)
 
 # Load configurations
 def load_config(file_path):
@@ -134,13 +154,16 @@ def load_config(file_path):
 current_dir = os.path.dirname(os.path.abspath(__file__))
 root_dir = os.path.dirname(current_dir)
 
-try:
-    agents_config = load_config(os.path.join(root_dir, 'config', 'agents.yml'))
-    tasks_config = load_config(os.path.join(root_dir, 'config', 'tasks.yml'))
-except Exception as e:
-    print(f"Error loading configuration: {e}")
-    agents_config = {}
-    tasks_config = {}
+@lru_cache(maxsize=None)
+def load_configs():
+    """Agent and task configuration, read once per process"""
+    config = {}
+    try:
+        config.update(load_config(os.path.join(root_dir, 'config', 'agents.yml')))
+        config.update(load_config(os.path.join(root_dir, 'config', 'tasks.yml')))
+    except Exception as e:
+        print(f"Error loading configuration: {e}")
+    return config
 
 @CrewBase
 class PostScreenshotCrew():
@@ -148,15 +171,16 @@ class PostScreenshotCrew():
         This crew will trigger after the user posts a screenshot and will execute any task specified by the user or just summarize the notes and the screenshot
     """
     
-    def __init__(self):
-        self.config = {}
-        self.config.update(agents_config)
-        self.config.update(tasks_config)
+    def __init__(self, llm=None):
+        # Shared by every agent; None lets crewai pick the model from the environment
+        self.llm = llm
+        self.config = load_configs()
     
     @agent
     def task_classifier_agent(self,) -> Agent:
         return Agent(
             config=self.config['task_classifier_agent'],
+            llm=self.llm,
             verbose=True,
             multimodal=True,
         )
@@ -165,6 +189,7 @@ class PostScreenshotCrew():
     def action_classifier_agent(self) -> Agent:
         return Agent(
             config=self.config['action_classifier_agent'],
+            llm=self.llm,
             verbose=True,
         )
 
@@ -172,9 +197,10 @@ class PostScreenshotCrew():
     def research_agent(self) -> Agent:
         return Agent(
             config=self.config['research_agent'],
+            llm=self.llm,
             verbose=True,
             multimodal=True,
-            tools=[web_search_tool],
+            tools=[get_web_search_tool()],
             allow_delegation=True
         )
 
@@ -182,14 +208,16 @@ class PostScreenshotCrew():
     def reminder_agent(self) -> Agent:
         return Agent(
             config=self.config['reminder_agent'],
+            llm=self.llm,
             verbose=True,
-            tools=[reminder_tool]
+            tools=[get_reminder_tool()]
         )
 
     @agent
     def summarize_notes_agent(self) -> Agent:
         return Agent(
             config=self.config['summarize_notes_agent'],
+            llm=self.llm,
             verbose=True,
         )
 
@@ -201,6 +229,14 @@ class PostScreenshotCrew():
             output_json=TaskClassificationOutput
         )
 
+    @task
+    def combined_classification_task(self) -> Task:
+        return Task(
+            config=self.config['combined_classification_task'],
+            agent=self.task_classifier_agent(),
+            output_json=CombinedClassificationOutput
+        )
+
     @task
     def summarize_notes_task(self) -> Task:
         return Task(
@@ -222,8 +258,7 @@ class PostScreenshotCrew():
         return Task(
             config=self.config['research_task'],
             agent=self.research_agent(),
-            output_file='research_output.md',
-            tools=[web_search_tool],
+            tools=[get_web_search_tool()],
             async_execution=True
         )
 
@@ -232,55 +267,45 @@ class PostScreenshotCrew():
         return Task(
             config=self.config['reminder_task'],
             agent=self.reminder_agent(),
-            tools=[reminder_tool]  # We'll use the tool directly and update params during execution
+            tools=[get_reminder_tool()]
         )
 
-    @crew
-    def crew(self) -> Crew:
-        # Add some debug prints to help diagnose issues with our config
-        print("Loading Crew configuration...")
-        
-        # Create conditional tasks for task type classification
-        task_type_conditional = ConditionalTask(
-            description="Execute the summarize_notes_task if the classification is 'Summarize notes'",
-            expected_output="A summary of the notes from the screenshot",
-            condition=is_summary,
-            agent=self.summarize_notes_agent()
-        )
-        
-        # Create conditional task for action type
-        action_type_conditional = ConditionalTask(
-            description="Execute the research_task if the action type is 'research'",
-            expected_output="Research results based on the screenshot",
-            condition=is_research,
-            agent=self.research_agent()
-        )
-        
-        # Create conditional task for reminder
-        reminder_conditional = ConditionalTask(
-            description="Execute the reminder_task if the action type is 'reminder'",
-            expected_output="Set a reminder for the user",
-            condition=is_reminder,
-            agent=self.reminder_agent()
+    def classification_crew(self, router, mode='combined') -> Crew:
+        """Crew that only classifies the note, leaving its route in router.
+
+        'combined' asks for the task type and action in one call; 'sequential'
+        runs the task classifier and then the action classifier.
+        """
+        if mode == 'combined':
+            classification = self.combined_classification_task()
+            classification.callback = router.on_classified
+            agents = [self.task_classifier_agent()]
+            tasks = [classification]
+        else:
+            task_classification = self.task_classification_task()
+            task_classification.callback = router.on_task_classified
+            action_classification = self.action_classification_task()
+            action_classification.callback = router.on_action_classified
+            agents = [self.task_classifier_agent(), self.action_classifier_agent()]
+            tasks = [task_classification, action_classification]
+        return Crew(
+            agents=agents,
+            tasks=tasks,
+            verbose=True,
+            process=Process.sequential
         )
-        
-        print("Building Crew with tasks...")
-        
+
+    def routed_crew(self, route) -> Crew:
+        """Crew with only the downstream task for a route decided before kickoff (see crews.runner)"""
+        routed_tasks = {
+            'summarize': self.summarize_notes_task,
+            'research': self.research_task,
+            'reminder': self.reminder_task,
+        }
+        routed_task = routed_tasks[route]()
         return Crew(
-            agents=[
-                self.task_classifier_agent(),
-                self.summarize_notes_agent(),
-                self.action_classifier_agent(),
-                self.research_agent(),
-                self.reminder_agent()
-            ],
-            tasks=[
-                self.task_classification_task(),
-                task_type_conditional,
-                self.action_classification_task(),
-                action_type_conditional,
-                reminder_conditional
-            ],
+            agents=[routed_task.agent],
+            tasks=[routed_task],
             verbose=True,
             process=Process.sequential
         )
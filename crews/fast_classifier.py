@@ -0,0 +1,177 @@
+import os
+import pickle
+import re
+import threading
+from collections import namedtuple
+
+SUMMARIZE = "summarize"
+RESEARCH = "research"
+REMINDER = "reminder"
+ROUTES = (SUMMARIZE, RESEARCH, REMINDER)
+
+# LLM classification calls a fast-path decision saves: the sequential crew asks the
+# task classifier and then the action classifier, the combined crew asks once.
+LLM_CLASSIFIER_CALLS = {"sequential": 2, "combined": 1}
+
+# A route is taken locally at or above this confidence, else the LLM classifiers decide
+DEFAULT_THRESHOLD = 0.8
+
+# route is None when the note should go through the LLM classifiers; guess is
+# then the most likely route, if any, for speculative execution
+Classification = namedtuple("Classification", "route confidence reason guess", defaults=(None,))
+
+_TIME = (
+    r"(?:today|tonight|tomorrow|this (?:morning|afternoon|evening|weekend)|next (?:week|month)"
+    r"|(?:on )?(?:mon|tues|wednes|thurs|fri|satur|sun)day"
+    r"|at \d{1,2}(?::\d{2})?\s*(?:am|pm)?|\d{1,2}(?::\d{2})?\s*(?:am|pm)"
+    r"|in \d+ (?:min(?:ute)?s?|hours?|days?|weeks?))"
+)
+
+# (route, pattern, weight): weights of matching rules add up to the route's score.
+# Imperatives reach DEFAULT_THRESHOLD on their own; a bare keyword ("reminder app",
+# "search bar", "Google Maps") may just be a noun, so it only does with a time cue.
+RULES = [
+    (REMINDER, r"\bremind (?:me|us)\b", 0.9),
+    (REMINDER, r"\b(?:set|add|create|make) (?:a |an )?reminder\b", 0.9),
+    (REMINDER, r"\b(?:don'?t|do not) (?:let me )?forget\b", 0.85),
+    (REMINDER, r"\b(?:alert|ping|notify) me\b", 0.85),
+    (REMINDER, r"\bremind(?:ers?)?\b", 0.45),
+    (REMINDER, r"\b(?:deadline|due|appointment|meeting)\b", 0.3),
+    (REMINDER, r"\b" + _TIME + r"\b", 0.35),
+    (RESEARCH, r"\b(?:look (?:up|into)|find out|dig into|investigate)\b", 0.9),
+    (RESEARCH, r"^(?:please\s+)?(?:research|search|google) (?:for|about|up|on|this|that|it|the|what|who|how|why"
+               r"|where|which|whether)\b", 0.85),
+    (RESEARCH, r"\b(?:search|google) (?:for|up)\b", 0.85),
+    (RESEARCH, r"\b(?:research|search|google)\b", 0.4),
+    (RESEARCH, r"\b(?:learn|read|know|tell me) (?:more )?about\b", 0.85),
+    (RESEARCH, r"^(?:what|who|where|which|why|how)\b", 0.6),
+    (RESEARCH, r"\b(?:compare|alternatives? to|reviews? of|price of|how much)\b", 0.6),
+    (RESEARCH, r"\?\s*$", 0.3),
+]
+
+# Requests for some other action (share, buy, ...) are left to the LLM classifiers
+ACTION_VERBS = re.compile(
+    r"^(?:please\s+)?(?:add|book|buy|call|check|download|email|fix|message|order|pay"
+    r"|save|schedule|send|share|text|todo|to do|translate|write)\b"
+)
+
+SUMMARIZE_CONFIDENCE = 0.85
+EMPTY_NOTE_CONFIDENCE = 0.95
+
+_COMPILED_RULES = [(route, re.compile(pattern), weight) for route, pattern, weight in RULES]
+
+
+def normalize(note):
+    return " ".join((note or "").lower().split())
+
+
+def rule_scores(note):
+    """Per-route scores in [0, 1] and the phrases that matched"""
+    scores = dict.fromkeys((RESEARCH, REMINDER), 0.0)
+    matched = []
+    for route, pattern, weight in _COMPILED_RULES:
+        match = pattern.search(note)
+        if match:
+            scores[route] = min(1.0, scores[route] + weight)
+            matched.append(repr(match.group(0)))
+    return scores, matched
+
+
+def classify_with_rules(note):
+    """Deterministic keyword/regex classification of a note"""
+    text = normalize(note)
+    if not text:
+        return Classification(SUMMARIZE, EMPTY_NOTE_CONFIDENCE, "empty note")
+
+    scores, matched = rule_scores(text)
+    route, score = max(scores.items(), key=lambda item: item[1])
+    runner_up = min(scores.values())
+    if score > 0:
+        # Evidence for both actions (e.g. "remind me to look up ...") lowers confidence
+        confidence = round(max(0.0, score - runner_up / 2), 3)
+        return Classification(route, confidence, "matched " + ", ".join(matched))
+
+    if ACTION_VERBS.search(text):
+        return Classification(None, 0.0, "other action")
+    return Classification(SUMMARIZE, SUMMARIZE_CONFIDENCE, "no action cues")
+
+
+def load_model(path):
+    """Unpickle a small text model, e.g. a scikit-learn TF-IDF + logistic regression pipeline.
+
+    It must have predict_proba([text]) and classes_ drawn from ROUTES (other labels
+    are never taken).
+    """
+    with open(path, "rb") as f:
+        return pickle.load(f)
+
+
+class FastClassifier:
+    """
+        Local pre-classifier for PostScreenshotCrew.
+
+        Notes are classified by keyword rules, then by an optional small CPU model
+        when the rules are not sure. A route is only returned when its confidence
+        reaches `threshold`; otherwise the route is None and the caller runs the
+        full crew with the LLM classifiers. Counters track how often each path is
+        taken and how many LLM calls the fast path saved.
+    """
+
+    def __init__(self, threshold=DEFAULT_THRESHOLD, model=None, llm_calls=LLM_CLASSIFIER_CALLS["sequential"]):
+        self.threshold = threshold
+        self.model = model
+        self.llm_calls = llm_calls
+        self._lock = threading.Lock()
+        self._counts = {"fast_path": 0, "llm_fallback": 0, "llm_calls_saved": 0}
+        self._routes = dict.fromkeys(ROUTES, 0)
+
+    def _classify_with_model(self, note):
+        probabilities = self.model.predict_proba([normalize(note)])[0]
+        label, confidence = max(zip(self.model.classes_, probabilities), key=lambda item: item[1])
+        if label not in ROUTES:
+            return Classification(None, float(confidence), f"model predicted {label}")
+        return Classification(label, float(confidence), "model")
+
+    def classify(self, note):
+        """Classification for a note; route is None when the LLM should decide"""
+        result = classify_with_rules(note)
+        if result.route is None or result.confidence < self.threshold:
+            if self.model is not None:
+                try:
+                    predicted = self._classify_with_model(note)
+                    if predicted.confidence > result.confidence:
+                        result = predicted
+                except Exception as e:
+                    print(f"Error in fast classifier model: {e}")
+        if result.route is not None and result.confidence < self.threshold:
+            result = Classification(None, result.confidence, f"low confidence for {result.route}", result.route)
+        self._count(result)
+        return result
+
+    def _count(self, result):
+        with self._lock:
+            if result.route is None:
+                self._counts["llm_fallback"] += 1
+            else:
+                self._counts["fast_path"] += 1
+                self._counts["llm_calls_saved"] += self.llm_calls
+                self._routes[result.route] += 1
+
+    def stats(self):
+        """Counters since start: fast_path, llm_fallback, llm_calls_saved and per-route fast paths"""
+        with self._lock:
+            return dict(self._counts, routes=dict(self._routes))
+
+
+def get_fast_classifier(threshold=None, model_path=None, mode="sequential"):
+    """Classifier configured from SCREENSHOT_CLASSIFIER_THRESHOLD and SCREENSHOT_CLASSIFIER_MODEL"""
+    if threshold is None:
+        threshold = float(os.environ.get("SCREENSHOT_CLASSIFIER_THRESHOLD", DEFAULT_THRESHOLD))
+    model_path = model_path or os.environ.get("SCREENSHOT_CLASSIFIER_MODEL")
+    model = None
+    if model_path:
+        try:
+            model = load_model(model_path)
+        except Exception as e:
+            print(f"Could not load classifier model {model_path}, using rules only: {e}")
+    return FastClassifier(threshold=threshold, model=model, llm_calls=LLM_CLASSIFIER_CALLS[mode])
@@ -0,0 +1,114 @@
+import copy
+import os
+
+from crews.cached_llm import CachedLLM
+from crews.crew import ClassificationRouter, PostScreenshotCrew
+from crews.fast_classifier import Classification, get_fast_classifier
+from crews.speculative import get_speculative_runner
+from response_cache import config_version, file_digest
+from results_store import OUTPUT_FIELDS, get_result_store, record_crew_output
+
+# "combined" classifies task type and action in one LLM call, "sequential" uses the two classifier tasks;
+# either way the classification runs as its own crew, followed by the chosen route's crew
+CLASSIFICATION_MODES = ("combined", "sequential")
+
+_classifier = None
+_speculative_runner = None
+
+
+def get_classification_mode():
+    mode = os.environ.get("SCREENSHOT_CLASSIFICATION", "combined")
+    if mode not in CLASSIFICATION_MODES:
+        print(f"Unknown classification mode {mode!r}, using combined")
+        mode = "combined"
+    return mode
+
+
+def get_classifier():
+    global _classifier
+    if _classifier is None:
+        _classifier = get_fast_classifier(mode=get_classification_mode())
+    return _classifier
+
+
+def get_speculative():
+    """Shared speculative runner, or None unless SCREENSHOT_SPECULATE is set"""
+    global _speculative_runner
+    if _speculative_runner is None and os.environ.get("SCREENSHOT_SPECULATE", "0") not in ("", "0", "false"):
+        _speculative_runner = get_speculative_runner()
+    return _speculative_runner
+
+
+def cache_scope(screenshot):
+    """Response cache scope for a screenshot: its content hash (or path) and the prompt config version"""
+    return f"{file_digest(screenshot) or screenshot}:{config_version()}"
+
+
+def run_post_screenshot(inputs, classifier=None, mode=None, cached=True, speculative=None, crew_instance=None,
+                        store=None, catalog=None):
+    """Run PostScreenshotCrew for one screenshot, skipping the LLM classifiers when possible.
+
+    A note the fast classifier is confident about goes straight to its downstream
+    task; anything else is classified by the LLM in the given classification
+    mode and then runs the chosen task.
+    With a speculative runner (see get_speculative), a likely branch starts
+    alongside the classification. With cached, every agent's LLM calls go
+    through the response cache. A long-lived caller can pass its own
+    crew_instance (built with a CachedLLM) to reuse its agents across runs;
+    it must not be shared between threads. The task outputs are saved in the
+    result store with the classification that chose them (and the summary in
+    catalog, if given). Returns the crew output.
+    """
+    output, classification = _kickoff(inputs, classifier, mode, cached, speculative, crew_instance)
+    record_crew_output(store or get_result_store(), inputs["screenshot_url"], inputs.get("note"), output, catalog,
+                       classification=classification_result(classification))
+    return output
+
+
+def is_processed(inputs, store=None):
+    """True if the result store already has crew output for this screenshot and note"""
+    result = (store or get_result_store()).get(inputs["screenshot_url"])
+    if not result or result.get("note") != inputs.get("note"):
+        return False
+    return any(result.get(field) for field in OUTPUT_FIELDS)
+
+
+def classification_result(classification):
+    """A fast Classification or the LLM's CombinedClassificationOutput, as saved in the result store"""
+    if classification is None:
+        return None
+    if isinstance(classification, Classification):
+        return {"route": classification.route, "confidence": classification.confidence,
+                "reason": classification.reason, "source": "fast_classifier"}
+    return dict(classification.model_dump(), route=classification.route, source="llm")
+
+
+def _classify_then_route(crew_instance, inputs, mode):
+    """Classification crew for mode, then the chosen route's crew; returns (last crew output, classification)"""
+    router = ClassificationRouter()
+    output = crew_instance.classification_crew(router, mode).kickoff(inputs=inputs)
+    if router.route is None:
+        return output, router.classification
+    return crew_instance.routed_crew(router.route).kickoff(inputs=inputs), router.classification
+
+
+def _kickoff(inputs, classifier, mode, cached, speculative, crew_instance):
+    classifier = classifier or get_classifier()
+    mode = mode or get_classification_mode()
+    speculative = speculative or get_speculative()
+    classification = classifier.classify(inputs.get("note", ""))
+    scope = cache_scope(inputs.get("screenshot_url"))
+    if crew_instance is None:
+        crew_instance = PostScreenshotCrew(llm=CachedLLM(scope=scope) if cached else None)
+    elif isinstance(crew_instance.llm, CachedLLM):
+        crew_instance.llm.scope = scope
+    if classification.route is None and speculative and speculative.should_speculate(classification):
+        print(f"Speculating on {classification.guess} ({classification.confidence:.2f}) while classifying")
+        # The branch may outlive this run, so it gets its own agents, tasks and LLM (with this run's scope)
+        branch_instance = PostScreenshotCrew(llm=copy.copy(crew_instance.llm))
+        return speculative.run(crew_instance, branch_instance, inputs, classification.guess, mode)
+    if classification.route is None:
+        print(f"Classifying with the crew ({classification.reason})")
+        return _classify_then_route(crew_instance, inputs, mode)
+    print(f"Fast path: {classification.route} ({classification.confidence:.2f}, {classification.reason})")
+    return crew_instance.routed_crew(classification.route).kickoff(inputs=inputs), classification
@@ -0,0 +1,107 @@
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from crews.crew import ClassificationRouter
+
+# Only side-effect free branches may run before the route is known: a
+# speculative reminder would be set even when the classifier disagrees.
+# The rules classifier's low-confidence guesses are research or reminder
+# (summarize only comes out below the threshold from a model), so research is
+# the branch that actually gets speculated on by default.
+SPECULATIVE_ROUTES = ("summarize", "research")
+DEFAULT_MIN_CONFIDENCE = 0.4
+
+
+class SpeculativeRunner:
+    """
+        Runs the likely downstream branch in parallel with LLM classification.
+
+        When the fast classifier has a guess that is not confident enough to
+        skip classification, the guessed branch starts alongside the
+        classification crew (combined or sequential, as the runner is
+        configured). The branch runs on its own crew instance (and LLM), as a
+        discarded branch may still be running after run() returns and the
+        caller moves on to its next job with the warm instance. If the classifier agrees, the branch's result is
+        used and the overlap is saved; otherwise the branch is cancelled (or,
+        once started, abandoned and its result discarded) and the chosen
+        branch runs as usual. Counters record the time saved and wasted so the
+        routes and min_confidence can be tuned.
+    """
+
+    def __init__(self, routes=SPECULATIVE_ROUTES, min_confidence=DEFAULT_MIN_CONFIDENCE, workers=4):
+        self.routes = tuple(routes)
+        self.min_confidence = min_confidence
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="speculative")
+        self._lock = threading.Lock()
+        self._counts = {"speculated": 0, "hits": 0, "misses": 0, "cancelled": 0, "saved_s": 0.0, "wasted_s": 0.0}
+
+    def should_speculate(self, classification):
+        return classification.guess in self.routes and classification.confidence >= self.min_confidence
+
+    def _add(self, **amounts):
+        with self._lock:
+            for name, amount in amounts.items():
+                self._counts[name] += amount
+
+    def _timed(self, crew, inputs):
+        started = time.perf_counter()
+        output = crew.kickoff(inputs=inputs)
+        return output, time.perf_counter() - started
+
+    def _discard(self, future):
+        if future.cancel():
+            self._add(cancelled=1)
+            return
+
+        def on_done(done):
+            if not done.cancelled() and done.exception() is None:
+                self._add(wasted_s=done.result()[1])
+
+        future.add_done_callback(on_done)
+
+    def run(self, crew_instance, branch_instance, inputs, guess, mode='combined'):
+        """Classify on crew_instance while `guess`'s branch runs on branch_instance.
+
+        Returns the crew output and the LLM classification.
+        """
+        self._add(speculated=1)
+        speculative = self._executor.submit(self._timed, branch_instance.routed_crew(guess), inputs)
+
+        router = ClassificationRouter()
+        output, classify_seconds = self._timed(crew_instance.classification_crew(router, mode), inputs)
+
+        if router.route == guess:
+            try:
+                result, branch_seconds = speculative.result()
+            except Exception as e:
+                print(f"Speculative {guess} failed, running it again: {e}")
+                self._add(misses=1)
+                return crew_instance.routed_crew(guess).kickoff(inputs=inputs), router.classification
+            # The branch overlapped the classification instead of following it
+            self._add(hits=1, saved_s=min(branch_seconds, classify_seconds))
+            return result, router.classification
+
+        self._add(misses=1)
+        self._discard(speculative)
+        print(f"Speculative {guess} discarded, classified as {router.route or 'no action'}")
+        if router.route is None:
+            return output, router.classification
+        return crew_instance.routed_crew(router.route).kickoff(inputs=inputs), router.classification
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._counts)
+        stats["saved_s"] = round(stats["saved_s"], 2)
+        stats["wasted_s"] = round(stats["wasted_s"], 2)
+        stats["hit_rate"] = round(stats["hits"] / stats["speculated"], 3) if stats["speculated"] else 0.0
+        return stats
+
+
+def get_speculative_runner():
+    """Runner configured from SCREENSHOT_SPECULATE_ROUTES and SCREENSHOT_SPECULATE_MIN_CONFIDENCE"""
+    routes = os.environ.get("SCREENSHOT_SPECULATE_ROUTES")
+    min_confidence = float(os.environ.get("SCREENSHOT_SPECULATE_MIN_CONFIDENCE", DEFAULT_MIN_CONFIDENCE))
+    routes = tuple(route.strip() for route in routes.split(",")) if routes else SPECULATIVE_ROUTES
+    return SpeculativeRunner(routes=routes, min_confidence=min_confidence)
@@ -0,0 +1,119 @@
+import threading
+from collections import OrderedDict
+from PIL import Image
+
+HASH_BITS = 64
+
+
+def dhash(img, hash_size=8):
+    """64-bit difference hash: compares neighbouring pixels of a tiny grayscale copy.
+
+    Robust to rescaling and small changes (cursor, clock), so two captures of the
+    same screen land within a few bits of each other. A nearest-neighbour sample
+    is taken first so a full Retina capture is hashed in about a millisecond.
+    """
+    sample = img.resize(((hash_size + 1) * 32, hash_size * 32), Image.Resampling.NEAREST)
+    small = sample.convert('L').resize((hash_size + 1, hash_size), Image.Resampling.BOX)
+    pixels = small.tobytes()
+    value = 0
+    for row in range(hash_size):
+        offset = row * (hash_size + 1)
+        for col in range(hash_size):
+            value = (value << 1) | (pixels[offset + col] > pixels[offset + col + 1])
+    return value
+
+
+def hamming(a, b):
+    return (a ^ b).bit_count()
+
+
+def to_signed(value):
+    """Store an unsigned 64-bit hash in a signed SQLite INTEGER"""
+    return value - (1 << 64) if value >= 1 << 63 else value
+
+
+def to_unsigned(value):
+    return value + (1 << 64) if value < 0 else value
+
+
+def _variants(chunk, bits, radius):
+    """All chunk values within `radius` bit flips (radius 0 or 1)"""
+    yield chunk
+    if radius >= 1:
+        for bit in range(bits):
+            yield chunk ^ (1 << bit)
+
+
+class HashIndex:
+    """
+        Multi-index hash table for Hamming-distance lookups over 64-bit hashes.
+
+        Each hash is split into `chunks` substrings with one exact-match table
+        each. By the pigeonhole principle two hashes within distance r share a
+        chunk within r // chunks bits, so a query only probes a handful of buckets
+        and verifies their few candidates, instead of scanning every entry. The
+        index keeps the `capacity` most recently added keys.
+    """
+
+    def __init__(self, chunks=4, capacity=100_000):
+        if HASH_BITS % chunks:
+            raise ValueError("chunks must divide 64")
+        self.chunks = chunks
+        self.chunk_bits = HASH_BITS // chunks
+        self.capacity = capacity
+        self._mask = (1 << self.chunk_bits) - 1
+        self._tables = [{} for _ in range(chunks)]
+        self._hashes = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._hashes)
+
+    def _split(self, value):
+        return [(value >> (i * self.chunk_bits)) & self._mask for i in range(self.chunks)]
+
+    def add(self, key, value):
+        with self._lock:
+            if key in self._hashes:
+                self._remove(key)
+            self._hashes[key] = value
+            for table, chunk in zip(self._tables, self._split(value)):
+                table.setdefault(chunk, set()).add(key)
+            while len(self._hashes) > self.capacity:
+                self._remove(next(iter(self._hashes)))
+
+    def remove(self, key):
+        with self._lock:
+            if key in self._hashes:
+                self._remove(key)
+
+    def _remove(self, key):
+        value = self._hashes.pop(key)
+        for table, chunk in zip(self._tables, self._split(value)):
+            bucket = table.get(chunk)
+            if bucket is not None:
+                bucket.discard(key)
+                if not bucket:
+                    del table[chunk]
+
+    def get(self, key):
+        return self._hashes.get(key)
+
+    def find(self, value, max_distance):
+        """Closest (key, distance) within max_distance, or None"""
+        chunk_radius = max_distance // self.chunks
+        if chunk_radius > 1:
+            raise ValueError(f"max_distance must be below {2 * self.chunks}")
+        best = None
+        with self._lock:
+            seen = set()
+            for table, chunk in zip(self._tables, self._split(value)):
+                for variant in _variants(chunk, self.chunk_bits, chunk_radius):
+                    for key in table.get(variant, ()):
+                        if key in seen:
+                            continue
+                        seen.add(key)
+                        distance = hamming(value, self._hashes[key])
+                        if distance <= max_distance and (best is None or distance < best[1]):
+                            best = (key, distance)
+        return best
@@ -0,0 +1,408 @@
+"""
+Local stand-in for the OpenAI chat completions API and the Serper search API,
+for testing timeouts, retries, hedging and load without real model or search
+calls.
+
+    python devtools/fake_llm_server.py [--port 8765] [--latency 0.2] [--tail-rate 0.05] [--tail-latency 5]
+                                       [--error-rate 0.1] [--search-latency 0.3]
+                                       [--record CASSETTE [--upstream URL] | --replay CASSETTE]
+
+Point the app at it with OPENAI_BASE_URL=http://127.0.0.1:8765/v1 and
+SERPER_BASE_URL=http://127.0.0.1:8765 (any OPENAI_API_KEY and SERPER_API_KEY).
+Each chat request sleeps --latency seconds (--tail-latency for a --tail-rate
+fraction of requests) and fails with a 503 for an --error-rate fraction.
+Search requests sleep --search-latency seconds.
+
+Replies are scripted per agent: the research and reminder agents first call
+their tool, then every agent gives a crewai-style final answer holding JSON
+that every task can parse. With --record, requests are forwarded to the real
+APIs and their responses appended to a JSON lines cassette; with --replay,
+responses come from the cassette (matched on the request with timestamps
+removed, else on the agent, else scripted) with the injected latency.
+Streaming requests get the reply in chunks, --token-delay seconds apart.
+GET /stats returns request counters.
+"""
+import argparse
+import hashlib
+import json
+import os
+import random
+import re
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+import uuid
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from tools.search_backends import LocalSearchBackend  # noqa: E402
+
+OPENAI_UPSTREAM = "https://api.openai.com/v1"
+SERPER_UPSTREAM = "https://google.serper.dev"
+SEARCH_PATHS = ("/search", "/news")
+
+DEFAULT_ANSWER = {
+    "task_type": "Summarize notes",
+    "action": "none",
+    "notes": "",
+    "screenshot": "",
+    "summary": "Fake summary of the screenshot and its note.",
+}
+
+# Inputs that change on every run and would make recorded requests never match
+VOLATILE = re.compile(r"\d{4}-\d{2}-\d{2}[ T]\d{2}:\d{2}:\d{2}(\.\d+)?")
+
+
+def default_reply():
+    return "Thought: I now know the final answer\nFinal Answer: " + json.dumps(DEFAULT_ANSWER)
+
+
+def agent_role(messages):
+    """Role of the crewai agent behind a request, from its "You are <role>." system prompt"""
+    for message in messages:
+        if message.get("role") == "system" and isinstance(message.get("content"), str):
+            match = re.match(r"\s*You are ([^.\n]+)", message["content"])
+            if match:
+                return match.group(1).strip()
+    return None
+
+
+def tool_call(tool, arguments):
+    return f"Thought: I should use the {tool} tool\nAction: {tool}\nAction Input: {json.dumps(arguments)}"
+
+
+def has_observation(messages):
+    """True once a crewai agent has called a tool in this conversation"""
+    # The system prompt's format instructions mention "Observation:" too; tool results come back as assistant text
+    return any(message.get("role") == "assistant" and "\nObservation:" in str(message.get("content"))
+               for message in messages)
+
+
+def scripted_reply(messages):
+    """Reply for a crew agent: a tool call for agents with tools on their first turn, else a final answer"""
+    role = agent_role(messages)
+    observed = has_observation(messages)
+    if role == "Research Expert" and not observed:
+        return tool_call("Search the internet", {"search_query": "screenshot note research"})
+    if role == "Reminder Agent" and not observed:
+        due = (datetime.now() + timedelta(hours=1)).strftime("%Y-%m-%d %H:%M:%S")
+        return tool_call("ReminderTool", {"note": "Follow up on the screenshot", "time": due})
+    return default_reply()
+
+
+def request_key(kind, request):
+    """Cassette key for a request: everything that determines the answer, minus timestamps and streaming"""
+    request = {k: v for k, v in request.items() if k not in ("stream", "stream_options")}
+    blob = VOLATILE.sub("<time>", json.dumps([kind, request], sort_keys=True))
+    return hashlib.sha256(blob.encode("utf-8")).hexdigest()
+
+
+class Cassette:
+    """Recorded responses in a JSON lines file, looked up by request key or, failing that, by agent role"""
+
+    def __init__(self, path):
+        self.path = path
+        self.by_key = {}
+        self.by_role = {}
+        self._lock = threading.Lock()
+        if os.path.exists(path):
+            with open(path, "r") as f:
+                for line in f:
+                    if line.strip():
+                        self._index(json.loads(line))
+
+    def _index(self, entry):
+        self.by_key[entry["key"]] = entry
+        if entry.get("role"):
+            self.by_role[(entry["kind"], entry["role"])] = entry
+
+    def find(self, kind, key, role=None):
+        """(entry, "exact" or "role"), or (None, None)"""
+        with self._lock:
+            if key in self.by_key:
+                return self.by_key[key], "exact"
+            if role and (kind, role) in self.by_role:
+                return self.by_role[(kind, role)], "role"
+        return None, None
+
+    def add(self, kind, key, role, response):
+        entry = {"kind": kind, "key": key, "role": role, "response": response, "recorded_at": time.time()}
+        with self._lock:
+            self._index(entry)
+            with open(self.path, "a") as f:
+                f.write(json.dumps(entry) + "\n")
+
+
+def forward(url, body, headers):
+    """POST body as JSON to url; returns (status, parsed response)"""
+    request = urllib.request.Request(url, data=json.dumps(body).encode("utf-8"), method="POST",
+                                     headers=dict(headers, **{"Content-Type": "application/json"}))
+    try:
+        with urllib.request.urlopen(request, timeout=120) as response:
+            return response.status, json.loads(response.read())
+    except urllib.error.HTTPError as e:
+        return e.code, json.loads(e.read() or b"{}")
+
+
+class FakeLLM:
+    """
+        Latency, failure and reply model shared by the request handlers.
+
+        `mode` is "fake" (scripted replies), "record" (forward to the real
+        APIs and save responses to the cassette) or "replay" (answer from
+        the cassette). Injected latency and errors apply except when
+        recording.
+    """
+
+    def __init__(self, latency=0.2, tail_rate=0.0, tail_latency=5.0, error_rate=0.0, reply=None, seed=None,
+                 token_delay=0.02, search_latency=0.3, mode="fake", cassette=None, upstream=OPENAI_UPSTREAM,
+                 search_upstream=SERPER_UPSTREAM):
+        self.latency = latency
+        self.token_delay = token_delay
+        self.tail_rate = tail_rate
+        self.tail_latency = tail_latency
+        self.error_rate = error_rate
+        self.reply = reply
+        self.search_latency = search_latency
+        self.mode = mode
+        self.cassette = Cassette(cassette) if cassette else None
+        if mode != "fake" and self.cassette is None:
+            raise ValueError(f"{mode} mode needs a cassette")
+        self.upstream = upstream.rstrip("/")
+        self.search_upstream = search_upstream.rstrip("/")
+        self.search_backend = LocalSearchBackend(latency=0)
+        self.random = random.Random(seed)
+        self._lock = threading.Lock()
+        self.counts = {"requests": 0, "searches": 0, "errors": 0, "slow": 0, "in_flight": 0, "max_in_flight": 0,
+                       "recorded": 0, "replayed": 0, "replayed_by_role": 0, "scripted": 0}
+        self.by_role = {}
+
+    def _add(self, name, amount=1):
+        with self._lock:
+            self.counts[name] += amount
+            if name == "in_flight":
+                self.counts["max_in_flight"] = max(self.counts["max_in_flight"], self.counts["in_flight"])
+
+    def stats(self):
+        with self._lock:
+            return dict(self.counts, by_role=dict(self.by_role))
+
+    def plan(self):
+        """(seconds to sleep, whether it is a slow request, whether to fail) for the next request"""
+        with self._lock:
+            slow = self.random.random() < self.tail_rate
+            failed = self.random.random() < self.error_rate
+        return (self.tail_latency if slow else self.latency), slow, failed
+
+    def chunks(self, request, content):
+        """Streamed reply as chat.completion.chunk bodies, a few words each"""
+        words = content.split(" ")
+        chunk_id = f"chatcmpl-{uuid.uuid4().hex[:12]}"
+        for i in range(0, len(words), 3):
+            text = " ".join(words[i:i + 3]) + (" " if i + 3 < len(words) else "")
+            yield {
+                "id": chunk_id,
+                "object": "chat.completion.chunk",
+                "created": int(time.time()),
+                "model": request.get("model", "fake"),
+                "choices": [{"index": 0, "delta": {"content": text}, "finish_reason": None}],
+            }
+        yield {
+            "id": chunk_id,
+            "object": "chat.completion.chunk",
+            "created": int(time.time()),
+            "model": request.get("model", "fake"),
+            "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}],
+        }
+
+    def _completion(self, request, content):
+        prompt_tokens = len(json.dumps(request.get("messages", []))) // 4
+        completion_tokens = len(content) // 4
+        return {
+            "id": f"chatcmpl-{uuid.uuid4().hex[:12]}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": request.get("model", "fake"),
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": content},
+                "finish_reason": "stop",
+            }],
+            "usage": {
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens,
+                "total_tokens": prompt_tokens + completion_tokens,
+            },
+        }
+
+    def _inject(self):
+        """Sleep like an upstream would; returns an error response or None"""
+        seconds, slow, failed = self.plan()
+        self._add("in_flight")
+        try:
+            if slow:
+                self._add("slow")
+            time.sleep(seconds)
+        finally:
+            self._add("in_flight", -1)
+        if failed:
+            self._add("errors")
+            return 503, {"error": {"message": "fake upstream overloaded", "type": "server_error"}}
+        return None
+
+    def complete(self, request, headers=None):
+        """(status, chat.completion body) for a chat request"""
+        self._add("requests")
+        messages = request.get("messages", [])
+        role = agent_role(messages)
+        with self._lock:
+            self.by_role[role or "other"] = self.by_role.get(role or "other", 0) + 1
+        key = request_key("chat", request)
+        # Replayed by role, an agent's first turn and its turn after a tool call need different answers
+        if role:
+            role = f"{role} ({'after tool' if has_observation(messages) else 'first turn'})"
+
+        if self.mode == "record":
+            upstream_request = {k: v for k, v in request.items() if k not in ("stream", "stream_options")}
+            status, body = forward(f"{self.upstream}/chat/completions", upstream_request,
+                                   {"Authorization": (headers or {}).get("Authorization", "")})
+            if status == 200:
+                self.cassette.add("chat", key, role, body)
+                self._add("recorded")
+            return status, body
+
+        error = self._inject()
+        if error:
+            return error
+        entry, match = self.cassette.find("chat", key, role) if self.cassette else (None, None)
+        if entry is not None:
+            self._add("replayed" if match == "exact" else "replayed_by_role")
+            return 200, dict(entry["response"], id=f"chatcmpl-{uuid.uuid4().hex[:12]}", created=int(time.time()))
+        self._add("scripted")
+        return 200, self._completion(request, self.reply or scripted_reply(messages))
+
+    def search(self, search_type, request, headers=None):
+        """(status, Serper-style body) for a search request"""
+        self._add("searches")
+        key = request_key(search_type, request)
+        if self.mode == "record":
+            status, body = forward(f"{self.search_upstream}/{search_type}", request,
+                                   {"X-API-KEY": (headers or {}).get("X-API-KEY", "")})
+            if status == 200:
+                self.cassette.add(search_type, key, None, body)
+                self._add("recorded")
+            return status, body
+
+        time.sleep(self.search_latency)
+        entry, _ = self.cassette.find(search_type, key) if self.cassette else (None, None)
+        if entry is not None:
+            self._add("replayed")
+            return 200, entry["response"]
+        return 200, self.search_backend.search(request.get("q", ""), search_type)
+
+
+def make_handler(fake):
+    class Handler(BaseHTTPRequestHandler):
+        def _send_json(self, status, body):
+            data = json.dumps(body).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def do_POST(self):
+            path = self.path.rstrip("/")
+            length = int(self.headers.get("Content-Length") or 0)
+            try:
+                request = json.loads(self.rfile.read(length) or b"{}")
+            except ValueError:
+                self._send_json(400, {"error": {"message": "invalid JSON"}})
+                return
+            try:
+                if path.endswith("/chat/completions"):
+                    status, body = fake.complete(request, dict(self.headers))
+                    if request.get("stream") and status == 200:
+                        self._stream(request, body["choices"][0]["message"]["content"] or "")
+                    else:
+                        self._send_json(status, body)
+                elif path in SEARCH_PATHS:
+                    self._send_json(*fake.search(path.lstrip("/"), request, dict(self.headers)))
+                else:
+                    self._send_json(404, {"error": {"message": f"unknown path {self.path}"}})
+            except (BrokenPipeError, ConnectionResetError):
+                # The client gave up (timeout or a hedge won)
+                pass
+
+        def _stream(self, request, content):
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.end_headers()
+            for i, chunk in enumerate(fake.chunks(request, content)):
+                if i:
+                    time.sleep(fake.token_delay)
+                self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode("utf-8"))
+                self.wfile.flush()
+            self.wfile.write(b"data: [DONE]\n\n")
+            self.wfile.flush()
+
+        def do_GET(self):
+            if self.path.rstrip("/") == "/stats":
+                self._send_json(200, fake.stats())
+            else:
+                self._send_json(404, {"error": {"message": f"unknown path {self.path}"}})
+
+        def log_message(self, format, *args):
+            pass
+
+    return Handler
+
+
+def serve(fake, host="127.0.0.1", port=8765):
+    """Start the server on a background thread and return it (port 0 picks a free port)"""
+    server = ThreadingHTTPServer((host, port), make_handler(fake))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.2, help="seconds per request")
+    parser.add_argument("--tail-rate", type=float, default=0.0, help="fraction of requests that are slow")
+    parser.add_argument("--tail-latency", type=float, default=5.0, help="seconds for a slow request")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of requests that fail with 503")
+    parser.add_argument("--search-latency", type=float, default=0.3, help="seconds per search request")
+    parser.add_argument("--reply", help="assistant message to return instead of the scripted replies")
+    parser.add_argument("--token-delay", type=float, default=0.02, help="seconds between streamed chunks")
+    parser.add_argument("--seed", type=int, help="random seed, for repeatable runs")
+    modes = parser.add_mutually_exclusive_group()
+    modes.add_argument("--record", metavar="CASSETTE", help="forward to the real APIs and record responses")
+    modes.add_argument("--replay", metavar="CASSETTE", help="answer from recorded responses")
+    parser.add_argument("--upstream", default=OPENAI_UPSTREAM, help="chat completions API to record from")
+    args = parser.parse_args()
+
+    mode = "record" if args.record else "replay" if args.replay else "fake"
+    fake = FakeLLM(args.latency, args.tail_rate, args.tail_latency, args.error_rate, args.reply, args.seed,
+                   args.token_delay, args.search_latency, mode, args.record or args.replay, args.upstream)
+    server = serve(fake, args.host, args.port)
+    print(f"Fake LLM ({mode}) listening on http://{args.host}:{server.server_port}/v1, "
+          f"search on http://{args.host}:{server.server_port}")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        print(f"\n{fake.stats()}")
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
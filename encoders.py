@@ -0,0 +1,142 @@
+import io
+import os
+from PIL import Image, features
+
+# Extensions a stored screenshot can have, depending on the encoder that wrote it
+IMAGE_EXTENSIONS = ('.png', '.webp', '.jpg', '.jpeg')
+
+
+class Encoder:
+    """Encodes an RGB image into the bytes stored on disk"""
+
+    name = "base"
+    extension = ".bin"
+
+    def encode(self, img):
+        buffer = io.BytesIO()
+        self.save(img, buffer)
+        return buffer.getvalue()
+
+    def save(self, img, fp):
+        raise NotImplementedError
+
+    @property
+    def spec(self):
+        return self.name
+
+
+class PngEncoder(Encoder):
+    """Lossless PNG. compress_level 1 is several times faster than 9 (or the old
+    optimize=True) for a modest size increase on screenshots."""
+
+    name = "png"
+    extension = ".png"
+
+    def __init__(self, compress_level=6):
+        self.compress_level = compress_level
+
+    def save(self, img, fp):
+        img.save(fp, 'PNG', compress_level=self.compress_level)
+
+    @property
+    def spec(self):
+        return f"png:{self.compress_level}"
+
+
+class WebpEncoder(Encoder):
+    """WebP, either lossless or lossy with a quality setting"""
+
+    name = "webp"
+    extension = ".webp"
+
+    def __init__(self, quality=80, lossless=False, method=4):
+        self.quality = quality
+        self.lossless = lossless
+        self.method = method
+
+    def save(self, img, fp):
+        img.save(fp, 'WEBP', quality=self.quality, lossless=self.lossless, method=self.method)
+
+    @property
+    def spec(self):
+        return "webp-lossless" if self.lossless else f"webp:{self.quality}"
+
+
+class JpegEncoder(Encoder):
+    """Lossy JPEG with a quality setting"""
+
+    name = "jpeg"
+    extension = ".jpg"
+
+    def __init__(self, quality=85):
+        self.quality = quality
+
+    def save(self, img, fp):
+        img.save(fp, 'JPEG', quality=self.quality)
+
+    @property
+    def spec(self):
+        return f"jpeg:{self.quality}"
+
+
+def get_encoder(spec):
+    """Build an encoder from a spec such as "png:1", "webp:80", "webp-lossless" or "jpeg:85".
+
+    WebP specs fall back to PNG when Pillow was built without WebP support.
+    """
+    name, _, arg = spec.strip().lower().partition(":")
+    if name == "png":
+        return PngEncoder(int(arg) if arg else 6)
+    if name in ("webp", "webp-lossless"):
+        if not features.check("webp"):
+            print("WebP support is not available, falling back to PNG")
+            return PngEncoder()
+        if name == "webp-lossless":
+            return WebpEncoder(lossless=True, quality=int(arg) if arg else 80)
+        return WebpEncoder(quality=int(arg) if arg else 80)
+    if name in ("jpeg", "jpg"):
+        return JpegEncoder(int(arg) if arg else 85)
+    raise ValueError(f"Unknown encoder: {spec}")
+
+
+def is_photographic(img, max_colors=4096):
+    """Rough content check: UI and text screenshots use few distinct colours,
+    photos and video frames use many. Runs on a small downsample."""
+    sample = img if max(img.size) <= 256 else img.resize((256, 256), Image.Resampling.NEAREST)
+    return sample.getcolors(max_colors) is None
+
+
+class EncoderPolicy:
+    """Chooses an encoder per image based on its content and size"""
+
+    def __init__(self, ui="png:6", photo="webp:85", large="png:1", large_pixels=4_000_000):
+        self.ui = get_encoder(ui)
+        self.photo = get_encoder(photo)
+        self.large = get_encoder(large)
+        self.large_pixels = large_pixels
+
+    def choose(self, img):
+        if is_photographic(img):
+            return self.photo
+        if img.size[0] * img.size[1] >= self.large_pixels:
+            return self.large
+        return self.ui
+
+
+class FixedPolicy:
+    """Always uses the same encoder"""
+
+    def __init__(self, spec):
+        self.encoder = get_encoder(spec)
+
+    def choose(self, img):
+        return self.encoder
+
+
+def get_encoder_policy(spec=None):
+    """Return the policy named by `spec` or the SCREENSHOT_ENCODER environment
+    variable: "auto" for content-based selection, or a single encoder spec."""
+    spec = spec or os.environ.get("SCREENSHOT_ENCODER", "auto")
+    if spec == "auto":
+        return EncoderPolicy()
+    return FixedPolicy(spec)
@@ -0,0 +1,205 @@
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import sys
+import threading
+import time
+
+ADDED = "added"
+MODIFIED = "modified"
+REMOVED = "removed"
+
+# inotify(7) flags
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_Q_OVERFLOW = 0x00004000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+
+_EVENT_HEADER = struct.Struct("iIII")
+
+
+def _merge(pending, kind, name):
+    """Fold a new event for name into the pending events for the same file"""
+    previous = pending.get(name)
+    if previous == ADDED and kind == MODIFIED:
+        return
+    if previous == ADDED and kind == REMOVED:
+        del pending[name]
+        return
+    if previous == REMOVED and kind == ADDED:
+        kind = MODIFIED
+    pending[name] = kind
+
+
+class InotifyBackend:
+    """Linux inotify through libc, no extra dependencies"""
+
+    def __init__(self, directory):
+        libc_name = ctypes.util.find_library("c")
+        self._libc = ctypes.CDLL(libc_name, use_errno=True)
+        self.fd = self._libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        mask = IN_CLOSE_WRITE | IN_MOVED_TO | IN_MOVED_FROM | IN_DELETE | IN_CREATE | IN_MODIFY
+        wd = self._libc.inotify_add_watch(self.fd, os.fsencode(directory), mask)
+        if wd < 0:
+            os.close(self.fd)
+            raise OSError(ctypes.get_errno(), f"inotify_add_watch failed for {directory}")
+        # Files that were created but have not been closed yet
+        self._writing = set()
+        self.overflowed = False
+
+    def poll(self, timeout):
+        """Wait up to timeout seconds and return a list of (kind, name) events"""
+        readable, _, _ = select.select([self.fd], [], [], timeout)
+        if not readable:
+            return []
+        try:
+            data = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return []
+        events = []
+        offset = 0
+        while offset + _EVENT_HEADER.size <= len(data):
+            _, mask, _, length = _EVENT_HEADER.unpack_from(data, offset)
+            offset += _EVENT_HEADER.size
+            name = data[offset:offset + length].split(b"\0", 1)[0].decode("utf-8", "surrogateescape")
+            offset += length
+            if mask & IN_Q_OVERFLOW:
+                self.overflowed = True
+            elif mask & IN_CREATE:
+                self._writing.add(name)
+            elif mask & IN_MODIFY:
+                continue
+            elif mask & IN_CLOSE_WRITE:
+                events.append((ADDED if name in self._writing else MODIFIED, name))
+                self._writing.discard(name)
+            elif mask & IN_MOVED_TO:
+                events.append((ADDED, name))
+            elif mask & (IN_DELETE | IN_MOVED_FROM):
+                self._writing.discard(name)
+                events.append((REMOVED, name))
+        return events
+
+    def close(self):
+        os.close(self.fd)
+
+
+class PollingBackend:
+    """Portable fallback: diff directory snapshots every interval"""
+
+    def __init__(self, directory, interval=1.0):
+        self.directory = directory
+        self.interval = interval
+        self.overflowed = False
+        self._snapshot = self._scan()
+
+    def _scan(self):
+        snapshot = {}
+        try:
+            entries = list(os.scandir(self.directory))
+        except OSError:
+            return snapshot
+        for entry in entries:
+            try:
+                if entry.is_file():
+                    st = entry.stat()
+                    snapshot[entry.name] = (st.st_mtime_ns, st.st_size)
+            except OSError:
+                continue
+        return snapshot
+
+    def poll(self, timeout):
+        time.sleep(self.interval)
+        current = self._scan()
+        events = []
+        for name, signature in current.items():
+            previous = self._snapshot.get(name)
+            if previous is None:
+                events.append((ADDED, name))
+            elif previous != signature:
+                events.append((MODIFIED, name))
+        for name in self._snapshot:
+            if name not in current:
+                events.append((REMOVED, name))
+        self._snapshot = current
+        return events
+
+    def close(self):
+        pass
+
+
+class DirectoryWatcher:
+    """
+        Watches a directory (non-recursively) and reports debounced changes.
+
+        Events for a file are coalesced until nothing has happened for `debounce`
+        seconds, then `callback` is called from the watcher thread with a list of
+        (kind, path) tuples, where kind is ADDED, MODIFIED or REMOVED. If the kernel
+        queue overflows, `on_overflow` is called so the caller can rescan.
+    """
+
+    def __init__(self, directory, callback, extensions=None, debounce=0.3, on_overflow=None, use_polling=False):
+        self.directory = directory
+        self.callback = callback
+        self.extensions = tuple(extensions) if extensions else None
+        self.debounce = debounce
+        self.on_overflow = on_overflow
+        self.backend = None if use_polling else self._make_inotify()
+        if self.backend is None:
+            self.backend = PollingBackend(directory)
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="fs-watcher", daemon=True)
+
+    def _make_inotify(self):
+        if not sys.platform.startswith("linux"):
+            return None
+        try:
+            return InotifyBackend(self.directory)
+        except (OSError, AttributeError) as e:
+            print(f"inotify unavailable, polling {self.directory} instead: {e}")
+            return None
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+    def _wanted(self, name):
+        return self.extensions is None or name.lower().endswith(self.extensions)
+
+    def _run(self):
+        pending = {}
+        last_event = 0.0
+        try:
+            while not self._stop.is_set():
+                timeout = self.debounce if pending else 0.5
+                for kind, name in self.backend.poll(timeout):
+                    if self._wanted(name):
+                        _merge(pending, kind, name)
+                        last_event = time.monotonic()
+
+                if self.backend.overflowed:
+                    self.backend.overflowed = False
+                    pending.clear()
+                    if self.on_overflow:
+                        self.on_overflow()
+
+                if pending and time.monotonic() - last_event >= self.debounce:
+                    events = [(kind, os.path.join(self.directory, name)) for name, kind in pending.items()]
+                    pending = {}
+                    try:
+                        self.callback(events)
+                    except Exception as e:
+                        print(f"Error handling file changes: {e}")
+        finally:
+            self.backend.close()
@@ -0,0 +1,209 @@
+import base64
+import hashlib
+import io
+import math
+import os
+import threading
+from collections import namedtuple
+from PIL import Image, ImageChops
+
+from encoders import get_encoder
+from prefetch import MemoryLRU
+from thumbnail_cache import fit_size
+
+# OpenAI-style vision sizing: "high" detail fits the image in 2048x2048, scales
+# the short side down to 768 and bills 170 tokens per 512px tile plus 85;
+# "low" detail is a single 512x512 view for 85 tokens.
+HIGH_DETAIL_MAX = (2048, 2048)
+HIGH_DETAIL_SHORT_SIDE = 768
+LOW_DETAIL_MAX = (512, 512)
+TILE = 512
+BASE_TOKENS = 85
+TILE_TOKENS = 170
+
+# Taller images (scrolling captures) are split so text stays readable after scaling
+MAX_ASPECT = 2.0
+
+# "auto" encodes as both and keeps the smaller: PNG wins on flat UI and text, JPEG on photos
+DEFAULT_FORMAT = "auto"
+AUTO_FORMATS = ("jpeg:80", "png:6")
+
+MIME_TYPES = {".jpg": "image/jpeg", ".webp": "image/webp", ".png": "image/png"}
+
+# One image part of a vision request: a data URL plus what it costs
+ImagePayload = namedtuple("ImagePayload", "data_url size bytes tokens")
+
+
+def vision_size(size, detail="high"):
+    """Pixel size the vision model actually looks at for an image of `size`"""
+    if detail == "low":
+        return fit_size(size, LOW_DETAIL_MAX)
+    width, height = fit_size(size, HIGH_DETAIL_MAX)
+    short_side = min(width, height)
+    if short_side > HIGH_DETAIL_SHORT_SIDE:
+        ratio = HIGH_DETAIL_SHORT_SIDE / short_side
+        width, height = max(1, int(width * ratio)), max(1, int(height * ratio))
+    return width, height
+
+
+def estimate_tokens(size, detail="high"):
+    if detail == "low":
+        return BASE_TOKENS
+    width, height = vision_size(size, detail)
+    return BASE_TOKENS + TILE_TOKENS * math.ceil(width / TILE) * math.ceil(height / TILE)
+
+
+def trim_borders(img, tolerance=8):
+    """Crop away uniform margins (desktop background, letterboxing) around the content"""
+    background = Image.new(img.mode, img.size, img.getpixel((0, 0)))
+    diff = ImageChops.difference(img, background).convert('L')
+    bbox = diff.point(lambda value: 255 if value > tolerance else 0).getbbox()
+    if bbox is None:
+        return img
+    return img.crop(bbox)
+
+
+def split_tall(img, max_aspect=MAX_ASPECT):
+    """Split an image taller than max_aspect into stacked tiles (wide images are left whole)"""
+    width, height = img.size
+    tile_height = int(width * max_aspect)
+    if height <= tile_height:
+        return [img]
+    count = math.ceil(height / tile_height)
+    step = math.ceil(height / count)
+    return [img.crop((0, top, width, min(height, top + step))) for top in range(0, height, step)]
+
+
+def to_data_url(data, extension):
+    return f"data:{MIME_TYPES[extension]};base64,{base64.b64encode(data).decode('ascii')}"
+
+
+def build_payloads(img, detail="high", roi=None, trim=True, fmt=DEFAULT_FORMAT):
+    """Image parts for a vision request: cropped to roi (a box) or trimmed, split if tall,
+    scaled to the size the model uses and encoded compactly."""
+    if img.mode != 'RGB':
+        img = img.convert('RGB')
+    if roi is not None:
+        img = img.crop(roi)
+    elif trim:
+        img = trim_borders(img)
+    encoders = [get_encoder(spec) for spec in (AUTO_FORMATS if fmt == "auto" else (fmt,))]
+    payloads = []
+    for part in split_tall(img) if detail == "high" else [img]:
+        size = vision_size(part.size, detail)
+        if size != part.size:
+            part = part.resize(size, Image.Resampling.LANCZOS, reducing_gap=2.0)
+        data, extension = min(((encoder.encode(part), encoder.extension) for encoder in encoders),
+                              key=lambda encoded: len(encoded[0]))
+        payloads.append(ImagePayload(to_data_url(data, extension), size, len(data), estimate_tokens(size, detail)))
+    return payloads
+
+
+class PayloadCache:
+    """
+        Encoded image payloads keyed by the source file's content hash.
+
+        A screenshot sent to several agents, or reprocessed later, is downscaled
+        and encoded once. Recent payloads are kept in memory and all of them on
+        disk under cache_dir, which is trimmed to max_bytes oldest first.
+    """
+
+    def __init__(self, cache_dir, max_bytes=32 * 1024 * 1024, memory_bytes=16 * 1024 * 1024):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.memory = MemoryLRU(memory_bytes)
+        self._lock = threading.Lock()
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def _key(self, data, detail, roi, fmt):
+        digest = hashlib.sha256(data).hexdigest()
+        options = f"{detail}|{roi}|{fmt}"
+        return f"{digest[:32]}_{hashlib.sha1(options.encode()).hexdigest()[:8]}"
+
+    def get_payloads(self, path, detail="high", roi=None, fmt=DEFAULT_FORMAT):
+        with open(path, "rb") as f:
+            data = f.read()
+        key = self._key(data, detail, roi, fmt)
+        payloads = self.memory.get(key)
+        if payloads is not None:
+            return payloads
+
+        entry = os.path.join(self.cache_dir, key + ".txt")
+        try:
+            with open(entry, "r") as f:
+                payloads = [ImagePayload(url, tuple(map(int, size.split("x"))), int(nbytes), int(tokens))
+                            for url, size, nbytes, tokens in (line.split() for line in f)]
+            os.utime(entry)
+        except (OSError, ValueError):
+            with Image.open(io.BytesIO(data)) as img:
+                payloads = build_payloads(img, detail, roi, fmt=fmt)
+            self._write(entry, payloads)
+        self.memory.put(key, payloads, sum(len(p.data_url) for p in payloads))
+        return payloads
+
+    def _write(self, entry, payloads):
+        tmp = f"{entry}.{threading.get_ident()}.tmp"
+        with open(tmp, "w") as f:
+            for p in payloads:
+                f.write(f"{p.data_url} {p.size[0]}x{p.size[1]} {p.bytes} {p.tokens}\n")
+        os.replace(tmp, entry)
+        with self._lock:
+            self._trim()
+
+    def _trim(self):
+        entries = []
+        for item in os.scandir(self.cache_dir):
+            try:
+                st = item.stat()
+            except OSError:
+                continue
+            entries.append((st.st_mtime, st.st_size, item.path))
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes * 0.9:
+                break
+            try:
+                os.remove(path)
+                total -= size
+            except OSError:
+                pass
+
+
+_default_cache = None
+
+
+def get_payload_cache():
+    global _default_cache
+    if _default_cache is None:
+        _default_cache = PayloadCache(os.path.join("screenshots_notes", ".payloads"))
+    return _default_cache
+
+
+def image_parts(path_or_url, detail="high", roi=None):
+    """OpenAI message content parts for an image: a local file becomes compact data URLs,
+    anything else (http or data URLs) is passed through."""
+    if not os.path.isfile(path_or_url):
+        return [{"type": "image_url", "image_url": {"url": path_or_url, "detail": detail}}]
+    return [
+        {"type": "image_url", "image_url": {"url": payload.data_url, "detail": detail}}
+        for payload in get_payload_cache().get_payloads(path_or_url, detail, roi)
+    ]
+
+
+def expand_image_paths(messages, detail="high"):
+    """Copy of chat messages with local file paths in image_url parts replaced by compact data URLs"""
+    expanded = []
+    for message in messages:
+        content = message.get("content") if isinstance(message, dict) else None
+        if not isinstance(content, list):
+            expanded.append(message)
+            continue
+        parts = []
+        for part in content:
+            url = part.get("image_url", {}).get("url") if part.get("type") == "image_url" else None
+            if url and not url.startswith(("data:", "http://", "https://")) and os.path.isfile(url):
+                parts.extend(image_parts(url, part["image_url"].get("detail", detail)))
+            else:
+                parts.append(part)
+        expanded.append(dict(message, content=parts))
+    return expanded
@@ -0,0 +1,123 @@
+import json
+import os
+import threading
+import time
+import uuid
+
+PENDING = "pending"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+STATES = (PENDING, RUNNING, DONE, FAILED)
+
+# Run PostScreenshotCrew on a screenshot: payload is {"screenshot": path, "note": text},
+# where path may still lack its extension while the capture is being encoded
+POST_SCREENSHOT = "post_screenshot"
+
+
+class JobQueue:
+    """
+        Durable job queue made of JSON files in per-state directories.
+
+        enqueue() atomically writes a file into pending/, and claim() moves the
+        oldest due job into running/ with a rename, so producers never block on
+        a consumer and a job is never handed out twice. Jobs left in running/ by
+        a consumer that died are put back by recover(), which assumes a single
+        consumer process (crew_worker.py holds a pid file for that).
+    """
+
+    def __init__(self, jobs_dir):
+        self.jobs_dir = jobs_dir
+        for state in STATES:
+            os.makedirs(os.path.join(jobs_dir, state), exist_ok=True)
+
+    def _path(self, state, name):
+        return os.path.join(self.jobs_dir, state, name)
+
+    def _write(self, path, job):
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(job, f)
+        os.replace(tmp_path, path)
+
+    def enqueue(self, kind, payload, delay=0):
+        """Add a job and return its ID; it becomes due after `delay` seconds"""
+        job_id = f"{time.time_ns()}-{uuid.uuid4().hex[:8]}"
+        job = {"id": job_id, "kind": kind, "payload": payload, "attempts": 0,
+               "created_at": time.time(), "not_before": time.time() + delay}
+        self._write(self._path(PENDING, job_id + ".json"), job)
+        return job_id
+
+    def claim(self):
+        """Move the oldest due pending job to running and return it, or None"""
+        now = time.time()
+        for name in sorted(os.listdir(os.path.join(self.jobs_dir, PENDING))):
+            if not name.endswith(".json"):
+                continue
+            path = self._path(PENDING, name)
+            try:
+                with open(path, "r") as f:
+                    job = json.load(f)
+            except (OSError, ValueError):
+                continue
+            if job.get("not_before", 0) > now:
+                continue
+            try:
+                os.rename(path, self._path(RUNNING, name))
+            except OSError:
+                # Claimed by another worker
+                continue
+            job["attempts"] += 1
+            return job
+
+    def next_due(self):
+        """Seconds until the next pending job is due (0 if one is due now), or None if there are none"""
+        soonest = None
+        for name in os.listdir(os.path.join(self.jobs_dir, PENDING)):
+            if not name.endswith(".json"):
+                continue
+            try:
+                with open(self._path(PENDING, name), "r") as f:
+                    not_before = json.load(f).get("not_before", 0)
+            except (OSError, ValueError):
+                continue
+            soonest = not_before if soonest is None else min(soonest, not_before)
+        return None if soonest is None else max(0.0, soonest - time.time())
+
+    def _finish(self, job, state, **fields):
+        job.update(fields, finished_at=time.time())
+        name = job["id"] + ".json"
+        self._write(self._path(state, name), job)
+        try:
+            os.remove(self._path(RUNNING, name))
+        except FileNotFoundError:
+            pass
+
+    def complete(self, job, result=None):
+        self._finish(job, DONE, result=result)
+
+    def fail(self, job, error):
+        self._finish(job, FAILED, error=str(error))
+
+    def retry(self, job, delay, error=None):
+        """Put a running job back in the queue, due again after delay seconds"""
+        job.update(not_before=time.time() + delay, error=str(error) if error else None)
+        name = job["id"] + ".json"
+        self._write(self._path(PENDING, name), job)
+        try:
+            os.remove(self._path(RUNNING, name))
+        except FileNotFoundError:
+            pass
+
+    def recover(self):
+        """Requeue jobs a dead worker left running; returns how many"""
+        names = [name for name in os.listdir(os.path.join(self.jobs_dir, RUNNING)) if name.endswith(".json")]
+        for name in names:
+            os.replace(self._path(RUNNING, name), self._path(PENDING, name))
+        return len(names)
+
+    def counts(self):
+        return {
+            state: sum(1 for name in os.listdir(os.path.join(self.jobs_dir, state)) if name.endswith(".json"))
+            for state in STATES
+        }
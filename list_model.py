@@ -0,0 +1,157 @@
+from collections import OrderedDict, namedtuple
+
+# Compact per-screenshot record held by list models: only what the list needs to
+# render a row and locate the files; everything else is read on selection.
+Record = namedtuple("Record", "id path captured_at")
+
+
+class PagedListModel:
+    """
+        Lazily paged, read-only sequence of Records.
+
+        `fetch_page(offset, limit)` is called the first time an index in a page is
+        read, and at most max_pages pages are kept, so memory stays flat no matter
+        how large the underlying store is.
+    """
+
+    def __init__(self, fetch_page, count, page_size=200, max_pages=16):
+        self.fetch_page = fetch_page
+        self.count = count
+        self.page_size = page_size
+        self.max_pages = max_pages
+        self._pages = OrderedDict()
+
+    def __len__(self):
+        return self.count
+
+    def _page(self, number):
+        page = self._pages.get(number)
+        if page is None:
+            page = self.fetch_page(number * self.page_size, self.page_size)
+            self._pages[number] = page
+            if len(self._pages) > self.max_pages:
+                self._pages.popitem(last=False)
+        else:
+            self._pages.move_to_end(number)
+        return page
+
+    def __getitem__(self, index):
+        if index < 0:
+            index += self.count
+        if not 0 <= index < self.count:
+            raise IndexError(index)
+        page = self._page(index // self.page_size)
+        offset = index % self.page_size
+        if offset >= len(page):
+            # The store shrank since the count was taken
+            raise IndexError(index)
+        return page[offset]
+
+    def window(self, start, stop):
+        """Records in [start, stop), clamped to the model's bounds"""
+        start = max(0, start)
+        stop = min(self.count, stop)
+        records = []
+        for index in range(start, stop):
+            try:
+                records.append(self[index])
+            except IndexError:
+                break
+        return records
+
+    def invalidate(self):
+        """Drop cached pages so they are fetched again on next access"""
+        self._pages.clear()
+
+
+
+class ListWindow:
+    """
+        Scroll window and selection over a list model, without any widgets.
+
+        The items come from a sequence-like model (len() and window(start, stop));
+        `rows` of them starting at `top` are on screen, and the selection is an
+        absolute index into the model. Every change redraws through render(),
+        which VirtualListbox implements with a Tk listbox (and the library
+        benchmark with plain strings).
+    """
+
+    def __init__(self, rows=20, on_select=None, format_row=str):
+        self.on_select = on_select
+        self.format_row = format_row
+        self.model = []
+        self.top = 0
+        self.rows = rows
+        self.selected = None
+
+    def render(self):
+        """Redraw the visible window of rows"""
+
+    def visible_rows(self):
+        """Formatted rows in the window"""
+        rows = self.model.window(self.top, self.top + self.rows) if len(self.model) else []
+        return [self.format_row(row) for row in rows]
+
+    def set_model(self, model, keep_position=False):
+        """Show a new model, optionally keeping the scroll position and selection"""
+        self.model = model
+        if not keep_position:
+            self.top = 0
+            self.selected = None
+        elif self.selected is not None and self.selected >= len(model):
+            self.selected = len(model) - 1 if len(model) else None
+        self._clamp_top()
+        self.render()
+
+    def selected_item(self):
+        if self.selected is None or self.selected >= len(self.model):
+            return None
+        return self.model[self.selected]
+
+    def select(self, index):
+        """Select an absolute index, scroll it into view and notify on_select"""
+        if not len(self.model):
+            self.selected = None
+            self.render()
+            return
+        index = max(0, min(index, len(self.model) - 1))
+        self.selected = index
+        if index < self.top:
+            self.top = index
+        elif index >= self.top + self.rows:
+            self.top = index - self.rows + 1
+        self.render()
+        if self.on_select:
+            self.on_select(index)
+
+    def move(self, delta):
+        """Move the selection by delta rows (from the top row if nothing is selected)"""
+        self.select((self.selected if self.selected is not None else self.top) + delta)
+
+    def scroll_by(self, rows):
+        self.top += rows
+        self._clamp_top()
+        self.render()
+
+    def scroll_to(self, fraction):
+        """Scroll so the window starts `fraction` of the way through the model"""
+        self.top = int(fraction * len(self.model))
+        self._clamp_top()
+        self.render()
+
+    def resize(self, rows):
+        """Show `rows` rows at a time"""
+        if rows != self.rows:
+            self.rows = rows
+            self._clamp_top()
+            self.render()
+
+    def scroll_fraction(self):
+        """(first, last) fractions of the model in the window, as a scrollbar shows them"""
+        count = len(self.model)
+        if not count:
+            return 0.0, 1.0
+        return self.top / count, min(1.0, (self.top + self.rows) / count)
+
+    def _clamp_top(self):
+        self.top = max(0, min(self.top, len(self.model) - self.rows))
@@ -0,0 +1,324 @@
+import bisect
+import os
+import random
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+DEFAULT_DEADLINE = 60.0
+DEFAULT_ATTEMPTS = 3
+HEDGE_MIN_SAMPLES = 20
+
+# Exception class names (openai and litellm) for errors worth retrying
+RETRYABLE_ERROR_NAMES = {
+    "APITimeoutError", "APIConnectionError", "Timeout", "RateLimitError",
+    "InternalServerError", "ServiceUnavailableError",
+}
+
+# Histogram bucket upper bounds in seconds: 10ms to about 5 minutes, 25% apart
+BUCKET_BOUNDS = [0.01 * 1.25 ** i for i in range(47)]
+
+
+class DeadlineExceeded(TimeoutError):
+    pass
+
+
+class CircuitOpenError(RuntimeError):
+    pass
+
+
+def is_retryable(error):
+    """Timeouts, connection errors, rate limits and server errors; not bad requests"""
+    status = getattr(error, "status_code", None)
+    if isinstance(status, int):
+        return status in (408, 409, 429) or status >= 500
+    return isinstance(error, (TimeoutError, ConnectionError)) or type(error).__name__ in RETRYABLE_ERROR_NAMES
+
+
+class LatencyHistogram:
+    """Log-bucketed latencies; percentiles are reported as their bucket's upper bound"""
+
+    def __init__(self):
+        self.buckets = [0] * (len(BUCKET_BOUNDS) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def record(self, seconds):
+        self.buckets[bisect.bisect_left(BUCKET_BOUNDS, seconds)] += 1
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+
+    def percentile(self, p):
+        if not self.count:
+            return None
+        rank = p / 100 * self.count
+        seen = 0
+        for i, n in enumerate(self.buckets):
+            seen += n
+            if seen >= rank and n:
+                return min(BUCKET_BOUNDS[i], self.max) if i < len(BUCKET_BOUNDS) else self.max
+        return self.max
+
+    def summary(self):
+        if not self.count:
+            return {"count": 0}
+        return {
+            "count": self.count,
+            "mean_s": round(self.total / self.count, 3),
+            "p50_s": round(self.percentile(50), 3),
+            "p95_s": round(self.percentile(95), 3),
+            "p99_s": round(self.percentile(99), 3),
+            "max_s": round(self.max, 3),
+        }
+
+
+class RetryPolicy:
+    """Exponential backoff with full jitter: attempt n waits uniformly up to base * 2**(n-1), capped"""
+
+    def __init__(self, attempts=DEFAULT_ATTEMPTS, base_delay=0.5, max_delay=8.0):
+        self.attempts = attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+    def delay(self, attempt):
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** (attempt - 1)))
+
+
+class RateLimiter:
+    """Token bucket shared by threads: `rate` requests per second on average, bursts up to `capacity`"""
+
+    def __init__(self, rate, capacity=1):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Take a token, sleeping until one is free; returns the seconds waited"""
+        started = time.monotonic()
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return now - started
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+class CircuitBreaker:
+    """
+        Fails calls fast while an upstream keeps failing.
+
+        After `failure_threshold` consecutive retryable failures the circuit
+        opens and calls are rejected for `reset_after` seconds. Then a single
+        probe call is let through; its success closes the circuit, its failure
+        opens it again.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold=5, reset_after=30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_after = reset_after
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self._lock = threading.Lock()
+
+    def allow(self):
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.OPEN and time.monotonic() - self.opened_at >= self.reset_after:
+                self.state = self.HALF_OPEN
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.state = self.CLOSED
+            self.failures = 0
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+                self.state = self.OPEN
+                self.opened_at = time.monotonic()
+
+
+class ResilientCaller:
+    """
+        Runs model calls with a deadline, retries, hedging and a circuit breaker.
+
+        call() gives `fn` the seconds left before the deadline (to pass on as
+        its request timeout) and runs it on a worker thread, so a stuck
+        request is abandoned when the deadline passes. Retryable errors are
+        retried with jittered backoff while time remains. With
+        `hedge_percentile` set, an attempt still running after that percentile
+        of the task's recorded latency gets a duplicate request, and whichever
+        finishes first wins. Each `key` (usually the model) has its own
+        circuit breaker and each task its own latency histogram. With a
+        `rate_limiter`, every request sent (first tries, retries and hedges
+        alike) takes a token first, so it bounds requests to the provider.
+    """
+
+    def __init__(self, deadline=DEFAULT_DEADLINE, retry=None, hedge_percentile=None, breaker_factory=CircuitBreaker,
+                 workers=32, rate_limiter=None):
+        self.deadline = deadline
+        self.retry = retry or RetryPolicy()
+        self.hedge_percentile = hedge_percentile
+        self.rate_limiter = rate_limiter
+        self._breaker_factory = breaker_factory
+        self._breakers = {}
+        self._histograms = {}
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="llm-call")
+        self._counts = {"calls": 0, "requests": 0, "retries": 0, "hedges": 0, "hedge_wins": 0,
+                        "deadline_exceeded": 0, "rejected": 0, "failures": 0, "rate_limited_s": 0.0}
+
+    def _add(self, name, amount=1):
+        with self._lock:
+            self._counts[name] += amount
+
+    def limit_rate(self, requests_per_minute, burst=1):
+        """Send at most requests_per_minute requests (after a burst of up to `burst`); 0 or None for no limit"""
+        self.rate_limiter = RateLimiter(requests_per_minute / 60, capacity=burst) if requests_per_minute else None
+
+    def breaker(self, key):
+        with self._lock:
+            if key not in self._breakers:
+                self._breakers[key] = self._breaker_factory()
+            return self._breakers[key]
+
+    def histogram(self, task):
+        with self._lock:
+            if task not in self._histograms:
+                self._histograms[task] = LatencyHistogram()
+            return self._histograms[task]
+
+    def _hedge_after(self, histogram):
+        if self.hedge_percentile is None:
+            return None
+        with self._lock:
+            if histogram.count < HEDGE_MIN_SAMPLES:
+                return None
+            return histogram.percentile(self.hedge_percentile)
+
+    def _request(self, fn, end):
+        """Runs on a worker: wait for the rate limiter, then call fn with the time left"""
+        if self.rate_limiter is not None:
+            self._add("rate_limited_s", self.rate_limiter.acquire())
+        remaining = end - time.monotonic()
+        if remaining <= 0:
+            raise DeadlineExceeded(f"no response within {self.deadline:.1f}s")
+        self._add("requests")
+        return fn(remaining)
+
+    def _attempt(self, fn, end, hedge_after):
+        """Run fn (and maybe a hedge) until one succeeds, all fail or `end` passes"""
+        started = time.monotonic()
+        futures = [self._executor.submit(self._request, fn, end)]
+        primary = futures[0]
+        error = None
+        while futures:
+            now = time.monotonic()
+            if now >= end:
+                raise DeadlineExceeded(f"no response within {self.deadline:.1f}s")
+            timeout = end - now
+            if hedge_after is not None:
+                timeout = min(timeout, max(0.0, started + hedge_after - now))
+            done, _ = wait(futures, timeout=timeout, return_when=FIRST_COMPLETED)
+            for future in done:
+                futures.remove(future)
+                if future.exception() is None:
+                    if future is not primary:
+                        self._add("hedge_wins")
+                    return future.result()
+                error = error or future.exception()
+            if not futures and error is not None:
+                raise error
+            if hedge_after is not None and time.monotonic() >= started + hedge_after:
+                # Only one duplicate per attempt
+                hedge_after = None
+                self._add("hedges")
+                futures.append(self._executor.submit(self._request, fn, end))
+        raise error
+
+    def call(self, fn, task="default", key="default", idempotent=True, hedge=True):
+        """Return fn(timeout)'s result.
+
+        Non-idempotent calls are neither retried nor hedged; calls that stream
+        partial output somewhere should pass hedge=False.
+        """
+        self._add("calls")
+        breaker = self.breaker(key)
+        histogram = self.histogram(task)
+        end = time.monotonic() + self.deadline
+        attempts = self.retry.attempts if idempotent else 1
+        attempt = 0
+        while True:
+            attempt += 1
+            if not breaker.allow():
+                self._add("rejected")
+                raise CircuitOpenError(f"circuit open for {key}, failing fast")
+            started = time.monotonic()
+            try:
+                result = self._attempt(fn, end, self._hedge_after(histogram) if idempotent and hedge else None)
+            except Exception as e:
+                if isinstance(e, DeadlineExceeded):
+                    self._add("deadline_exceeded")
+                if not is_retryable(e):
+                    # The upstream answered; a bad request says nothing about its health
+                    breaker.record_success()
+                    raise
+                breaker.record_failure()
+                delay = self.retry.delay(attempt)
+                if attempt >= attempts or time.monotonic() + delay >= end:
+                    self._add("failures")
+                    raise
+                self._add("retries")
+                time.sleep(delay)
+                continue
+            breaker.record_success()
+            with self._lock:
+                histogram.record(time.monotonic() - started)
+            return result
+
+    def stats(self):
+        with self._lock:
+            return dict(
+                self._counts,
+                rate_limited_s=round(self._counts["rate_limited_s"], 2),
+                breakers={key: breaker.state for key, breaker in self._breakers.items()},
+                latency={task: histogram.summary() for task, histogram in self._histograms.items()},
+            )
+
+
+_default_caller = None
+_default_lock = threading.Lock()
+
+
+def get_resilient_caller():
+    """Shared caller configured by SCREENSHOT_LLM_DEADLINE, SCREENSHOT_LLM_ATTEMPTS, SCREENSHOT_LLM_HEDGE
+    (a latency percentile such as 95; unset disables hedging) and SCREENSHOT_LLM_RPM (requests per
+    minute; unset for no limit)"""
+    global _default_caller
+    with _default_lock:
+        if _default_caller is None:
+            hedge = os.environ.get("SCREENSHOT_LLM_HEDGE")
+            _default_caller = ResilientCaller(
+                deadline=float(os.environ.get("SCREENSHOT_LLM_DEADLINE", DEFAULT_DEADLINE)),
+                retry=RetryPolicy(attempts=int(os.environ.get("SCREENSHOT_LLM_ATTEMPTS", DEFAULT_ATTEMPTS))),
+                hedge_percentile=float(hedge) if hedge else None,
+            )
+            _default_caller.limit_rate(float(os.environ.get("SCREENSHOT_LLM_RPM", 0)))
+    return _default_caller
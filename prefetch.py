@@ -0,0 +1,130 @@
+import itertools
+import queue
+import threading
+import tkinter as tk
+from collections import OrderedDict
+
+
+class MemoryLRU:
+    """Thread-safe LRU mapping bounded by the total cost of its values in bytes"""
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.total_bytes = 0
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            item = self._items.get(key)
+            if item is None:
+                return None
+            self._items.move_to_end(key)
+            return item[0]
+
+    def __contains__(self, key):
+        with self._lock:
+            return key in self._items
+
+    def put(self, key, value, nbytes):
+        with self._lock:
+            old = self._items.pop(key, None)
+            if old is not None:
+                self.total_bytes -= old[1]
+            if nbytes > self.max_bytes:
+                return
+            self._items[key] = (value, nbytes)
+            self.total_bytes += nbytes
+            while self.total_bytes > self.max_bytes:
+                _, (_, evicted_bytes) = self._items.popitem(last=False)
+                self.total_bytes -= evicted_bytes
+
+    def discard(self, key):
+        with self._lock:
+            old = self._items.pop(key, None)
+            if old is not None:
+                self.total_bytes -= old[1]
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+            self.total_bytes = 0
+
+
+class Prefetcher:
+    """
+        Loads values off the Tk thread and hands them back via `after()`.
+
+        `loader(key)` runs on a worker thread and returns (value, nbytes); results
+        are kept in a MemoryLRU of max_mb megabytes. `request()` serves the current
+        selection first, `prefetch()` queues neighbouring keys at a lower priority,
+        and anything queued for an older selection is dropped.
+    """
+
+    def __init__(self, root, loader, max_mb=64):
+        self.root = root
+        self.loader = loader
+        self.cache = MemoryLRU(int(max_mb * 1024 * 1024))
+        self._queue = queue.PriorityQueue()
+        self._seq = itertools.count()
+        self._generation = 0
+        self._pending = set()
+        self._lock = threading.Lock()
+        self._worker = threading.Thread(target=self._run, name="prefetch", daemon=True)
+        self._worker.start()
+
+    def request(self, key, callback):
+        """Call callback(key, value) on the Tk thread, immediately if cached"""
+        value = self.cache.get(key)
+        if value is not None:
+            callback(key, value)
+            return
+        with self._lock:
+            self._generation += 1
+            self._queue.put((0, next(self._seq), self._generation, key, callback))
+
+    def prefetch(self, keys):
+        """Warm the cache for keys likely to be requested next"""
+        with self._lock:
+            generation = self._generation
+            for key in keys:
+                if key in self._pending or key in self.cache:
+                    continue
+                self._pending.add(key)
+                self._queue.put((1, next(self._seq), generation, key, None))
+
+    def invalidate(self, key):
+        self.cache.discard(key)
+
+    def clear(self):
+        self.cache.clear()
+
+    def _run(self):
+        while True:
+            priority, _, generation, key, callback = self._queue.get()
+            with self._lock:
+                if callback is None:
+                    self._pending.discard(key)
+                # The selection has moved on since this was queued
+                stale = generation < self._generation
+            if stale or (callback is None and key in self.cache):
+                continue
+
+            value = self.cache.get(key)
+            if value is None:
+                try:
+                    value, nbytes = self.loader(key)
+                    self.cache.put(key, value, nbytes)
+                except Exception as e:
+                    print(f"Error loading preview: {e}")
+                    value = None
+
+            if callback is not None:
+                self._deliver(callback, key, value)
+
+    def _deliver(self, callback, key, value):
+        try:
+            self.root.after(0, callback, key, value)
+        except (RuntimeError, tk.TclError):
+            # Tk has been torn down (viewer closed)
+            pass
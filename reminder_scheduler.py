@@ -0,0 +1,240 @@
+import atexit
+import heapq
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+
+from tools.reminder_backends import get_reminder_backend
+
+PENDING = "pending"
+SENDING = "sending"
+DELIVERED = "delivered"
+FAILED = "failed"
+
+# Reminders that become deliverable within this many seconds of each other go out as one batch
+BATCH_WINDOW = 0.25
+MAX_BATCH = 50
+MAX_ATTEMPTS = 3
+RETRY_DELAY = 30.0
+# A claim older than this is taken to belong to a scheduler that died mid-delivery
+CLAIM_TIMEOUT = 300.0
+# How often pending rows are re-read, to pick up reminders added by other processes
+RELOAD_INTERVAL = 5.0
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS reminders (
+    id INTEGER PRIMARY KEY,
+    note TEXT NOT NULL,
+    due_at REAL NOT NULL,
+    deliver_at REAL NOT NULL,
+    status TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    error TEXT,
+    created_at REAL,
+    delivered_at REAL,
+    claimed_by TEXT,
+    claimed_at REAL
+);
+CREATE INDEX IF NOT EXISTS reminders_status ON reminders (status, deliver_at);
+"""
+
+
+class ReminderScheduler:
+    """
+        Persistent reminder queue delivered in batches by a single timer thread.
+
+        add() only writes a row to SQLite and pushes it onto an in-memory heap
+        ordered by delivery time, so any number of crew runs can add reminders
+        at once without waiting on the OS. The timer thread sleeps until the
+        earliest reminder is deliverable, collects everything deliverable
+        within BATCH_WINDOW and hands it to the backend in one call. Rows are
+        claimed with a conditional UPDATE before delivery, so two processes
+        sharing the database never deliver a reminder twice; a claim is only
+        taken over once it is older than `claim_timeout`, as its scheduler
+        must have died mid-delivery. Pending rows are re-read every
+        RELOAD_INTERVAL, so reminders added by other processes (or left
+        pending by one that exited) are delivered too.
+    """
+
+    def __init__(self, db_path, backend=None, batch_window=BATCH_WINDOW, claim_timeout=CLAIM_TIMEOUT):
+        self.backend = backend or get_reminder_backend()
+        self.batch_window = batch_window
+        self.claim_timeout = claim_timeout
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._lock = threading.Lock()
+        self._wake = threading.Condition(self._lock)
+        self._heap = []
+        self._stopped = False
+        self._thread = None
+        self._loaded_at = 0.0
+        self._counts = {"added": 0, "delivered": 0, "failed": 0, "batches": 0, "reclaimed": 0}
+        self._conn = sqlite3.connect(db_path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA busy_timeout=5000")
+        self._conn.executescript(SCHEMA)
+        self._migrate()
+        with self._lock:
+            self._reload()
+
+    def _migrate(self):
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(reminders)")}
+        if "claimed_by" not in columns:
+            self._conn.execute("ALTER TABLE reminders ADD COLUMN claimed_by TEXT")
+        if "claimed_at" not in columns:
+            self._conn.execute("ALTER TABLE reminders ADD COLUMN claimed_at REAL")
+
+    def _reload(self):
+        """Release stale claims and rebuild the heap from the pending rows (lock held)"""
+        now = time.time()
+        # A scheduler that died mid-delivery leaves rows claimed; deliver them again
+        self._counts["reclaimed"] += self._conn.execute(
+            "UPDATE reminders SET status = ?, claimed_by = NULL "
+            "WHERE status = ? AND (claimed_at IS NULL OR claimed_at < ?)",
+            (PENDING, SENDING, now - self.claim_timeout),
+        ).rowcount
+        self._heap = [
+            (deliver_at, reminder_id)
+            for reminder_id, deliver_at in self._conn.execute(
+                "SELECT id, deliver_at FROM reminders WHERE status = ?", (PENDING,)
+            )
+        ]
+        heapq.heapify(self._heap)
+        self._loaded_at = time.monotonic()
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="reminder-scheduler", daemon=True)
+        self._thread.start()
+        return self
+
+    def add(self, note, due_at):
+        """Persist a reminder due at `due_at` (epoch seconds) and return its ID"""
+        now = time.time()
+        deliver_at = now if self.backend.schedules_ahead else due_at
+        with self._lock:
+            cursor = self._conn.execute(
+                "INSERT INTO reminders (note, due_at, deliver_at, status, created_at) VALUES (?, ?, ?, ?, ?)",
+                (note, due_at, deliver_at, PENDING, now),
+            )
+            heapq.heappush(self._heap, (deliver_at, cursor.lastrowid))
+            self._counts["added"] += 1
+            self._wake.notify()
+        return cursor.lastrowid
+
+    def _next_batch(self):
+        """Wait for deliverable reminders and claim a batch of them; None once stopped"""
+        with self._lock:
+            while True:
+                if self._stopped:
+                    return None
+                if time.monotonic() - self._loaded_at >= RELOAD_INTERVAL:
+                    self._reload()
+                now = time.time()
+                if self._heap and self._heap[0][0] <= now:
+                    break
+                wait = RELOAD_INTERVAL
+                if self._heap:
+                    wait = min(wait, self._heap[0][0] - now)
+                self._wake.wait(wait)
+            # Let reminders added right after this one join the batch
+            self._wake.wait(self.batch_window)
+            cutoff = time.time() + self.batch_window
+            ids = []
+            while self._heap and self._heap[0][0] <= cutoff and len(ids) < MAX_BATCH:
+                ids.append(heapq.heappop(self._heap)[1])
+            batch = []
+            now = time.time()
+            for reminder_id in ids:
+                claimed = self._conn.execute(
+                    "UPDATE reminders SET status = ?, attempts = attempts + 1, claimed_by = ?, claimed_at = ? "
+                    "WHERE id = ? AND status = ?",
+                    (SENDING, self.owner, now, reminder_id, PENDING),
+                ).rowcount
+                if claimed:
+                    batch.append(self._conn.execute(
+                        "SELECT id, note, due_at, attempts FROM reminders WHERE id = ?", (reminder_id,)
+                    ).fetchone())
+            return batch
+
+    def _run(self):
+        while True:
+            batch = self._next_batch()
+            if batch is None:
+                return
+            if batch:
+                self._deliver(batch)
+
+    def _deliver(self, batch):
+        try:
+            self.backend.deliver([(note, due_at) for _, note, due_at, _ in batch])
+        except Exception as e:
+            print(f"Error delivering {len(batch)} reminders: {e}")
+            self._retry(batch, e)
+            return
+        now = time.time()
+        with self._lock:
+            self._conn.executemany(
+                "UPDATE reminders SET status = ?, delivered_at = ?, error = NULL WHERE id = ? AND claimed_by = ?",
+                [(DELIVERED, now, reminder_id, self.owner) for reminder_id, *_ in batch],
+            )
+            self._counts["delivered"] += len(batch)
+            self._counts["batches"] += 1
+
+    def _retry(self, batch, error):
+        with self._lock:
+            for reminder_id, _, _, attempts in batch:
+                if attempts >= MAX_ATTEMPTS:
+                    self._conn.execute("UPDATE reminders SET status = ?, error = ? WHERE id = ? AND claimed_by = ?",
+                                       (FAILED, str(error), reminder_id, self.owner))
+                    self._counts["failed"] += 1
+                    continue
+                deliver_at = time.time() + RETRY_DELAY * attempts
+                self._conn.execute(
+                    "UPDATE reminders SET status = ?, deliver_at = ?, error = ?, claimed_by = NULL "
+                    "WHERE id = ? AND claimed_by = ?",
+                    (PENDING, deliver_at, str(error), reminder_id, self.owner),
+                )
+                heapq.heappush(self._heap, (deliver_at, reminder_id))
+
+    def flush(self, timeout=10.0):
+        """Wait until no reminder is deliverable now (used before exiting)"""
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            with self._lock:
+                busy = self._conn.execute(
+                    "SELECT COUNT(*) FROM reminders WHERE status = ? OR (status = ? AND deliver_at <= ?)",
+                    (SENDING, PENDING, time.time()),
+                ).fetchone()[0]
+            if not busy:
+                return True
+            time.sleep(0.05)
+        return False
+
+    def stop(self):
+        with self._lock:
+            self._stopped = True
+            self._wake.notify()
+        if self._thread is not None:
+            self._thread.join()
+
+    def stats(self):
+        with self._lock:
+            pending = self._conn.execute("SELECT COUNT(*) FROM reminders WHERE status = ?", (PENDING,)).fetchone()[0]
+            return dict(self._counts, pending=pending, backend=self.backend.name)
+
+
+_default_scheduler = None
+_default_lock = threading.Lock()
+
+
+def get_reminder_scheduler():
+    """Shared, started scheduler at screenshots_notes/reminders.db; flushed when the process exits"""
+    global _default_scheduler
+    with _default_lock:
+        if _default_scheduler is None:
+            os.makedirs("screenshots_notes", exist_ok=True)
+            _default_scheduler = ReminderScheduler(os.path.join("screenshots_notes", "reminders.db")).start()
+            atexit.register(_default_scheduler.flush)
+    return _default_scheduler
@@ -0,0 +1,155 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+CONFIG_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "config")
+CONFIG_FILES = ("agents.yml", "tasks.yml")
+
+DEFAULT_TTL = 7 * 24 * 3600
+DEFAULT_MAX_BYTES = 32 * 1024 * 1024
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    key TEXT PRIMARY KEY,
+    model TEXT,
+    response TEXT,
+    bytes INTEGER,
+    created_at REAL,
+    accessed_at REAL
+);
+CREATE INDEX IF NOT EXISTS responses_accessed_at ON responses (accessed_at);
+"""
+
+
+def config_version(config_dir=CONFIG_DIR):
+    """Short digest of the agent and task prompts, so editing them invalidates cached responses"""
+    digest = hashlib.sha256()
+    for name in CONFIG_FILES:
+        try:
+            with open(os.path.join(config_dir, name), "rb") as f:
+                digest.update(f.read())
+        except OSError:
+            digest.update(b"missing:" + name.encode())
+    return digest.hexdigest()[:12]
+
+
+def file_digest(path):
+    """sha256 of a local file's content, or None for URLs and missing files"""
+    try:
+        with open(path, "rb") as f:
+            return hashlib.file_digest(f, "sha256").hexdigest()
+    except (OSError, TypeError):
+        return None
+
+
+def make_key(model, payload, scope=None):
+    """Cache key for a request: the model, everything sent to it, and a scope such as the image hash"""
+    blob = json.dumps([model, scope, payload], sort_keys=True, default=str)
+    return hashlib.sha256(blob.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """
+        Persistent cache of LLM responses in SQLite.
+
+        Callers build keys with make_key() from the content that determines the
+        answer (image hash, note, prompt config version, model), so retries and
+        reprocessing of the same screenshot are served locally. Entries expire
+        after `ttl` seconds and the least recently used ones are evicted once the
+        stored responses exceed max_bytes.
+    """
+
+    def __init__(self, db_path, ttl=DEFAULT_TTL, max_bytes=DEFAULT_MAX_BYTES):
+        self.db_path = db_path
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._counts = {"hits": 0, "misses": 0, "expired": 0, "stores": 0, "evictions": 0}
+        self._conn = sqlite3.connect(db_path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+        self._total_bytes = self._conn.execute("SELECT COALESCE(SUM(bytes), 0) FROM responses").fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def get(self, key):
+        """Cached response text, or None on a miss or an expired entry"""
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT response, bytes, created_at FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                self._counts["misses"] += 1
+                return None
+            response, size, created_at = row
+            if now - created_at > self.ttl:
+                self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                self._total_bytes -= size
+                self._counts["expired"] += 1
+                self._counts["misses"] += 1
+                return None
+            self._conn.execute("UPDATE responses SET accessed_at = ? WHERE key = ?", (now, key))
+            self._counts["hits"] += 1
+            return response
+
+    def put(self, key, model, response):
+        now = time.time()
+        size = len(response.encode("utf-8"))
+        with self._lock:
+            previous = self._conn.execute("SELECT bytes FROM responses WHERE key = ?", (key,)).fetchone()
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, model, response, bytes, created_at, accessed_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (key, model, response, size, now, now),
+            )
+            self._total_bytes += size - (previous[0] if previous else 0)
+            self._counts["stores"] += 1
+            if self._total_bytes > self.max_bytes:
+                self._evict()
+
+    def _evict(self):
+        """Drop expired entries, then the least recently used down to 90% of max_bytes"""
+        cursor = self._conn.execute("DELETE FROM responses WHERE created_at < ?", (time.time() - self.ttl,))
+        self._counts["evictions"] += cursor.rowcount
+        target = self.max_bytes * 0.9
+        self._total_bytes = self._conn.execute("SELECT COALESCE(SUM(bytes), 0) FROM responses").fetchone()[0]
+        if self._total_bytes <= target:
+            return
+        freed = 0
+        doomed = []
+        for key, size in self._conn.execute("SELECT key, bytes FROM responses ORDER BY accessed_at"):
+            if self._total_bytes - freed <= target:
+                break
+            doomed.append((key,))
+            freed += size
+        self._conn.executemany("DELETE FROM responses WHERE key = ?", doomed)
+        self._total_bytes -= freed
+        self._counts["evictions"] += len(doomed)
+
+    def stats(self):
+        """Hit/miss counters since start, plus the hit rate and stored bytes"""
+        with self._lock:
+            stats = dict(self._counts, bytes=self._total_bytes)
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = round(stats["hits"] / lookups, 3) if lookups else 0.0
+        return stats
+
+
+_default_cache = None
+
+
+def get_response_cache():
+    """Shared cache at SCREENSHOT_LLM_CACHE (screenshots_notes/llm_cache.db by default)"""
+    global _default_cache
+    if _default_cache is None:
+        path = os.environ.get("SCREENSHOT_LLM_CACHE", os.path.join("screenshots_notes", "llm_cache.db"))
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        _default_cache = ResponseCache(path)
+    return _default_cache
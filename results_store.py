@@ -0,0 +1,121 @@
+import fcntl
+import json
+import os
+import threading
+import time
+
+from catalog import screenshot_id
+
+# Task name -> result field, for outputs of PostScreenshotCrew
+TASK_FIELDS = {
+    "task_classification_task": "classification",
+    "combined_classification_task": "classification",
+    "action_classification_task": "action",
+    "summarize_notes_task": "summary",
+    "research_task": "research",
+    "reminder_task": "reminder",
+}
+OUTPUT_FIELDS = frozenset(TASK_FIELDS.values())
+
+# Sections shown in the viewer, in order
+DISPLAY_FIELDS = (("summary", "Summary"), ("research", "Research"), ("reminder", "Reminder"))
+
+
+class ResultStore:
+    """
+        Crew results per screenshot, one JSON file per screenshot ID.
+
+        Updates merge into the existing result under a per-file lock (flock, so
+        the crew worker and a batch run can write at the same time) and replace
+        the file atomically, so readers never see a partial result.
+    """
+
+    def __init__(self, results_dir):
+        self.results_dir = results_dir
+        self._lock = threading.Lock()
+        os.makedirs(results_dir, exist_ok=True)
+
+    def path_for(self, screenshot):
+        return os.path.join(self.results_dir, screenshot_id(screenshot) + ".json")
+
+    def get(self, screenshot):
+        try:
+            with open(self.path_for(screenshot), "r") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def update(self, screenshot, **fields):
+        """Merge fields into the screenshot's result and return the new result"""
+        path = self.path_for(screenshot)
+        with self._lock, open(path + ".lock", "w") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            result = self.get(screenshot) or {"id": screenshot_id(screenshot)}
+            result.update(fields, screenshot=screenshot, updated_at=time.time())
+            tmp_path = f"{path}.{os.getpid()}.tmp"
+            with open(tmp_path, "w") as f:
+                json.dump(result, f, indent=1)
+            os.replace(tmp_path, path)
+        return result
+
+    def remove(self, screenshot):
+        path = self.path_for(screenshot)
+        for stale in (path, path + ".lock"):
+            try:
+                os.remove(stale)
+            except FileNotFoundError:
+                pass
+
+
+def _task_value(task_output):
+    if getattr(task_output, "json_dict", None):
+        return task_output.json_dict
+    return task_output.raw
+
+
+def record_crew_output(store, screenshot, note, output, catalog=None, classification=None):
+    """Store what a crew run produced for a screenshot (skipped tasks are left out).
+
+    `classification` is the decision that picked the crew's task, for runs where
+    the classification happened outside `output` (a separate crew or the fast
+    classifier). The summary is also recorded in the catalog, if given, so it is
+    searchable.
+    """
+    fields = {"note": note}
+    for task_output in getattr(output, "tasks_output", None) or []:
+        field = TASK_FIELDS.get(task_output.name)
+        if field is None or not task_output.raw:
+            continue
+        value = _task_value(task_output)
+        if field == "summary" and isinstance(value, dict):
+            value = value.get("summary") or task_output.raw
+        fields[field] = value
+    if classification:
+        fields["classification"] = classification
+    result = store.update(screenshot, **fields)
+    if catalog is not None and fields.get("summary"):
+        catalog.set_summary(screenshot, fields["summary"])
+    return result
+
+
+def format_results(result):
+    """Crew results as text for the viewer, or an empty string if there are none"""
+    if not result:
+        return ""
+    sections = []
+    for field, title in DISPLAY_FIELDS:
+        value = result.get(field)
+        if value:
+            text = value if isinstance(value, str) else json.dumps(value, indent=1)
+            sections.append(f"{title}:\n{text.strip()}")
+    return "\n\n".join(sections)
+
+
+_default_store = None
+
+
+def get_result_store():
+    global _default_store
+    if _default_store is None:
+        _default_store = ResultStore(os.path.join("screenshots_notes", ".results"))
+    return _default_store
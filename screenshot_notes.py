@@ -1,48 +1,204 @@
 import os
+from collections import namedtuple
 from datetime import datetime
 import tkinter as tk
 import subprocess
 from PIL import Image, ImageTk
-from pynput import keyboard
 from screenshot_notes_viewer import ScreenshotNotesViewer
+from capture_pipeline import CapturePipeline
+from capture_backends import get_capture_backend
+from encoders import get_encoder_policy
+from catalog import Catalog
+from job_queue import POST_SCREENSHOT, JobQueue
+from results_store import OUTPUT_FIELDS, get_result_store
+from dedupe import HashIndex, dhash
+from thumbnail_cache import DIALOG_PREVIEW_SIZE, PREVIEW_SIZE, ThumbnailCache, make_thumbnail
 
 # Directory to save screenshots and notes
 SAVE_DIR = "screenshots_notes"
 os.makedirs(SAVE_DIR, exist_ok=True)
 
+thumbnails = ThumbnailCache(os.path.join(SAVE_DIR, ".thumbnails"))
+catalog = Catalog(os.path.join(SAVE_DIR, "catalog.db"))
+# Post-processing jobs for crew_worker.py
+jobs = JobQueue(os.path.join(SAVE_DIR, ".jobs"))
+
+# Output of the encode stage: file extension, encoded bytes, pixel size and viewer preview
+EncodedImage = namedtuple("EncodedImage", "extension data size preview")
+
+# Captures within this many bits (of 64) of a recent one are linked to it instead of stored
+DUPLICATE_DISTANCE = 4
+
+_capture_backend = None
+_encoder_policy = None
+_recent_hashes = None
+# Base paths of captures that are still being encoded
+_pending_captures = set()
+
+def get_backend():
+    global _capture_backend
+    if _capture_backend is None:
+        _capture_backend = get_capture_backend()
+    return _capture_backend
+
+def get_policy():
+    global _encoder_policy
+    if _encoder_policy is None:
+        _encoder_policy = get_encoder_policy()
+    return _encoder_policy
+
+def get_recent_hashes():
+    """Perceptual hashes of recent captures, keyed by path without extension"""
+    global _recent_hashes
+    if _recent_hashes is None:
+        index = HashIndex()
+        for path, phash in reversed(catalog.recent_hashes(index.capacity)):
+            index.add(os.path.splitext(path)[0], phash)
+        _recent_hashes = index
+    return _recent_hashes
+
+def find_duplicate(phash):
+    """Path of a recent screenshot that looks the same as phash, or None"""
+    recent = get_recent_hashes()
+    match = recent.find(phash, DUPLICATE_DISTANCE)
+    if match is None:
+        return None
+    key = match[0]
+    if key in _pending_captures:
+        return key
+    row = catalog.get(key)
+    if row and row['path'] and os.path.exists(row['path']):
+        return row['path']
+    # The screenshot was deleted since it was indexed
+    recent.remove(key)
+    return None
+
+def note_path_for(path):
+    """Note file for a screenshot path (with or without its image extension)"""
+    return os.path.splitext(path)[0] + ".txt"
+
+def capture_raw_screenshot():
+    """Capture stage: grab the screen in memory and return (base path without extension, image).
+
+    Near-duplicates of a recent capture return (path of that capture, None) instead.
+    """
+    # Microseconds keep captures taken within the same second (queued hotkey presses) apart
+    timestamp = datetime.now().strftime("%Y-%m-%d_%H-%M-%S-%f")
+    base_path = os.path.join(SAVE_DIR, f"screenshot_{timestamp}")
+    img = get_backend().grab()
+    phash = dhash(img)
+    duplicate = find_duplicate(phash)
+    if duplicate:
+        print(f"Capture looks the same as {duplicate}, linking to it")
+        return duplicate, None
+    get_recent_hashes().add(base_path, phash)
+    _pending_captures.add(base_path)
+    return base_path, img
+
+def encode_image(img):
+    """Encode stage: downscale the captured image and return it as an EncodedImage"""
+    if img.mode != 'RGB':
+        img = img.convert('RGB')
+    max_size = 1500
+    if max(img.size) > max_size:
+        ratio = max_size / max(img.size)
+        new_size = tuple(int(dim * ratio) for dim in img.size)
+        img = img.resize(new_size, Image.Resampling.LANCZOS)
+    encoder = get_policy().choose(img)
+    return EncodedImage(encoder.extension, encoder.encode(img), img.size, make_thumbnail(img, PREVIEW_SIZE))
+
+def persist_image(base_path, encoded):
+    """Persist stage: atomically write the encoded image and return its final path"""
+    image_path = base_path + encoded.extension
+    tmp_path = image_path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(encoded.data)
+    os.replace(tmp_path, image_path)
+    width, height = encoded.size
+    catalog.record(image_path, width, height, data=encoded.data, phash=get_recent_hashes().get(base_path))
+    # Warm the viewer's thumbnail cache so the new capture previews instantly
+    thumbnails.put(image_path, PREVIEW_SIZE, encoded.preview)
+    return image_path
+
 def capture_screenshot():
+    """Capture, encode and persist a screenshot synchronously.
+
+    Returns (path, image) so callers can preview the in-memory capture
+    without decoding the saved file again, (path of the existing screenshot, None)
+    for a near-duplicate, or (None, None) on failure.
+    """
     try:
-        timestamp = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
-        file_path = os.path.join(SAVE_DIR, f"screenshot_{timestamp}.png")
-        # Use macOS screencapture command
-        subprocess.run(['screencapture', '-x', file_path], check=True, timeout=5)
-        if os.path.exists(file_path):
-            optimize_image(file_path)
-            return file_path
-        return None
+        base_path, img = capture_raw_screenshot()
+        if img is None:
+            return base_path, None
+        try:
+            file_path = persist_image(base_path, encode_image(img))
+        finally:
+            _pending_captures.discard(base_path)
+        return file_path, img
     except subprocess.TimeoutExpired:
         print("Screenshot capture timed out")
-        return None
+        return None, None
     except Exception as e:
         print(f"Error taking screenshot: {str(e)}")
-        return None
+        return None, None
 
 def optimize_image(image_path):
+    """Re-encode an existing screenshot file with the current encoder policy"""
     try:
         with Image.open(image_path) as img:
-            if img.mode != 'RGB':
-                img = img.convert('RGB')
-            max_size = 1500
-            if max(img.size) > max_size:
-                ratio = max_size / max(img.size)
-                new_size = tuple(int(dim * ratio) for dim in img.size)
-                img = img.resize(new_size, Image.Resampling.LANCZOS)
-            img.save(image_path, 'PNG', optimize=True, quality=85)
+            img.load()
+            encoded = encode_image(img)
+        new_path = persist_image(os.path.splitext(image_path)[0], encoded)
+        if new_path != image_path:
+            os.remove(image_path)
+        return new_path
     except Exception as e:
         print(f"Error optimizing image: {str(e)}")
+        return image_path
+
+def save_note(screenshot_path, note):
+    """Write a screenshot's note, appending to any note already linked to it
+    (near-duplicate captures add their notes to the original screenshot)"""
+    note_file = note_path_for(screenshot_path)
+    if os.path.exists(note_file):
+        with open(note_file, "r") as f:
+            existing = f.read()
+        if existing:
+            note = f"{existing}\n\n{note}"
+    with open(note_file, "w") as f:
+        f.write(note)
+    # Keyed by screenshot ID, so this is safe before the image is persisted
+    catalog.set_note(screenshot_path, note)
+    return note_file
+
+def crew_has_processed(screenshot_path):
+    """True if the crew already produced output for a screenshot, whatever its note was then"""
+    result = get_result_store().get(screenshot_path)
+    return bool(result) and any(result.get(field) for field in OUTPUT_FIELDS)
+
+def submit_note(screenshot_path, note, duplicate=False):
+    """Save a note and queue the screenshot for the crew worker; returns the note file.
+
+    A near-duplicate capture's note is merged into the original screenshot's,
+    which is only queued again (with the merged note) if the crew never processed
+    it, e.g. it had no note or its job failed.
+    """
+    note_file = save_note(screenshot_path, note)
+    if duplicate and crew_has_processed(screenshot_path):
+        return note_file
+    with open(note_file, "r") as f:
+        note = f.read()
+    # The crew worker picks this up once the image has been persisted
+    jobs.enqueue(POST_SCREENSHOT, {"screenshot": screenshot_path, "note": note})
+    return note_file
 
-def create_note_dialog(root, screenshot_path):
-    """Creates a note dialog with a screenshot preview using a Toplevel window."""
+def create_note_dialog(root, screenshot_path, image=None):
+    """Creates a note dialog with a screenshot preview using a Toplevel window.
+
+    If the already-decoded capture is passed as `image` it is used for the
+    preview instead of reading `screenshot_path` back from disk.
+    """
     note_text = None
 
     def on_save():
@@ -68,9 +224,10 @@ def create_note_dialog(root, screenshot_path):
 
     # Load and display the screenshot preview
     try:
-        img = Image.open(screenshot_path)
-        max_preview_size = (200, 200)
-        img.thumbnail(max_preview_size, Image.Resampling.LANCZOS)
+        if image is not None:
+            img = make_thumbnail(image, DIALOG_PREVIEW_SIZE)
+        else:
+            img = thumbnails.load(screenshot_path, DIALOG_PREVIEW_SIZE)
         img_tk = ImageTk.PhotoImage(img)
         image_label = tk.Label(dialog, image=img_tk)
         image_label.image = img_tk  # Keep a reference
@@ -99,27 +256,55 @@ def create_note_dialog(root, screenshot_path):
     dialog.wait_window()  # Wait for the dialog to close
     return note_text
 
-def process_screenshot_note(root):
-    print("Trigger detected! Capturing screenshot...")
-    screenshot_path = capture_screenshot()
-    if not screenshot_path:
-        print("Failed to capture screenshot")
-        return
-
-    note = create_note_dialog(root, screenshot_path)
+def process_screenshot_note(root, job, image, pipeline=None):
+    """Show the note dialog for a captured screenshot while it is still being encoded"""
+    screenshot_path = job.path
+    # Runs once the dialog has been drawn, giving the hotkey-to-dialog latency
+    root.after_idle(job.mark, "dialog")
+    note = create_note_dialog(root, screenshot_path, image=image)
+    if pipeline:
+        pipeline.record_timings(job, ("dialog",))
     if note:
-        note_file = screenshot_path.replace(".png", ".txt")
-        with open(note_file, "w") as f:
-            f.write(note)
+        note_file = submit_note(job.saved_path or screenshot_path, note, duplicate=job.duplicate)
         print(f"Note saved: {note_file}")
     else:
         print("No note added.")
-    print(f"Screenshot saved: {screenshot_path}")
 
-def on_activate(root):
-    print("Hotkey detected!")
-    # Schedule UI work on the main thread
-    root.after(0, process_screenshot_note, root)
+def on_capture_done(job):
+    _pending_captures.discard(job.path)
+    if job.error is not None:
+        if isinstance(job.error, subprocess.TimeoutExpired):
+            print("Screenshot capture timed out")
+        else:
+            print(f"Failed to capture screenshot: {str(job.error)}")
+        return
+    if job.duplicate:
+        print(f"Duplicate capture linked to {job.saved_path} ({job.format_timings()})")
+    else:
+        print(f"Screenshot saved: {job.saved_path} ({job.format_timings()})")
+
+def create_capture_pipeline(root):
+    """Build the background capture pipeline that feeds note dialogs on the Tk thread"""
+    pipeline = None
+
+    def on_captured(job):
+        # Schedule UI work on the main thread
+        # Hand over the decoded capture now, job.data becomes the encoded bytes later
+        root.after(0, process_screenshot_note, root, job, job.data, pipeline)
+
+    pipeline = CapturePipeline(
+        capture=capture_raw_screenshot,
+        encode=encode_image,
+        persist=persist_image,
+        on_captured=on_captured,
+        on_done=on_capture_done,
+    )
+    return pipeline
+
+def on_activate(pipeline):
+    print("Hotkey detected! Capturing screenshot...")
+    # Returns immediately; capture and encoding happen on the pipeline's workers
+    pipeline.submit()
 
 def for_canonical(f):
     return lambda k: f(listener.canonical(k))
@@ -155,6 +340,9 @@ def show_notes_viewer(root):
     viewer_window.protocol("WM_DELETE_WINDOW", on_viewer_close)
 
 if __name__ == "__main__":
+    # Imported here so the capture and encode functions can be used headless
+    from pynput import keyboard
+
     if not check_permissions():
         print("Please grant accessibility permissions and try again.")
         exit(1)
@@ -195,9 +383,11 @@ if __name__ == "__main__":
 
     print("Starting screenshot note tool...")
 
+    pipeline = create_capture_pipeline(root)
+
     hotkey = keyboard.HotKey(
         keyboard.HotKey.parse('<cmd>+<shift>+6'),
-        lambda: on_activate(root)
+        lambda: on_activate(pipeline)
     )
 
     with keyboard.Listener(
@@ -211,6 +401,8 @@ if __name__ == "__main__":
             print("\nExiting gracefully...")
         except Exception as e:
             print(f"Error: {str(e)}")
+    pipeline.shutdown()
+    print(f"Capture stage timings: {pipeline.stats()}")
     try:
         root.destroy()
     except Exception:
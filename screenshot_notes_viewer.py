@@ -2,12 +2,32 @@ import os
 import tkinter as tk
 from tkinter import ttk, messagebox
 import webbrowser
-from PIL import Image, ImageTk
+from PIL import ImageTk
 from datetime import datetime
 import subprocess
+import threading
+import queue
+from thumbnail_cache import PREVIEW_SIZE, ThumbnailCache
+from prefetch import Prefetcher
+from catalog import Catalog
+from list_model import PagedListModel
+from virtual_listbox import VirtualListbox
+from fs_watcher import REMOVED, DirectoryWatcher
+from encoders import IMAGE_EXTENSIONS
+from results_store import format_results, get_result_store
 
 # Directory where screenshots and notes are saved
 SAVE_DIR = "screenshots_notes"
+# Number of items on each side of the selection whose previews are prefetched
+PREFETCH_RADIUS = 5
+# Memory budget for decoded previews held by the viewer
+PREVIEW_CACHE_MB = 64
+# Delay after the last keystroke before the search runs
+SEARCH_DEBOUNCE_MS = 150
+# How often a streaming summary is copied into the note panel
+STREAM_POLL_MS = 50
+# Put on a summary stream's queue when it has finished
+STREAM_DONE = object()
 
 
 class ScreenshotNotesViewer:
@@ -16,6 +36,12 @@ class ScreenshotNotesViewer:
         self.root.title("Screenshot Notes Viewer")
         self.root.geometry("900x600")
         self.root.minsize(800, 500)
+        os.makedirs(SAVE_DIR, exist_ok=True)
+        self.catalog = Catalog(os.path.join(SAVE_DIR, "catalog.db"))
+        self.thumbnails = ThumbnailCache(os.path.join(SAVE_DIR, ".thumbnails"))
+        self.previews = Prefetcher(self.root, self.load_preview, max_mb=PREVIEW_CACHE_MB)
+        self.results = get_result_store()
+        self.selected_path = None
         
         # Configure root grid
         self.root.columnconfigure(0, weight=1)
@@ -35,8 +61,29 @@ class ScreenshotNotesViewer:
         # Create content section with list and preview
         self.create_content()
         
-        # Load screenshots and notes
+        # Load screenshots and notes, then pick up files added or removed while we were closed
         self.load_screenshots_notes()
+        self.refresh()
+        
+        # Apply changes made by the capture tool or other programs as they happen
+        self.watcher = DirectoryWatcher(
+            SAVE_DIR,
+            self.on_files_changed,
+            extensions=IMAGE_EXTENSIONS + ('.txt',),
+            on_overflow=self.refresh
+        ).start()
+        # Show crew results as the crew worker or a batch run saves them
+        self.results_watcher = DirectoryWatcher(
+            self.results.results_dir,
+            self.on_results_changed,
+            extensions=('.json',)
+        ).start()
+        self.root.bind('<Destroy>', self.on_destroy, add='+')
+
+    def on_destroy(self, event):
+        if event.widget is self.root:
+            self.watcher.stop()
+            self.results_watcher.stop()
 
     def create_header(self):
         header_frame = ttk.Frame(self.main_frame)
@@ -51,12 +98,21 @@ class ScreenshotNotesViewer:
         buttons_frame.pack(side=tk.RIGHT)
         
         # Refresh button
-        refresh_btn = ttk.Button(buttons_frame, text="Refresh", command=self.load_screenshots_notes)
+        refresh_btn = ttk.Button(buttons_frame, text="Refresh", command=self.refresh)
         refresh_btn.pack(side=tk.LEFT, padx=5)
         
         # Capture new button
         capture_btn = ttk.Button(buttons_frame, text="Capture New", command=self.capture_new)
         capture_btn.pack(side=tk.LEFT, padx=5)
+        
+        # Search box, filters the list by note and summary text as you type
+        self.search_var = tk.StringVar()
+        self._search_job = None
+        search_entry = ttk.Entry(header_frame, textvariable=self.search_var, width=30)
+        search_entry.pack(side=tk.RIGHT, padx=5)
+        search_entry.bind('<KeyRelease>', self.on_search_changed)
+        search_label = ttk.Label(header_frame, text="Search:")
+        search_label.pack(side=tk.RIGHT)
 
     def create_content(self):
         # Create list panel (left side)
@@ -65,30 +121,17 @@ class ScreenshotNotesViewer:
         list_frame.rowconfigure(0, weight=1)
         list_frame.columnconfigure(0, weight=1)
         
-        # Create list with scrollbar
-        self.list_frame = ttk.Frame(list_frame)
-        self.list_frame.grid(row=0, column=0, sticky="nsew")
-        
-        # Scrollbar
-        scrollbar = ttk.Scrollbar(self.list_frame)
-        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
-        
-        # List with items
-        self.screenshots_list = tk.Listbox(
-            self.list_frame,
+        # Virtualized list: only the visible rows are materialized
+        self.screenshots_list = VirtualListbox(
+            list_frame,
+            on_select=self.on_item_select,
+            format_row=self.format_row,
             selectmode=tk.SINGLE,
             font=("Arial", 11),
             activestyle="none",
             height=20
         )
-        self.screenshots_list.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
-        
-        # Connect scrollbar to listbox
-        self.screenshots_list.config(yscrollcommand=scrollbar.set)
-        scrollbar.config(command=self.screenshots_list.yview)
-        
-        # Bind selection event
-        self.screenshots_list.bind('<<ListboxSelect>>', self.on_item_select)
+        self.screenshots_list.grid(row=0, column=0, sticky="nsew")
         
         # Create preview panel (right side)
         preview_frame = ttk.LabelFrame(self.main_frame, text="Preview")
@@ -127,126 +170,265 @@ class ScreenshotNotesViewer:
         
         self.delete_btn = ttk.Button(actions_frame, text="Delete", command=self.delete_item)
         self.delete_btn.pack(side=tk.LEFT, padx=5)
+        
+        self.summarize_btn = ttk.Button(actions_frame, text="Summarize", command=self.summarize_selected)
+        self.summarize_btn.pack(side=tk.LEFT, padx=5)
+
+    def load_screenshots_notes(self, keep_position=False):
+        # Notes may have been edited since they were cached
+        self.previews.clear()
+        self.show_model(self.make_model(), keep_position=keep_position)
 
-    def load_screenshots_notes(self):
-        # Clear existing items
-        self.screenshots_list.delete(0, tk.END)
-        self.screenshots_data = []
+    def make_model(self):
+        """List model for the current search, or the whole catalog if there is none"""
+        query = self.search_var.get().strip()
+        if query:
+            results = self.catalog.search(query)
+            return PagedListModel(lambda offset, limit: results[offset:offset + limit], len(results))
+        # Pages of records are fetched from the catalog as the list scrolls
+        return PagedListModel(self.catalog.page, self.catalog.count())
+
+    def show_model(self, model, keep_position=False):
+        self.model = model
+        self.screenshots_list.set_model(self.model, keep_position=keep_position)
         
-        if not os.path.exists(SAVE_DIR):
+        # Clear preview if no items
+        if not len(self.model):
+            self.clear_preview()
+        else:
+            # Select first item (or keep the current one)
+            selected = self.screenshots_list.selected if keep_position else None
+            self.screenshots_list.select(selected or 0)
+
+    def on_search_changed(self, event=None):
+        # Debounce so typing a word runs one search, not one per keystroke
+        if self._search_job is not None:
+            self.root.after_cancel(self._search_job)
+        self._search_job = self.root.after(SEARCH_DEBOUNCE_MS, self.apply_search)
+
+    def apply_search(self):
+        self._search_job = None
+        self.show_model(self.make_model())
+
+    def format_row(self, record):
+        try:
+            date_str = datetime.fromtimestamp(record.captured_at).strftime('%Y-%m-%d %H:%M:%S')
+        except (TypeError, ValueError, OSError):
+            date_str = "Unknown date"
+        return f"{date_str} - {os.path.basename(record.path)}"
+
+    def refresh(self):
+        """Reconcile the catalog with the save directory in the background, then update the list"""
+        threading.Thread(target=self._reconcile, daemon=True).start()
+
+    def _reconcile(self):
+        try:
+            changed, removed = self.catalog.reconcile(SAVE_DIR)
+        except Exception as e:
+            print(f"Error reconciling catalog: {e}")
+            return
+        if changed or removed:
+            self.root.after(0, self.apply_changes, changed + removed)
+
+    def on_files_changed(self, events):
+        """Runs on the watcher thread: update the catalog, then patch the list on the Tk thread"""
+        changed_paths = []
+        for kind, path in events:
+            try:
+                if path.endswith('.txt'):
+                    row = self.catalog.get(path)
+                    if row is None or not row['path']:
+                        continue
+                    note = None
+                    if kind != REMOVED:
+                        with open(path, 'r') as f:
+                            note = f.read()
+                    self.catalog.set_note(path, note)
+                    changed_paths.append(row['path'])
+                elif kind == REMOVED:
+                    self.catalog.remove(path)
+                    changed_paths.append(path)
+                elif self.catalog.update_file(path):
+                    changed_paths.append(path)
+            except Exception as e:
+                print(f"Error applying change to {path}: {e}")
+        if changed_paths:
+            self.root.after(0, self.apply_changes, changed_paths)
+
+    def on_results_changed(self, events):
+        """Runs on the watcher thread: reload the previews of screenshots whose results changed"""
+        paths = []
+        for kind, path in events:
+            row = self.catalog.get(path)
+            if row is not None and row['path']:
+                paths.append(row['path'])
+        if paths:
+            self.root.after(0, self.reload_previews, paths)
+
+    def reload_previews(self, paths):
+        for path in paths:
+            self.previews.invalidate(path)
+        if self.selected_path in paths:
+            self.previews.request(self.selected_path, self.show_preview)
+
+    def apply_changes(self, paths):
+        """Update the list for changed files, keeping the scroll position and selection"""
+        for path in paths:
+            self.previews.invalidate(path)
+        
+        selected = self.screenshots_list.selected_item()
+        self.model = self.make_model()
+        self.screenshots_list.set_model(self.model, keep_position=True)
+        if not len(self.model):
+            self.clear_preview()
             return
         
-        # Get all PNG files
-        files = [f for f in os.listdir(SAVE_DIR) if f.endswith('.png')]
-        files.sort(reverse=True)  # Sort by newest first
+        # Follow the selected screenshot if other items were added above it
+        index = self.index_of(selected) if selected is not None else None
+        if index is None:
+            index = self.screenshots_list.selected or 0
+        self.screenshots_list.select(index)
+
+    def index_of(self, record):
+        if self.search_var.get().strip():
+            for index, other in enumerate(self.model.window(0, len(self.model))):
+                if other.id == record.id:
+                    return index
+            return None
+        return self.catalog.position(record)
+
+    def on_item_select(self, index):
+        item = self.model[index]
+        
+        # Preview and note are loaded on the prefetch worker (or served from memory)
+        self.selected_path = item.path
+        self.previews.request(item.path, self.show_preview)
+        
+        # Warm the neighbours so arrow-keying through the list never waits
+        start = max(0, index - PREFETCH_RADIUS)
+        neighbours = self.model.window(start, index + PREFETCH_RADIUS + 1)
+        nearest_first = sorted(range(len(neighbours)), key=lambda i: abs(start + i - index))
+        self.previews.prefetch(neighbours[i].path for i in nearest_first if start + i != index)
+
+    def load_preview(self, file_path):
+        """Runs on the prefetch worker: scaled image and note text for a screenshot"""
+        # Scaled preview from the thumbnail cache (decoded at reduced size on a miss)
+        try:
+            img = self.thumbnails.load(file_path, PREVIEW_SIZE)
+        except Exception as e:
+            print(f"Error loading image: {e}")
+            img = None
         
-        for file in files:
-            file_path = os.path.join(SAVE_DIR, file)
-            note_path = file_path.replace('.png', '.txt')
-            
-            # Get file creation time
+        note_path = os.path.splitext(file_path)[0] + '.txt'
+        if os.path.exists(note_path):
             try:
-                creation_time = os.path.getctime(file_path)
-                date_str = datetime.fromtimestamp(creation_time).strftime('%Y-%m-%d %H:%M:%S')
-            except:
-                date_str = "Unknown date"
-            
-            # Add to data list
-            self.screenshots_data.append({
-                'file_path': file_path,
-                'note_path': note_path,
-                'date': date_str,
-                'filename': file
-            })
-            
-            # Add to listbox
-            display_name = f"{date_str} - {file}"
-            self.screenshots_list.insert(tk.END, display_name)
-        
-        # Clear preview if no items
-        if not files:
-            self.clear_preview()
+                with open(note_path, 'r') as f:
+                    note_content = f.read()
+            except Exception as e:
+                note_content = f"Error loading note: {e}"
         else:
-            # Select first item
-            self.screenshots_list.selection_set(0)
-            self.on_item_select(None)
-
-    def on_item_select(self, event):
-        # Get selected index
-        selection = self.screenshots_list.curselection()
-        if not selection:
-            return
+            note_content = "No note for this screenshot."
         
-        index = selection[0]
-        item = self.screenshots_data[index]
+        # Crew results computed earlier by the crew worker or a batch run
+        results = format_results(self.results.get(file_path))
+        if results:
+            note_content += "\n\n" + results
+        
+        nbytes = len(note_content) + (img.size[0] * img.size[1] * 3 if img else 0)
+        return (img, note_content), nbytes
+
+    def show_preview(self, file_path, preview):
+        """Display a loaded preview, unless the selection has moved on"""
+        if file_path != self.selected_path:
+            return
+        img, note_content = preview if preview else (None, "Error loading preview.")
         
         # Update image preview
-        try:
-            img = Image.open(item['file_path'])
-            
-            # Calculate maximum size for preview while maintaining aspect ratio
-            max_width = 500
-            max_height = 300
-            img_width, img_height = img.size
-            
-            if img_width > max_width or img_height > max_height:
-                ratio = min(max_width / img_width, max_height / img_height)
-                new_width = int(img_width * ratio)
-                new_height = int(img_height * ratio)
-                img = img.resize((new_width, new_height), Image.Resampling.LANCZOS)
-            
+        if img is not None:
             photo = ImageTk.PhotoImage(img)
             self.image_label.config(image=photo)
             self.image_label.image = photo  # Keep a reference
-        except Exception as e:
+        else:
             self.image_label.config(image='')
-            print(f"Error loading image: {e}")
         
         # Update note text
+        self.set_note_panel(note_content)
+
+    def set_note_panel(self, text):
         self.note_text.config(state=tk.NORMAL)
         self.note_text.delete(1.0, tk.END)
-        
-        if os.path.exists(item['note_path']):
+        self.note_text.insert(tk.END, text)
+        self.note_text.config(state=tk.DISABLED)
+
+    def summarize_selected(self):
+        """Generate a summary of the selected screenshot, showing it as it streams in"""
+        item = self.screenshots_list.selected_item()
+        if item is None:
+            return
+        row = self.catalog.get(item.path)
+        note = (row['note'] if row else None) or ""
+        updates = queue.Queue()
+        self.summarize_btn.config(state=tk.DISABLED)
+        self.set_note_panel(f"{note}\n\nSummary:\n…")
+        threading.Thread(target=self._summarize, args=(item.path, note, updates), daemon=True).start()
+        self.root.after(STREAM_POLL_MS, self._drain_summary, item.path, note, updates)
+
+    def _summarize(self, path, note, updates):
+        """Runs on a worker thread: stream the summary into `updates`, then save it"""
+        try:
+            # Imported here: the OpenAI client is only needed once a summary is asked for
+            from action_agent import summarize_notes
+            summary = summarize_notes(note, path, on_text=updates.put)
+            if summary:
+                self.results.update(path, summary=summary)
+                self.catalog.set_summary(path, summary)
+        except Exception as e:
+            print(f"Error summarizing {path}: {e}")
+            updates.put(f"Error generating summary: {e}")
+        updates.put(STREAM_DONE)
+
+    def _drain_summary(self, path, note, updates):
+        """Show the latest streamed text, if the screenshot is still selected"""
+        text = None
+        done = False
+        while True:
             try:
-                with open(item['note_path'], 'r') as f:
-                    note_content = f.read()
-                self.note_text.insert(tk.END, note_content)
-            except Exception as e:
-                self.note_text.insert(tk.END, f"Error loading note: {e}")
+                update = updates.get_nowait()
+            except queue.Empty:
+                break
+            if update is STREAM_DONE:
+                done = True
+            else:
+                text = update
+        if text is not None and path == self.selected_path:
+            self.set_note_panel(f"{note}\n\nSummary:\n{text}")
+        if done:
+            # The saved result reloads the preview through the results watcher
+            self.summarize_btn.config(state=tk.NORMAL)
         else:
-            self.note_text.insert(tk.END, "No note for this screenshot.")
-        
-        self.note_text.config(state=tk.DISABLED)
+            self.root.after(STREAM_POLL_MS, self._drain_summary, path, note, updates)
 
     def clear_preview(self):
         """Clear the preview panel"""
+        self.selected_path = None
         self.image_label.config(image='')
-        self.note_text.config(state=tk.NORMAL)
-        self.note_text.delete(1.0, tk.END)
-        self.note_text.insert(tk.END, "No screenshot selected.")
-        self.note_text.config(state=tk.DISABLED)
+        self.set_note_panel("No screenshot selected.")
 
     def open_in_finder(self):
         """Open the selected screenshot in Finder"""
-        selection = self.screenshots_list.curselection()
-        if not selection:
+        item = self.screenshots_list.selected_item()
+        if item is None:
             return
         
-        index = selection[0]
-        item = self.screenshots_data[index]
-        
         # Use macOS 'open' command to reveal file in Finder
-        subprocess.run(['open', '-R', item['file_path']])
+        subprocess.run(['open', '-R', item.path])
 
     def delete_item(self):
         """Delete the selected screenshot and its note"""
-        selection = self.screenshots_list.curselection()
-        if not selection:
+        item = self.screenshots_list.selected_item()
+        if item is None:
             return
         
-        index = selection[0]
-        item = self.screenshots_data[index]
-        
         # Confirm deletion
         confirm = messagebox.askyesno(
             "Confirm Delete",
@@ -256,31 +438,40 @@ class ScreenshotNotesViewer:
         
         if confirm:
             try:
-                # Delete image file
-                if os.path.exists(item['file_path']):
-                    os.remove(item['file_path'])
-                
-                # Delete note file
-                if os.path.exists(item['note_path']):
-                    os.remove(item['note_path'])
-                
-                # Refresh the list
-                self.load_screenshots_notes()
+                self.remove_screenshot(item)
                 messagebox.showinfo("Success", "Screenshot and note deleted successfully.", parent=self.root)
             except Exception as e:
                 messagebox.showerror("Error", f"Failed to delete: {str(e)}", parent=self.root)
 
+    def remove_screenshot(self, item):
+        """Delete a screenshot's files and results, then drop it from the list"""
+        note_path = os.path.splitext(item.path)[0] + '.txt'
+        
+        # Delete image file
+        if os.path.exists(item.path):
+            os.remove(item.path)
+        
+        # Delete note file
+        if os.path.exists(note_path):
+            os.remove(note_path)
+        
+        self.catalog.remove(item.path)
+        self.results.remove(item.path)
+        
+        # Remove it from the list, staying near the deleted item
+        self.apply_changes([item.path])
+
     def capture_new(self):
         """Capture a new screenshot using the functionality from the main script"""
         try:
             # Import functions from the main script
-            from screenshot_notes import capture_screenshot, create_note_dialog
+            from screenshot_notes import capture_screenshot, create_note_dialog, submit_note
             
             # Minimize the viewer window to not interfere with screenshot
             self.root.iconify()
             
             # Wait a moment for the window to minimize
-            self.root.after(500, lambda: self._perform_capture(capture_screenshot, create_note_dialog))
+            self.root.after(500, lambda: self._perform_capture(capture_screenshot, create_note_dialog, submit_note))
         except ImportError as e:
             messagebox.showerror(
                 "Error", 
@@ -288,34 +479,29 @@ class ScreenshotNotesViewer:
                 parent=self.root
             )
     
-    def _perform_capture(self, capture_screenshot, create_note_dialog):
+    def _perform_capture(self, capture_screenshot, create_note_dialog, submit_note):
         """Actually perform the screenshot capture using the imported functions"""
         # Capture the screenshot
-        screenshot_path = capture_screenshot()
+        screenshot_path, image = capture_screenshot()
         if not screenshot_path:
             messagebox.showerror("Error", "Failed to capture screenshot", parent=self.root)
             self.root.deiconify()  # Show the window again
             return
         
         # Create note dialog
-        note = create_note_dialog(self.root, screenshot_path)
+        note = create_note_dialog(self.root, screenshot_path, image=image)
         if note:
-            note_file = screenshot_path.replace(".png", ".txt")
-            with open(note_file, "w") as f:
-                f.write(note)
-            
-            # Refresh the list
-            self.load_screenshots_notes()
+            # Saved and queued for the crew worker like a hotkey capture; no image means a near-duplicate
+            submit_note(screenshot_path, note, duplicate=image is None)
             
-            # Select the newly added screenshot (should be at the top)
-            if self.screenshots_data:
-                self.screenshots_list.selection_set(0)
-                self.on_item_select(None)
+            # Add it to the list and select it (it is the newest, so at the top)
+            self.apply_changes([screenshot_path])
+            self.screenshots_list.select(0)
                 
             messagebox.showinfo("Success", "Screenshot and note saved successfully!", parent=self.root)
         else:
-            # If they canceled the note, we should still refresh to show the screenshot
-            self.load_screenshots_notes()
+            # If they canceled the note, we should still show the screenshot
+            self.apply_changes([screenshot_path])
             
         # Show the window again
         self.root.deiconify()
@@ -8,7 +8,10 @@ import logging
 os.environ["CREWAI_TELEMETRY"] = "false"
 
 # Import after environment settings
-from crews.crew import PostScreenshotCrew
+from crews.runner import get_classifier, get_speculative, run_post_screenshot
+from llm_resilience import get_resilient_caller
+from response_cache import get_response_cache
+from tools.cached_search_tool import get_search_cache
 from datetime import datetime
 from requests.packages.urllib3.exceptions import InsecureRequestWarning
 
@@ -34,10 +37,14 @@ input_data = {
 }
 
 def run():
-    crew_instance = PostScreenshotCrew()
-    crew = crew_instance.crew()
-    result = crew.kickoff(inputs=input_data)
+    result = run_post_screenshot(input_data)
     print(result)
+    print(f"Classifier: {get_classifier().stats()}")
+    print(f"Response cache: {get_response_cache().stats()}")
+    print(f"Search cache: {get_search_cache().stats()}")
+    print(f"LLM calls: {get_resilient_caller().stats()}")
+    if get_speculative():
+        print(f"Speculation: {get_speculative().stats()}")
 
 if __name__ == "__main__":
     run()
@@ -0,0 +1,68 @@
+import sqlite3
+from datetime import datetime
+
+from catalog import Catalog, parse_capture_time, screenshot_id
+
+
+def test_capture_time_from_sub_second_name():
+    expected = datetime(2026, 10, 18, 13, 23, 56, 123456).timestamp()
+    assert parse_capture_time("screenshots_notes/screenshot_2026-10-18_13-23-56-123456.png") == expected
+
+
+def test_capture_time_from_whole_second_name():
+    expected = datetime(2026, 10, 18, 13, 23, 56).timestamp()
+    assert parse_capture_time("screenshots_notes/screenshot_2026-10-18_13-23-56.webp") == expected
+
+
+OLD_SCHEMA = """
+CREATE TABLE screenshots (
+    id TEXT PRIMARY KEY, path TEXT, captured_at REAL, width INTEGER, height INTEGER, bytes INTEGER,
+    mtime REAL, content_hash TEXT, note TEXT, summary TEXT, phash INTEGER
+);
+CREATE VIRTUAL TABLE notes_fts USING fts5(note, summary, content='screenshots', content_rowid='rowid');
+"""
+
+
+def make_screenshot(directory, i, note):
+    path = str(directory / f"screenshot_2026-10-18_13-00-{i:02d}.png")
+    with open(path, "wb") as f:
+        f.write(b"png")
+    return path, note
+
+
+def searched_ids(catalog, text):
+    return sorted(record.id for record in catalog.search(text))
+
+
+def test_search_survives_deletes_and_vacuum(tmp_path):
+    catalog = Catalog(str(tmp_path / "catalog.db"))
+    notes = ["invoice from acme", "dentist appointment", "invoice for hosting", "flight to lisbon"]
+    for i, note in enumerate(notes):
+        path, note = make_screenshot(tmp_path, i, note)
+        catalog.record(path, 10, 10, note=note)
+    catalog.remove(str(tmp_path / "screenshot_2026-10-18_13-00-00.png"))
+    catalog.remove(str(tmp_path / "screenshot_2026-10-18_13-00-01.png"))
+    catalog._conn.execute("VACUUM")
+
+    assert searched_ids(catalog, "invoice") == ["screenshot_2026-10-18_13-00-02"]
+    assert searched_ids(catalog, "flight") == ["screenshot_2026-10-18_13-00-03"]
+    assert searched_ids(catalog, "dentist") == []
+
+
+def test_catalog_keyed_by_implicit_rowid_is_migrated(tmp_path):
+    db_path = str(tmp_path / "catalog.db")
+    with sqlite3.connect(db_path) as conn:
+        conn.executescript(OLD_SCHEMA)
+        for i, note in enumerate(["invoice from acme", "flight to lisbon"]):
+            path, note = make_screenshot(tmp_path, i, note)
+            conn.execute("INSERT INTO screenshots (id, path, captured_at, note) VALUES (?, ?, ?, ?)",
+                         (screenshot_id(path), path, float(i), note))
+
+    catalog = Catalog(db_path)
+    columns = [row["name"] for row in catalog._conn.execute("PRAGMA table_info(screenshots)")]
+    assert columns[0] == "doc_id"
+    assert catalog.count() == 2
+    assert searched_ids(catalog, "lisbon") == ["screenshot_2026-10-18_13-00-01"]
+    catalog.set_note(str(tmp_path / "screenshot_2026-10-18_13-00-00.png"), "receipt from acme")
+    assert searched_ids(catalog, "receipt") == ["screenshot_2026-10-18_13-00-00"]
+    assert searched_ids(catalog, "invoice") == []
@@ -0,0 +1,39 @@
+import pytest
+
+from crews.fast_classifier import REMINDER, RESEARCH, SUMMARIZE, FastClassifier
+
+
+@pytest.fixture
+def classifier():
+    return FastClassifier()
+
+
+@pytest.mark.parametrize("note, guess", [
+    ("Reminder app UI design inspiration", REMINDER),
+    ("Google Maps screenshot of the route home", RESEARCH),
+    ("nice search bar design", RESEARCH),
+    ("Research paper on sleep, interesting chart", RESEARCH),
+])
+def test_lone_keyword_is_left_to_the_llm(classifier, note, guess):
+    result = classifier.classify(note)
+    assert result.route is None
+    assert result.guess == guess
+
+
+@pytest.mark.parametrize("note, route", [
+    ("Remind me to pay this invoice", REMINDER),
+    ("Set a reminder to call the dentist", REMINDER),
+    ("Reminder: dentist tomorrow at 9am", REMINDER),
+    ("Don't forget to renew the passport", REMINDER),
+    ("Look up what this error message means", RESEARCH),
+    ("Research the company in this screenshot", RESEARCH),
+    ("search for cheaper flights", RESEARCH),
+    ("Google this error", RESEARCH),
+    ("Can you search for reviews of this laptop", RESEARCH),
+])
+def test_imperatives_and_time_cues_take_the_fast_path(classifier, note, route):
+    assert classifier.classify(note).route == route
+
+
+def test_note_without_cues_is_summarized(classifier):
+    assert classifier.classify("Nice wallpaper").route == SUMMARIZE
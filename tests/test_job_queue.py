@@ -0,0 +1,53 @@
+import threading
+
+from job_queue import POST_SCREENSHOT, JobQueue
+
+
+def test_job_is_claimed_once(tmp_path):
+    queue = JobQueue(str(tmp_path))
+    for i in range(20):
+        queue.enqueue(POST_SCREENSHOT, {"screenshot": f"screenshot_{i}", "note": "note"})
+    claimed = []
+    lock = threading.Lock()
+
+    def drain():
+        # Separate instances, like separate processes sharing the directory
+        own_queue = JobQueue(str(tmp_path))
+        while True:
+            job = own_queue.claim()
+            if job is None:
+                return
+            with lock:
+                claimed.append(job["id"])
+
+    threads = [threading.Thread(target=drain) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(claimed) == 20
+    assert len(set(claimed)) == 20
+
+
+def test_crashed_job_is_requeued(tmp_path):
+    queue = JobQueue(str(tmp_path))
+    job_id = queue.enqueue(POST_SCREENSHOT, {"screenshot": "screenshot_a", "note": "note"})
+    assert queue.claim()["id"] == job_id
+    assert queue.counts()["running"] == 1
+
+    # The worker died without completing the job; the next one recovers it
+    restarted = JobQueue(str(tmp_path))
+    assert restarted.recover() == 1
+    assert restarted.counts() == {"pending": 1, "running": 0, "done": 0, "failed": 0}
+    job = restarted.claim()
+    assert job["id"] == job_id
+    assert job["payload"] == {"screenshot": "screenshot_a", "note": "note"}
+
+
+def test_retried_job_waits_until_due(tmp_path):
+    queue = JobQueue(str(tmp_path))
+    queue.enqueue(POST_SCREENSHOT, {"screenshot": "screenshot_a", "note": "note"})
+    job = queue.claim()
+    queue.retry(job, delay=60)
+    assert queue.claim() is None
+    assert 0 < queue.next_due() <= 60
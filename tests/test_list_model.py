@@ -0,0 +1,62 @@
+from list_model import ListWindow, PagedListModel
+
+
+class RecordingWindow(ListWindow):
+    def __init__(self, rows=5):
+        self.selections = []
+        super().__init__(rows, on_select=self.selections.append, format_row=lambda row: f"row {row}")
+        self.rendered = []
+
+    def render(self):
+        self.rendered = self.visible_rows()
+
+
+def numbers(count):
+    return PagedListModel(lambda offset, limit: list(range(offset, min(count, offset + limit))), count,
+                          page_size=4)
+
+
+def test_select_scrolls_the_selection_into_view():
+    window = RecordingWindow()
+    window.set_model(numbers(100))
+    window.select(12)
+    assert (window.top, window.selected) == (8, 12)
+    assert window.rendered == [f"row {i}" for i in range(8, 13)]
+    window.select(3)
+    assert window.top == 3
+    assert window.selections == [12, 3]
+
+
+def test_move_and_scroll_stay_within_the_model():
+    window = RecordingWindow()
+    window.set_model(numbers(20))
+    window.move(1)
+    assert window.selected == 1
+    window.move(100)
+    assert (window.top, window.selected) == (15, 19)
+    window.scroll_by(-100)
+    assert window.top == 0
+    window.scroll_to(0.5)
+    assert window.top == 10
+    assert window.scroll_fraction() == (0.5, 0.75)
+
+
+def test_keep_position_clamps_the_selection_to_a_shorter_model():
+    window = RecordingWindow()
+    window.set_model(numbers(20))
+    window.select(18)
+    window.set_model(numbers(10), keep_position=True)
+    assert window.selected == 9
+    assert window.top == 5
+    window.set_model(numbers(10))
+    assert (window.top, window.selected) == (0, None)
+
+
+def test_empty_model():
+    window = RecordingWindow()
+    window.set_model(numbers(0))
+    window.select(3)
+    assert window.selected is None
+    assert window.selected_item() is None
+    assert window.rendered == []
+    assert window.scroll_fraction() == (0.0, 1.0)
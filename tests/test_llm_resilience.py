@@ -0,0 +1,142 @@
+import threading
+
+import pytest
+
+import llm_resilience
+from llm_resilience import CircuitBreaker, CircuitOpenError, RateLimiter, ResilientCaller, RetryPolicy
+
+
+class FakeClock:
+    """Stands in for the time module: sleeping advances the clock instead of waiting"""
+
+    def __init__(self):
+        self.now = 1000.0
+        self._lock = threading.Lock()
+
+    def monotonic(self):
+        with self._lock:
+            return self.now
+
+    def sleep(self, seconds):
+        self.advance(seconds)
+
+    def advance(self, seconds):
+        with self._lock:
+            self.now += seconds
+
+
+class FixedDelay(RetryPolicy):
+    def delay(self, attempt):
+        return 1.0
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(llm_resilience, "time", clock)
+    return clock
+
+
+def slow_failure(clock, seconds, timeouts):
+    """A request that takes `seconds` and then times out, recording the timeout it was given"""
+    def fn(timeout):
+        timeouts.append(round(timeout, 3))
+        clock.advance(seconds)
+        raise TimeoutError("request timed out")
+    return fn
+
+
+def test_breaker_opens_then_probes_then_closes(clock):
+    breaker = CircuitBreaker(failure_threshold=2, reset_after=30.0)
+    assert breaker.allow() and breaker.state == CircuitBreaker.CLOSED
+
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.CLOSED
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    assert not breaker.allow()
+
+    clock.advance(30.0)
+    assert breaker.allow()
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    # Only one probe at a time
+    assert not breaker.allow()
+
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert breaker.allow()
+
+
+def test_failed_probe_reopens_the_breaker(clock):
+    breaker = CircuitBreaker(failure_threshold=1, reset_after=30.0)
+    breaker.record_failure()
+    clock.advance(30.0)
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    assert not breaker.allow()
+
+
+def test_caller_fails_fast_while_the_circuit_is_open(clock):
+    caller = ResilientCaller(deadline=10.0, retry=RetryPolicy(attempts=1),
+                             breaker_factory=lambda: CircuitBreaker(failure_threshold=2, reset_after=30.0))
+    timeouts = []
+    for _ in range(2):
+        with pytest.raises(TimeoutError):
+            caller.call(slow_failure(clock, 1.0, timeouts), key="model")
+    assert caller.stats()["breakers"] == {"model": CircuitBreaker.OPEN}
+
+    with pytest.raises(CircuitOpenError):
+        caller.call(lambda timeout: "never sent", key="model")
+    assert len(timeouts) == 2
+
+    clock.advance(30.0)
+    assert caller.call(lambda timeout: "ok", key="model") == "ok"
+    assert caller.stats()["breakers"] == {"model": CircuitBreaker.CLOSED}
+
+
+def test_retries_stop_at_the_deadline_and_get_the_time_left(clock):
+    caller = ResilientCaller(deadline=10.0, retry=FixedDelay(attempts=10))
+    timeouts = []
+    with pytest.raises(TimeoutError):
+        caller.call(slow_failure(clock, 3.0, timeouts))
+    # 3s per attempt plus 1s backoff: the third attempt only has 2s left and there is no fourth
+    assert timeouts == [10.0, 6.0, 2.0]
+    stats = caller.stats()
+    assert stats["retries"] == 2
+    assert stats["failures"] == 1
+
+
+def test_bad_request_is_not_retried(clock):
+    caller = ResilientCaller(deadline=10.0, retry=FixedDelay(attempts=3))
+    calls = []
+
+    def bad_request(timeout):
+        calls.append(timeout)
+        raise ValueError("invalid request")
+
+    with pytest.raises(ValueError):
+        caller.call(bad_request)
+    assert len(calls) == 1
+
+
+def test_rate_limiter_spaces_out_acquisitions(clock):
+    limiter = RateLimiter(rate=2.0, capacity=2)
+    waits = [limiter.acquire() for _ in range(5)]
+    # The burst goes through at once, then one token every half second
+    assert waits == [0.0, 0.0, 0.5, 0.5, 0.5]
+
+
+def test_caller_takes_a_token_per_request(clock):
+    caller = ResilientCaller(deadline=10.0)
+    caller.limit_rate(120)
+    sent_at = []
+
+    def fn(timeout):
+        sent_at.append(clock.monotonic())
+        return "ok"
+
+    for _ in range(3):
+        caller.call(fn)
+    assert [round(t - sent_at[0], 3) for t in sent_at] == [0.0, 0.5, 1.0]
+    assert caller.stats()["requests"] == 3
@@ -0,0 +1,122 @@
+import sqlite3
+import threading
+import time
+from collections import Counter
+
+import pytest
+
+import reminder_scheduler
+from reminder_scheduler import DELIVERED, FAILED, MAX_ATTEMPTS, PENDING, SENDING, ReminderScheduler
+from tools.reminder_backends import ReminderBackend
+
+
+class RecordingBackend(ReminderBackend):
+    name = "recording"
+
+    def __init__(self, error=None):
+        self.error = error
+        self.batches = []
+        self._lock = threading.Lock()
+
+    def deliver(self, reminders):
+        with self._lock:
+            self.batches.append(list(reminders))
+        if self.error is not None:
+            raise self.error
+
+    @property
+    def notes(self):
+        with self._lock:
+            return [note for batch in self.batches for note, _ in batch]
+
+
+@pytest.fixture(autouse=True)
+def fast_timers(monkeypatch):
+    monkeypatch.setattr(reminder_scheduler, "RELOAD_INTERVAL", 0.05)
+    monkeypatch.setattr(reminder_scheduler, "RETRY_DELAY", 0.0)
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    return str(tmp_path / "reminders.db")
+
+
+def statuses(db_path):
+    with sqlite3.connect(db_path) as conn:
+        return dict(conn.execute("SELECT note, status FROM reminders"))
+
+
+def wait_for(condition, timeout=10.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.02)
+    return False
+
+
+def insert_claimed(db_path, note, claimed_at):
+    """A reminder claimed by a scheduler that is no longer around"""
+    with sqlite3.connect(db_path) as conn:
+        conn.execute(
+            "INSERT INTO reminders (note, due_at, deliver_at, status, attempts, claimed_by, claimed_at) "
+            "VALUES (?, ?, ?, ?, 1, 'dead-host:1:0', ?)",
+            (note, claimed_at, claimed_at, SENDING, claimed_at),
+        )
+
+
+def test_two_schedulers_deliver_each_reminder_once(db_path):
+    backends = [RecordingBackend(), RecordingBackend()]
+    schedulers = [ReminderScheduler(db_path, backend=backend, batch_window=0.01).start() for backend in backends]
+    try:
+        notes = [f"reminder {i}" for i in range(40)]
+        for i, note in enumerate(notes):
+            schedulers[i % 2].add(note, time.time())
+        assert wait_for(lambda: set(statuses(db_path).values()) == {DELIVERED})
+    finally:
+        for scheduler in schedulers:
+            scheduler.stop()
+
+    delivered = Counter(backends[0].notes + backends[1].notes)
+    assert set(delivered) == set(notes)
+    assert max(delivered.values()) == 1
+
+
+def test_reminder_added_by_another_process_is_picked_up(db_path):
+    backend = RecordingBackend()
+    scheduler = ReminderScheduler(db_path, backend=backend, batch_window=0.01).start()
+    try:
+        other = ReminderScheduler(db_path, backend=RecordingBackend())
+        other.add("from another process", time.time())
+        assert wait_for(lambda: backend.notes == ["from another process"])
+    finally:
+        scheduler.stop()
+
+
+def test_only_stale_claims_are_taken_over(db_path):
+    ReminderScheduler(db_path, backend=RecordingBackend())
+    insert_claimed(db_path, "recent claim", time.time() - 30)
+    insert_claimed(db_path, "stale claim", time.time() - 120)
+
+    scheduler = ReminderScheduler(db_path, backend=RecordingBackend(), claim_timeout=60)
+    assert scheduler.stats()["reclaimed"] == 1
+    assert statuses(db_path) == {"recent claim": SENDING, "stale claim": PENDING}
+
+    scheduler.start()
+    try:
+        assert wait_for(lambda: scheduler.backend.notes == ["stale claim"])
+    finally:
+        scheduler.stop()
+    assert statuses(db_path)["recent claim"] == SENDING
+
+
+def test_failing_backend_gives_up_after_max_attempts(db_path):
+    backend = RecordingBackend(error=OSError("notification daemon is down"))
+    scheduler = ReminderScheduler(db_path, backend=backend, batch_window=0.01).start()
+    try:
+        scheduler.add("dentist", time.time())
+        assert wait_for(lambda: statuses(db_path) == {"dentist": FAILED})
+    finally:
+        scheduler.stop()
+    assert backend.notes == ["dentist"] * MAX_ATTEMPTS
+    assert scheduler.stats()["failed"] == 1
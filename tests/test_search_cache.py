@@ -0,0 +1,67 @@
+import threading
+
+import pytest
+
+from tools.cached_search_tool import SearchCache
+
+
+class FakeBackend:
+    name = "fake"
+
+    def __init__(self, release=None):
+        self.release = release
+        self.calls = 0
+
+    def search(self, query, search_type):
+        self.calls += 1
+        if self.release is not None:
+            self.release.wait(5)
+        return {"organic": [{"title": query}]}
+
+
+class FailingResponses:
+    """Response cache whose writes fail, like a locked or full SQLite database"""
+
+    def get(self, key):
+        return None
+
+    def put(self, key, model, response):
+        raise OSError("disk full")
+
+
+def test_failed_cache_write_still_returns_and_resolves_waiters():
+    release = threading.Event()
+    backend = FakeBackend(release)
+    cache = SearchCache(FailingResponses(), backend=backend)
+    results = []
+
+    def search():
+        results.append(cache.search("python sqlite"))
+
+    threads = [threading.Thread(target=search) for _ in range(3)]
+    for thread in threads:
+        thread.start()
+    while not cache._in_flight:
+        pass
+    release.set()
+    for thread in threads:
+        thread.join(5)
+
+    assert not any(thread.is_alive() for thread in threads)
+    assert len(results) == 3
+    assert all(result == {"organic": [{"title": "python sqlite"}]} for result in results)
+    assert not cache._in_flight
+    # Nothing was cached, so the next identical query fetches again instead of hanging
+    assert cache.search("Python SQLite") == {"organic": [{"title": "Python SQLite"}]}
+
+
+def test_backend_error_is_raised_and_key_released():
+    class BrokenBackend(FakeBackend):
+        def search(self, query, search_type):
+            raise RuntimeError("quota exceeded")
+
+    cache = SearchCache(FailingResponses(), backend=BrokenBackend())
+    with pytest.raises(RuntimeError):
+        cache.search("python")
+    assert not cache._in_flight
+    assert cache._counts["errors"] == 1
@@ -0,0 +1,85 @@
+import threading
+
+import pytest
+
+from crews.crew import CombinedClassificationOutput
+from crews.fast_classifier import RESEARCH, FastClassifier
+from crews.speculative import get_speculative_runner
+
+
+class FakeCrew:
+    def __init__(self, kickoff):
+        self._kickoff = kickoff
+
+    def kickoff(self, inputs):
+        return self._kickoff()
+
+
+class FakeCrewInstance:
+    """Stands in for PostScreenshotCrew: classifies as `task_type`/`action` and records the crews it builds"""
+
+    def __init__(self, task_type="Actions", action="research", branch_started=None):
+        self.task_type = task_type
+        self.action = action
+        self.branch_started = branch_started
+        self.built = []
+
+    def classification_crew(self, router, mode='combined'):
+        self.built.append(("classification", mode))
+
+        def kickoff():
+            router.on_classified(CombinedClassificationOutput(
+                task_type=self.task_type, action=self.action, notes="note", screenshot="screenshot.png"))
+            return "classified"
+        return FakeCrew(kickoff)
+
+    def routed_crew(self, route):
+        self.built.append(("routed", route))
+
+        def kickoff():
+            if self.branch_started is not None:
+                self.branch_started.set()
+            return f"{route} output"
+        return FakeCrew(kickoff)
+
+
+@pytest.fixture
+def runner(monkeypatch):
+    monkeypatch.delenv("SCREENSHOT_SPECULATE_ROUTES", raising=False)
+    monkeypatch.delenv("SCREENSHOT_SPECULATE_MIN_CONFIDENCE", raising=False)
+    return get_speculative_runner()
+
+
+def test_default_routes_speculate_on_a_rules_guess(runner):
+    classification = FastClassifier().classify("how to cook rice")
+    assert classification.route is None
+    assert classification.guess == RESEARCH
+    assert runner.should_speculate(classification)
+
+    crew_instance, branch_started = FakeCrewInstance(), threading.Event()
+    branch_instance = FakeCrewInstance(branch_started=branch_started)
+    output, llm_classification = runner.run(crew_instance, branch_instance, {}, classification.guess)
+
+    assert branch_started.is_set()
+    assert branch_instance.built == [("routed", RESEARCH)]
+    assert crew_instance.built == [("classification", "combined")]
+    assert output == "research output"
+    assert llm_classification.route == RESEARCH
+    assert runner.stats()["hits"] == 1
+
+
+def test_miss_runs_the_classified_route_on_the_warm_instance(runner):
+    crew_instance = FakeCrewInstance(task_type="Summarize notes", action="none")
+    branch_instance = FakeCrewInstance()
+    output, llm_classification = runner.run(crew_instance, branch_instance, {}, RESEARCH, mode="sequential")
+
+    assert crew_instance.built == [("classification", "sequential"), ("routed", "summarize")]
+    assert branch_instance.built == [("routed", RESEARCH)]
+    assert output == "summarize output"
+    assert runner.stats()["misses"] == 1
+
+
+def test_reminder_guess_is_not_speculated(runner):
+    classification = FastClassifier().classify("meeting notes")
+    assert classification.guess == "reminder"
+    assert not runner.should_speculate(classification)
@@ -0,0 +1,31 @@
+from PIL import Image
+
+from thumbnail_cache import ThumbnailCache
+
+
+def cache_bytes(cache_dir):
+    return sum(path.stat().st_size for path in cache_dir.glob("*.jpg"))
+
+
+def test_overwriting_an_entry_counts_only_its_new_size(tmp_path):
+    screenshot = tmp_path / "screenshot.png"
+    Image.new("RGB", (64, 64), "white").save(screenshot)
+    cache_dir = tmp_path / "thumbnails"
+    cache = ThumbnailCache(str(cache_dir))
+
+    cache.put(str(screenshot), (32, 32), Image.new("RGB", (32, 32), "red"))
+    for _ in range(5):
+        cache.put(str(screenshot), (32, 32), Image.effect_noise((32, 32), 64).convert("RGB"))
+    cache.put(str(screenshot), (16, 16), Image.new("RGB", (16, 16), "blue"))
+
+    assert cache._total_bytes == cache_bytes(cache_dir)
+
+
+def test_eviction_keeps_the_cache_under_budget(tmp_path):
+    cache_dir = tmp_path / "thumbnails"
+    cache = ThumbnailCache(str(cache_dir), max_bytes=4000)
+    for i in range(20):
+        screenshot = tmp_path / f"screenshot_{i}.png"
+        Image.new("RGB", (8, 8), "white").save(screenshot)
+        cache.put(str(screenshot), (64, 64), Image.effect_noise((64, 64), 64).convert("RGB"))
+        assert cache._total_bytes == cache_bytes(cache_dir) <= 4000
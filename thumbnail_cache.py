@@ -0,0 +1,138 @@
+import hashlib
+import os
+import threading
+from PIL import Image
+
+# Size of the preview shown in the viewer, cached at capture time
+PREVIEW_SIZE = (500, 300)
+# Size of the preview shown in the note dialog
+DIALOG_PREVIEW_SIZE = (200, 200)
+
+
+def fit_size(size, max_size):
+    """Largest size within max_size that keeps the aspect ratio (never upscales)"""
+    ratio = min(max_size[0] / size[0], max_size[1] / size[1], 1.0)
+    return (max(1, int(size[0] * ratio)), max(1, int(size[1] * ratio)))
+
+
+def make_thumbnail(img, size):
+    """Scale an image into a new one that fits within size.
+
+    The source is left untouched, so it can be shared with other threads, and
+    reducing_gap lets Pillow do a cheap integer reduce before resampling.
+    """
+    if img.mode != 'RGB':
+        img = img.convert('RGB')
+    return img.resize(fit_size(img.size, size), Image.Resampling.LANCZOS, reducing_gap=2.0)
+
+
+def decode_reduced(path, size):
+    """Decode an image at (close to) the requested size.
+
+    JPEG files are decoded at a reduced DCT scale via draft(); other formats
+    are decoded fully but reduced by an integer factor before resampling.
+    """
+    with Image.open(path) as img:
+        img.draft('RGB', (size[0] * 2, size[1] * 2))
+        return make_thumbnail(img, size)
+
+
+class ThumbnailCache:
+    """
+        Disk-backed thumbnail cache.
+
+        Entries are keyed by the source path, its mtime and size, and the thumbnail
+        size, so a modified screenshot never serves a stale thumbnail. The cache is
+        kept under max_bytes by evicting the least recently used entries (reads
+        bump the entry's mtime).
+    """
+
+    def __init__(self, cache_dir, max_bytes=64 * 1024 * 1024):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._total_bytes = None
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def _entry_path(self, path, size):
+        try:
+            st = os.stat(path)
+        except OSError:
+            return None
+        key = f"{os.path.abspath(path)}|{st.st_mtime_ns}|{st.st_size}|{size[0]}x{size[1]}"
+        digest = hashlib.sha1(key.encode("utf-8")).hexdigest()
+        return os.path.join(self.cache_dir, digest + ".jpg")
+
+    def get(self, path, size):
+        """Return the cached thumbnail or None"""
+        entry = self._entry_path(path, size)
+        if entry is None:
+            return None
+        try:
+            with Image.open(entry) as img:
+                img.load()
+            os.utime(entry)
+            return img
+        except (OSError, ValueError):
+            return None
+
+    def put(self, path, size, thumb):
+        """Store a thumbnail for path (already scaled to fit size)"""
+        entry = self._entry_path(path, size)
+        if entry is None:
+            return
+        tmp_path = f"{entry}.{threading.get_ident()}.tmp"
+        try:
+            thumb.save(tmp_path, 'JPEG', quality=85)
+            self._replace(tmp_path, entry)
+        except OSError as e:
+            print(f"Error writing thumbnail: {str(e)}")
+
+    def load(self, path, size):
+        """Return the thumbnail for path, decoding and caching it on a miss"""
+        thumb = self.get(path, size)
+        if thumb is None:
+            thumb = decode_reduced(path, size)
+            self.put(path, size, thumb)
+        return thumb
+
+    def _entries(self):
+        entries = []
+        for entry in os.scandir(self.cache_dir):
+            if entry.name.endswith(".jpg"):
+                try:
+                    st = entry.stat()
+                except OSError:
+                    continue
+                entries.append((st.st_mtime, st.st_size, entry.path))
+        return entries
+
+    def _replace(self, tmp_path, entry):
+        """Move a new thumbnail into place, counting only the bytes it adds over any entry it overwrites"""
+        with self._lock:
+            try:
+                previous = os.path.getsize(entry)
+            except OSError:
+                previous = 0
+            os.replace(tmp_path, entry)
+            if self._total_bytes is None:
+                self._total_bytes = sum(size for _, size, _ in self._entries())
+            else:
+                self._total_bytes += os.path.getsize(entry) - previous
+            if self._total_bytes > self.max_bytes:
+                self._evict()
+
+    def _evict(self):
+        # Evict down to 90% of the budget so we don't rescan on every put
+        entries = sorted(self._entries())
+        total = sum(size for _, size, _ in entries)
+        target = self.max_bytes * 0.9
+        for _, size, path in entries:
+            if total <= target:
+                break
+            try:
+                os.remove(path)
+                total -= size
+            except OSError:
+                pass
+        self._total_bytes = total
@@ -0,0 +1,127 @@
+import json
+import os
+import re
+import threading
+import unicodedata
+from concurrent.futures import Future
+from typing import Any, Type
+
+from crewai.tools import BaseTool
+from pydantic import BaseModel, Field
+
+from response_cache import ResponseCache, make_key
+from tools.search_backends import get_search_backend
+
+# Search results go stale faster than LLM answers
+DEFAULT_TTL = 24 * 3600
+DEFAULT_MAX_BYTES = 8 * 1024 * 1024
+
+
+def normalize_query(query):
+    """Cache key form of a query, ignoring case, Unicode compatibility forms, punctuation and spacing"""
+    query = unicodedata.normalize("NFKC", query or "").casefold()
+    # Keep characters that change what is searched for, e.g. "c++", "c#", "node.js"
+    query = re.sub(r"[^\w\s+#.\-]", " ", query)
+    query = re.sub(r"(?<!\w)[.\-]+|[.\-]+(?!\w)", " ", query)
+    return " ".join(query.split())
+
+
+class SearchCache:
+    """
+        Persistent search result cache with in-flight request coalescing.
+
+        Results are stored in a ResponseCache keyed by the backend, search type
+        and normalized query. While a query is being fetched, other threads
+        asking for the same key wait for that fetch instead of sending their
+        own, so concurrent research tasks share one backend call.
+    """
+
+    def __init__(self, responses, backend=None):
+        self.responses = responses
+        self._backend = backend
+        self._lock = threading.Lock()
+        self._in_flight = {}
+        self._counts = {"fetches": 0, "coalesced": 0, "errors": 0}
+
+    @property
+    def backend(self):
+        if self._backend is None:
+            self._backend = get_search_backend()
+        return self._backend
+
+    def search(self, query, search_type="search"):
+        key = make_key(self.backend.name, [search_type, normalize_query(query)])
+        with self._lock:
+            future = self._in_flight.get(key)
+            leader = future is None
+            if leader:
+                cached = self.responses.get(key)
+                if cached is not None:
+                    return json.loads(cached)
+                future = self._in_flight[key] = Future()
+            else:
+                self._counts["coalesced"] += 1
+        if not leader:
+            return future.result()
+
+        try:
+            results = self.backend.search(query, search_type)
+        except BaseException as e:
+            self._release(key, "errors")
+            future.set_exception(e)
+            raise
+        try:
+            self.responses.put(key, self.backend.name, json.dumps(results))
+        except Exception as e:
+            # The results are still good, they just won't be cached
+            print(f"Error caching search results: {e}")
+        finally:
+            self._release(key, "fetches")
+            future.set_result(results)
+        return results
+
+    def _release(self, key, outcome):
+        """Stop coalescing onto key's fetch, counting how it went"""
+        with self._lock:
+            self._counts[outcome] += 1
+            del self._in_flight[key]
+
+    def stats(self):
+        cache = self.responses.stats()
+        with self._lock:
+            return dict(self._counts, hits=cache["hits"], hit_rate=cache["hit_rate"], bytes=cache["bytes"])
+
+
+_default_cache = None
+_default_lock = threading.Lock()
+
+
+def get_search_cache():
+    """Shared search cache at SCREENSHOT_SEARCH_CACHE (screenshots_notes/search_cache.db by default)"""
+    global _default_cache
+    with _default_lock:
+        if _default_cache is None:
+            path = os.environ.get("SCREENSHOT_SEARCH_CACHE", os.path.join("screenshots_notes", "search_cache.db"))
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+            _default_cache = SearchCache(ResponseCache(path, ttl=DEFAULT_TTL, max_bytes=DEFAULT_MAX_BYTES))
+    return _default_cache
+
+
+class CachedSearchToolSchema(BaseModel):
+    search_query: str = Field(..., description="Mandatory search query you want to use to search the internet")
+    search_type: str = Field(default="search", description="'search' (default) or 'news'")
+
+
+class CachedSearchTool(BaseTool):
+    """Web search (Serper by default) through the shared SearchCache."""
+
+    name: str = "Search the internet"
+    description: str = (
+        "A tool that can be used to search the internet with a search_query. "
+        "Supports different search types: 'search' (default), 'news'"
+    )
+    args_schema: Type[BaseModel] = CachedSearchToolSchema
+    cache: Any = Field(default=None, exclude=True)
+
+    def _run(self, search_query: str, search_type: str = "search", **kwargs: Any) -> Any:
+        return (self.cache or get_search_cache()).search(search_query, search_type)
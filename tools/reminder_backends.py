@@ -0,0 +1,119 @@
+import os
+import shutil
+import subprocess
+import sys
+from datetime import datetime
+
+# Creates one reminder per group of 5 arguments: name, year, month, day, seconds into the day.
+# Values arrive as argv, so notes are never parsed as AppleScript.
+APPLESCRIPT = '''
+on run argv
+    repeat with i from 1 to (count of argv) by 5
+        set remindAt to current date
+        set day of remindAt to 1
+        set year of remindAt to (item (i + 1) of argv) as integer
+        set month of remindAt to (item (i + 2) of argv) as integer
+        set day of remindAt to (item (i + 3) of argv) as integer
+        set time of remindAt to (item (i + 4) of argv) as integer
+        tell application "Reminders"
+            make new reminder with properties {name:(item i of argv), remind me date:remindAt}
+        end tell
+    end repeat
+end run
+'''
+
+
+class ReminderBackend:
+    """
+        Where reminders end up.
+
+        deliver() takes a batch of (note, due_at) pairs. Backends with
+        `schedules_ahead` hand reminders to an app that alerts at the due time
+        itself, so they are delivered as soon as they are added; the others
+        are alerts and are delivered when the reminder is due.
+    """
+
+    name = None
+    schedules_ahead = False
+
+    @classmethod
+    def is_available(cls):
+        return True
+
+    def deliver(self, reminders):
+        raise NotImplementedError
+
+
+class AppleRemindersBackend(ReminderBackend):
+    """macOS Reminders app, one osascript process per batch"""
+
+    name = "reminders"
+    schedules_ahead = True
+
+    @classmethod
+    def is_available(cls):
+        return sys.platform == "darwin" and shutil.which("osascript") is not None
+
+    def deliver(self, reminders):
+        args = []
+        for note, due_at in reminders:
+            due = datetime.fromtimestamp(due_at)
+            seconds = due.hour * 3600 + due.minute * 60 + due.second
+            args += [note, str(due.year), str(due.month), str(due.day), str(seconds)]
+        result = subprocess.run(["osascript", "-e", APPLESCRIPT, *args], capture_output=True, text=True, timeout=60)
+        if result.returncode != 0:
+            raise RuntimeError(f"osascript failed: {result.stderr.strip()}")
+
+
+class NotifySendBackend(ReminderBackend):
+    """Linux desktop notification; reminders due together share one notification"""
+
+    name = "notify"
+
+    @classmethod
+    def is_available(cls):
+        return (sys.platform.startswith("linux") and shutil.which("notify-send") is not None
+                and bool(os.environ.get("DISPLAY") or os.environ.get("WAYLAND_DISPLAY")))
+
+    def deliver(self, reminders):
+        notes = [note for note, _ in reminders]
+        title = "Reminder" if len(notes) == 1 else f"{len(notes)} reminders"
+        body = notes[0] if len(notes) == 1 else "\n".join(f"• {note}" for note in notes)
+        subprocess.run(["notify-send", "--app-name=Screenshot Notes", title, body], check=True, timeout=10)
+
+
+class LogBackend(ReminderBackend):
+    """Appends due reminders to a log file; works everywhere"""
+
+    name = "log"
+
+    def __init__(self, path=None):
+        self.path = path or os.environ.get("SCREENSHOT_REMINDER_LOG", os.path.join("screenshots_notes", "reminders.log"))
+
+    def deliver(self, reminders):
+        delivered_at = datetime.now().isoformat(timespec="seconds")
+        with open(self.path, "a") as f:
+            for note, due_at in reminders:
+                due = datetime.fromtimestamp(due_at).isoformat(timespec="seconds")
+                f.write(f"{delivered_at}\tdue {due}\t{note}\n")
+
+
+BACKENDS = {
+    backend.name: backend
+    for backend in (AppleRemindersBackend, NotifySendBackend, LogBackend)
+}
+
+
+def get_reminder_backend(name=None):
+    """Return the named backend, or the first available one for this platform.
+
+    The name can also be set with the SCREENSHOT_REMINDER_BACKEND environment variable.
+    """
+    name = name or os.environ.get("SCREENSHOT_REMINDER_BACKEND")
+    if name:
+        if name not in BACKENDS:
+            raise ValueError(f"Unknown reminder backend: {name}")
+        return BACKENDS[name]()
+    for backend in BACKENDS.values():
+        if backend.is_available():
+            return backend()
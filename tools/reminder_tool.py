@@ -1,38 +1,39 @@
 from crewai.tools import BaseTool
-import subprocess
-from typing import Optional
-from pydantic import Field
+from datetime import datetime
+from typing import Type
+from pydantic import BaseModel, Field
+
+TIME_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+
+class ReminderToolSchema(BaseModel):
+    note: str = Field(..., description="The note content for the reminder")
+    time: str = Field(..., description="The time for the reminder in format YYYY-MM-DD HH:MM:SS")
+
+
+def parse_time(value):
+    try:
+        return datetime.strptime(value.strip(), TIME_FORMAT)
+    except ValueError:
+        return datetime.fromisoformat(value.strip())
+
 
 class ReminderTool(BaseTool):
-    """Tool to set reminders using AppleScript."""
-    
+    """Tool to set reminders through the local reminder scheduler.
+
+    The tool holds no per-call state, so one instance is shared by every crew.
+    """
+
     name: str = "ReminderTool"
     description: str = "A tool to set reminders with a specific time and note"
-    
-    note: str = Field(default="", description="The note content for the reminder")
-    time: str = Field(default="", description="The time for the reminder in format YYYY-MM-DD HH:MM:SS")
-    
-    def update_parameters(self, note: Optional[str] = None, time: Optional[str] = None):
-        """Update the reminder parameters at runtime"""
-        if note:
-            self.note = note
-        if time:
-            self.time = time
-        return self
-
-    def execute(self, note: Optional[str] = None, time: Optional[str] = None):
-        # Update parameters if provided
-        if note or time:
-            self.update_parameters(note, time)
-            
-        # AppleScript to create a reminder
-        applescript = f'''
-        tell application "Reminders"
-            set newReminder to make new reminder with properties {{name:"{self.note}", remind me date:date "{self.time}"}}
-        end tell
-        '''
-        subprocess.run(['osascript', '-e', applescript])
-        return f"Reminder set successfully: {self.note} at {self.time}"
-
-    def _run(self, note: Optional[str] = None, time: Optional[str] = None):
-        return self.execute(note, time)
+    args_schema: Type[BaseModel] = ReminderToolSchema
+
+    def _run(self, note: str, time: str):
+        # Imported here so building the crew doesn't open the reminder database
+        from reminder_scheduler import get_reminder_scheduler
+        try:
+            due = parse_time(time)
+        except ValueError:
+            return f"Could not set reminder: invalid time {time!r}, expected format YYYY-MM-DD HH:MM:SS"
+        get_reminder_scheduler().add(note, due.timestamp())
+        return f"Reminder set successfully: {note} at {due.strftime(TIME_FORMAT)}"
@@ -0,0 +1,114 @@
+import hashlib
+import json
+import os
+import random
+import re
+import threading
+import time
+
+SEARCH_TYPES = ("search", "news")
+
+
+class SearchBackend:
+    """Runs a web search and returns results shaped like Serper's"""
+
+    name = None
+
+    def search(self, query, search_type="search"):
+        raise NotImplementedError
+
+
+class SerperBackend(SearchBackend):
+    """google.serper.dev (or SERPER_BASE_URL) through crewai_tools' SerperDevTool (needs SERPER_API_KEY)"""
+
+    name = "serper"
+
+    def __init__(self, n_results=10):
+        from crewai_tools import SerperDevTool
+        self.tool = SerperDevTool(n_results=n_results)
+        if os.environ.get("SERPER_BASE_URL"):
+            self.tool.base_url = os.environ["SERPER_BASE_URL"].rstrip("/")
+
+    def search(self, query, search_type="search"):
+        return self.tool._run(search_query=query, search_type=search_type)
+
+
+def _words(text):
+    return set(re.findall(r"\w+", text.lower()))
+
+
+class LocalSearchBackend(SearchBackend):
+    """
+        Offline stand-in for Serper, for load-testing the research path.
+
+        Results come from a JSON lines corpus of {"title", "link", "snippet"}
+        documents ranked by word overlap with the query, or are made up from
+        the query when nothing matches, so the same query always returns the
+        same results. `latency` seconds (plus up to `jitter`) are slept per
+        call to stand in for the network.
+    """
+
+    name = "local"
+
+    def __init__(self, corpus_path=None, latency=None, jitter=0.0, n_results=5):
+        corpus_path = corpus_path or os.environ.get("SCREENSHOT_SEARCH_CORPUS")
+        if latency is None:
+            latency = float(os.environ.get("SCREENSHOT_SEARCH_LATENCY", 0.3))
+        self.latency = latency
+        self.jitter = jitter
+        self.n_results = n_results
+        self.documents = []
+        if corpus_path:
+            with open(corpus_path, "r") as f:
+                self.documents = [json.loads(line) for line in f if line.strip()]
+        self._index = [(_words(f"{doc['title']} {doc.get('snippet', '')}"), doc) for doc in self.documents]
+        self._lock = threading.Lock()
+        self.calls = 0
+
+    def _rank(self, query):
+        terms = _words(query)
+        scored = [(len(terms & words), doc) for words, doc in self._index]
+        scored = [item for item in scored if item[0]]
+        scored.sort(key=lambda item: item[0], reverse=True)
+        return [doc for _, doc in scored[:self.n_results]]
+
+    def _synthesize(self, query):
+        digest = hashlib.sha256(query.encode("utf-8")).hexdigest()
+        slug = "-".join(sorted(_words(query)))[:60] or "result"
+        return [
+            {
+                "title": f"{query} ({i + 1})",
+                "link": f"https://example.com/{slug}/{digest[i * 6:i * 6 + 6]}",
+                "snippet": f"Offline result {i + 1} for '{query}'.",
+            }
+            for i in range(self.n_results)
+        ]
+
+    def search(self, query, search_type="search"):
+        if search_type not in SEARCH_TYPES:
+            raise ValueError(f"Invalid search type: {search_type}")
+        with self._lock:
+            self.calls += 1
+        if self.latency or self.jitter:
+            time.sleep(self.latency + random.uniform(0, self.jitter))
+        documents = self._rank(query) or self._synthesize(query)
+        results = [dict(doc, position=position) for position, doc in enumerate(documents, 1)]
+        return {
+            "searchParameters": {"q": query, "type": search_type, "engine": self.name},
+            "news" if search_type == "news" else "organic": results,
+            "credits": 0,
+        }
+
+
+BACKENDS = {
+    backend.name: backend
+    for backend in (SerperBackend, LocalSearchBackend)
+}
+
+
+def get_search_backend(name=None):
+    """Return the named search backend (SCREENSHOT_SEARCH_BACKEND, default serper)"""
+    name = name or os.environ.get("SCREENSHOT_SEARCH_BACKEND", "serper")
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown search backend: {name}")
+    return BACKENDS[name]()
@@ -0,0 +1,83 @@
+import tkinter as tk
+from tkinter import font as tkfont
+from tkinter import ttk
+
+from list_model import ListWindow
+
+
+class VirtualListbox(ListWindow, ttk.Frame):
+    """
+        Listbox that only materializes the rows currently on screen.
+
+        The window and selection logic is ListWindow's; this draws the window
+        into a Tk listbox, and the scrollbar, mouse wheel and navigation keys
+        move it over the model, so the widget holds the same number of rows for
+        10 items or 100k.
+    """
+
+    def __init__(self, master, on_select=None, format_row=str, **listbox_options):
+        ttk.Frame.__init__(self, master)
+        ListWindow.__init__(self, listbox_options.get("height", 20), on_select, format_row)
+
+        self.scrollbar = ttk.Scrollbar(self, command=self._on_scrollbar)
+        self.scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.listbox = tk.Listbox(self, exportselection=False, **listbox_options)
+        self.listbox.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+
+        self.listbox.bind('<<ListboxSelect>>', self._on_listbox_select)
+        self.listbox.bind('<Configure>', self._on_resize)
+        self.listbox.bind('<MouseWheel>', self._on_mousewheel)
+        self.listbox.bind('<Button-4>', lambda e: self.scroll_by(-3))
+        self.listbox.bind('<Button-5>', lambda e: self.scroll_by(3))
+        self.listbox.bind('<Up>', lambda e: self._move(-1))
+        self.listbox.bind('<Down>', lambda e: self._move(1))
+        self.listbox.bind('<Prior>', lambda e: self._move(-self.rows))
+        self.listbox.bind('<Next>', lambda e: self._move(self.rows))
+        self.listbox.bind('<Home>', lambda e: self._select_and_break(0))
+        self.listbox.bind('<End>', lambda e: self._select_and_break(len(self.model) - 1))
+
+    def select(self, index):
+        """Select an absolute index, scroll it into view and notify on_select"""
+        if len(self.model):
+            self.listbox.focus_set()
+        super().select(index)
+
+    def render(self):
+        """Redraw the visible window of rows"""
+        rows = self.visible_rows()
+        self.listbox.delete(0, tk.END)
+        if rows:
+            self.listbox.insert(tk.END, *rows)
+        if self.selected is not None and self.top <= self.selected < self.top + len(rows):
+            self.listbox.selection_set(self.selected - self.top)
+        self.scrollbar.set(*self.scroll_fraction())
+
+    def _on_scrollbar(self, action, *args):
+        if action == "moveto":
+            self.scroll_to(float(args[0]))
+        elif action == "scroll":
+            amount = int(args[0])
+            self.scroll_by(amount * self.rows if args[1] == "pages" else amount)
+
+    def _on_mousewheel(self, event):
+        # Windows reports multiples of 120, macOS small deltas
+        delta = event.delta // 120 if abs(event.delta) >= 120 else event.delta
+        self.scroll_by(-delta * 3)
+        return "break"
+
+    def _on_listbox_select(self, event):
+        selection = self.listbox.curselection()
+        if selection:
+            self.select(self.top + selection[0])
+
+    def _move(self, delta):
+        self.move(delta)
+        return "break"
+
+    def _select_and_break(self, index):
+        self.select(index)
+        return "break"
+
+    def _on_resize(self, event):
+        line_height = tkfont.Font(font=self.listbox.cget("font")).metrics("linespace") + 1
+        self.resize(max(1, event.height // line_height))